@@ -0,0 +1,182 @@
+"""Throughput and latency of the full signup -> login -> me -> refresh -> logout flow
+
+Every virtual user walks the whole flow once; `--concurrency` users are in
+flight at any time. Results are printed and, with `--output`, written as JSON
+so runs from different releases can be diffed.
+
+    python -m benchmarks.auth_flows --users 200 --concurrency 20
+    python -m benchmarks.auth_flows --output results/auth_flows.json
+    python -m benchmarks.auth_flows --database-url postgresql+asyncpg://...
+"""
+
+import argparse
+import asyncio
+import json
+import platform
+import time
+from collections import Counter, defaultdict
+from contextlib import ExitStack
+from datetime import datetime, timezone
+from unittest.mock import patch
+
+from sqlalchemy.engine import make_url
+
+from src.auth import utils
+from .common import auth_prefix, bench_client, summarize
+
+PASSWORD = "benchpass"
+
+
+async def cheap_hash(password: str) -> str:
+    return f"bench${password}"
+
+
+async def cheap_verify(password: str, hash: str) -> bool:
+    return hash == f"bench${password}"
+
+
+class FlowRecorder:
+    def __init__(self):
+        self.latencies: dict[str, list[float]] = defaultdict(list)
+        self.statuses: dict[str, Counter] = defaultdict(Counter)
+
+    async def request(self, name: str, call, expected: int):
+        start = time.perf_counter()
+        res = await call
+        self.latencies[name].append(time.perf_counter() - start)
+        self.statuses[name][res.status_code] += 1
+        return res if res.status_code == expected else None
+
+    def report(self, elapsed: float) -> dict:
+        endpoints = {}
+        for name, samples in self.latencies.items():
+            endpoints[name] = {
+                **summarize(samples),
+                "requests_per_s": round(len(samples) / elapsed, 1),
+                "statuses": {str(k): v for k, v in self.statuses[name].items()},
+            }
+        total = sum(len(samples) for samples in self.latencies.values())
+        return {
+            "requests": total,
+            "elapsed_s": round(elapsed, 3),
+            "requests_per_s": round(total / elapsed, 1),
+            "endpoints": endpoints,
+        }
+
+
+async def run_flow(client, recorder: FlowRecorder, index: int):
+    email = f"flow{index}@example.com"
+    signup = await recorder.request(
+        "signup",
+        client.post(
+            f"{auth_prefix}/signup",
+            json={
+                "first_name": "Flow",
+                "last_name": "User",
+                "username": f"flow{index}",
+                "email": email,
+                "password": PASSWORD,
+            },
+        ),
+        201,
+    )
+    if signup is None:
+        return
+
+    login = await recorder.request(
+        "login",
+        client.post(
+            f"{auth_prefix}/login", json={"email": email, "password": PASSWORD}
+        ),
+        200,
+    )
+    if login is None:
+        return
+    tokens = login.json()
+    access = {"Authorization": f"Bearer {tokens['access_token']}"}
+    refresh = {"Authorization": f"Bearer {tokens['refresh_token']}"}
+
+    await recorder.request("me", client.get(f"{auth_prefix}/me", headers=access), 200)
+    await recorder.request(
+        "refresh_token",
+        client.get(f"{auth_prefix}/refresh_token", headers=refresh),
+        200,
+    )
+    await recorder.request(
+        "logout", client.get(f"{auth_prefix}/logout", headers=access), 200
+    )
+
+
+async def main(
+    users: int,
+    concurrency: int,
+    database_url: str | None,
+    real_hashing: bool,
+    output: str | None,
+):
+    recorder = FlowRecorder()
+    limit = asyncio.Semaphore(concurrency)
+
+    async with bench_client(database_url) as client:
+
+        async def user(index: int):
+            async with limit:
+                await run_flow(client, recorder, index)
+
+        hashing = ExitStack()
+        if not real_hashing:
+            # bcrypt would dominate every number, so by default measure the
+            # request and database path only
+            hashing.enter_context(
+                patch("src.auth.service.generate_password_hash_async", cheap_hash)
+            )
+            hashing.enter_context(
+                patch("src.auth.service.verify_password_async", cheap_verify)
+            )
+
+        start = time.perf_counter()
+        with hashing:
+            await asyncio.gather(*(user(i) for i in range(users)))
+        elapsed = time.perf_counter() - start
+    utils.password_hasher.shutdown()
+
+    result = {
+        "benchmark": "auth_flows",
+        "started_at": datetime.now(timezone.utc).isoformat(),
+        "python": platform.python_version(),
+        "database": (
+            make_url(database_url).get_backend_name() if database_url else "sqlite"
+        ),
+        "users": users,
+        "concurrency": concurrency,
+        "real_hashing": real_hashing,
+        **recorder.report(elapsed),
+    }
+    text = json.dumps(result, indent=2)
+    print(text)
+    if output:
+        with open(output, "w") as f:
+            f.write(text + "\n")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--users", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=20)
+    parser.add_argument("--database-url", default=None)
+    parser.add_argument(
+        "--real-hashing",
+        action="store_true",
+        help="Use bcrypt for signup and login instead of a cheap stand-in",
+    )
+    parser.add_argument("--output", default=None, help="Write JSON results here")
+    args = parser.parse_args()
+    asyncio.run(
+        main(
+            args.users,
+            args.concurrency,
+            args.database_url,
+            args.real_hashing,
+            args.output,
+        )
+    )
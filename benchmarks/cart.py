@@ -0,0 +1,201 @@
+"""Add-to-cart throughput with write-behind, and hot-tier memory per cart
+
+Creates `--users` users and `--products` products, then has `--concurrency`
+workers post `--adds` add-to-cart requests through the API. By default
+carts are flushed by the background write-behind loop; `--write-through`
+flushes after every add instead, which is what a DB transaction per
+mutation would cost. Memory per cart is measured separately by filling a
+MemoryCartStore with `--memory-carts` carts of `--lines` lines each.
+
+    python -m benchmarks.cart --adds 5000 --concurrency 16
+    python -m benchmarks.cart --write-through
+    python -m benchmarks.cart --database-url postgresql+asyncpg://...
+"""
+
+import argparse
+import asyncio
+import json
+import random
+import time
+import tracemalloc
+import uuid
+from datetime import datetime, timezone
+
+from sqlalchemy import func, insert, select
+
+from src.auth.utils import create_access_token
+from src.cart.routes import cart_service
+from src.cart.store import MemoryCartStore
+from src.db.models import CartItem, Product, User
+from .common import bench_client, summarize
+
+
+async def seed(session_factory, users: int, products: int):
+    now = datetime.now(timezone.utc)
+    user_rows = [
+        {
+            "uid": uuid.uuid4(),
+            "username": f"cart{i}",
+            "email": f"cart{i}@example.com",
+            "first_name": "Cart",
+            "last_name": "Bench",
+            "role": "user",
+            "is_verified": True,
+            "auth_provider": "local",
+            "created_at": now,
+            "updated_at": now,
+        }
+        for i in range(users)
+    ]
+    product_rows = [
+        {
+            "id": uuid.uuid4(),
+            "sku": f"CART-{i:06}",
+            "name": f"Product {i}",
+            "description": "",
+            "category": "bench",
+            "price_cents": 1000,
+            "is_active": True,
+            "created_at": now,
+            "updated_at": now,
+        }
+        for i in range(products)
+    ]
+    async with session_factory() as session:
+        conn = await session.connection()
+        await conn.execute(insert(User), user_rows)
+        await conn.execute(insert(Product), product_rows)
+        await session.commit()
+
+    tokens = [
+        create_access_token(
+            user_data={"email": row["email"], "user_uid": str(row["uid"])}
+        )
+        for row in user_rows
+    ]
+    return tokens, [str(row["id"]) for row in product_rows]
+
+
+async def run_adds(
+    client, tokens, product_ids, adds: int, concurrency: int, write_through: bool
+):
+    rng = random.Random(42)
+    work = iter((rng.choice(tokens), rng.choice(product_ids)) for _ in range(adds))
+    latencies = []
+
+    async def worker():
+        for token, product_id in work:
+            start = time.perf_counter()
+            res = await client.post(
+                "/api/v1/cart/items",
+                json={"product_id": product_id},
+                headers={"Authorization": f"Bearer {token}"},
+            )
+            if write_through:
+                await cart_service.flush()
+            latencies.append(time.perf_counter() - start)
+            res.raise_for_status()
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - start
+    return {
+        "adds": adds,
+        "adds_per_s": round(adds / elapsed, 1),
+        **summarize(latencies),
+    }
+
+
+async def memory_per_cart(carts: int, lines: int) -> dict:
+    """Traced allocations per cart, keys built per cart as requests build them"""
+    store = MemoryCartStore(maxsize=carts)
+    product_ids = [uuid.uuid4() for _ in range(lines)]
+
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    for _ in range(carts):
+        user_uid = str(uuid.uuid4())
+        for product_id in product_ids:
+            await store.add(user_uid, str(product_id), 1)
+    used = tracemalloc.get_traced_memory()[0] - before
+    tracemalloc.stop()
+
+    return {
+        "carts": carts,
+        "lines_per_cart": lines,
+        "bytes_per_cart": round(used / carts),
+        "mb_per_100k_carts": round(used / carts * 100000 / 2**20, 1),
+    }
+
+
+async def main(
+    users: int,
+    products: int,
+    adds: int,
+    concurrency: int,
+    write_through: bool,
+    memory_carts: int,
+    lines: int,
+    database_url: str | None,
+):
+    async with bench_client(database_url) as client:
+        cart_service.session_factory = client.session_factory
+        tokens, product_ids = await seed(client.session_factory, users, products)
+
+        if not write_through:
+            cart_service.start()
+        throughput = await run_adds(
+            client, tokens, product_ids, adds, concurrency, write_through
+        )
+        await cart_service.stop()
+
+        async with client.session_factory() as session:
+            result = await session.exec(select(func.sum(CartItem.quantity)))
+            persisted = result.scalar_one()
+
+        throughput.update(
+            {
+                "flushes": cart_service.flushes,
+                "carts_written": cart_service.flushed,
+                "persisted_quantity": persisted,
+            }
+        )
+
+    print(
+        json.dumps(
+            {
+                "mode": "write_through" if write_through else "write_behind",
+                "flush_interval_s": cart_service.flush_interval,
+                "users": users,
+                "concurrency": concurrency,
+                "add_to_cart": throughput,
+                "memory": await memory_per_cart(memory_carts, lines),
+            },
+            indent=2,
+        )
+    )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--users", type=int, default=500)
+    parser.add_argument("--products", type=int, default=200)
+    parser.add_argument("--adds", type=int, default=5000)
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--write-through", action="store_true")
+    parser.add_argument("--memory-carts", type=int, default=10000)
+    parser.add_argument("--lines", type=int, default=5)
+    parser.add_argument("--database-url", default=None)
+    args = parser.parse_args()
+    asyncio.run(
+        main(
+            args.users,
+            args.products,
+            args.adds,
+            args.concurrency,
+            args.write_through,
+            args.memory_carts,
+            args.lines,
+            args.database_url,
+        )
+    )
@@ -0,0 +1,144 @@
+"""Latency of deep catalog pages: keyset cursors vs OFFSET
+
+Seeds `--products` rows, then times fetching page 1, 10, ..., 10,000 of a
+category listing with the service's keyset query and with a plain
+LIMIT/OFFSET query, plus the keyset page through the API. Keyset latency
+should stay flat with depth while OFFSET grows linearly.
+
+    python -m benchmarks.catalog_pagination --products 1000000
+    python -m benchmarks.catalog_pagination --database-url postgresql+asyncpg://...
+"""
+
+import argparse
+import asyncio
+import json
+import random
+import time
+import uuid
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy import insert
+from sqlmodel import select
+
+from src.catalog.routes import catalog_service
+from src.catalog.service import SUMMARY_COLUMNS, encode_cursor
+from src.db.models import Product
+from .common import bench_client, summarize
+
+# Few enough categories that one holds 10,000 pages of a million products
+CATEGORIES = [f"category-{i}" for i in range(4)]
+PAGE_SIZE = 20
+
+
+async def seed(session_factory, products: int, chunk: int = 10000):
+    rng = random.Random(42)
+    start = datetime(2024, 1, 1, tzinfo=timezone.utc)
+    for offset in range(0, products, chunk):
+        rows = [
+            {
+                "id": uuid.uuid4(),
+                "sku": f"SKU-{i:08}",
+                "name": f"Product {i}",
+                "description": "",
+                "category": CATEGORIES[i % len(CATEGORIES)],
+                "price_cents": rng.randrange(100, 100000),
+                "is_active": True,
+                "created_at": start + timedelta(seconds=i),
+                "updated_at": start,
+            }
+            for i in range(offset, min(offset + chunk, products))
+        ]
+        async with session_factory() as session:
+            conn = await session.connection()
+            await conn.execute(insert(Product), rows)
+            await session.commit()
+
+
+def listing(category: str):
+    return (
+        select(*SUMMARY_COLUMNS)
+        .where(Product.is_active, Product.category == category)
+        .order_by(Product.created_at.desc(), Product.id.desc())
+    )
+
+
+async def time_page(client, session_factory, category: str, page: int, runs: int):
+    offset = (page - 1) * PAGE_SIZE
+    keyset_api, keyset_sql, offset_sql = [], [], []
+
+    async with session_factory() as session:
+        cursor = None
+        if page > 1:
+            # Position of the last row on the previous page, found once untimed
+            result = await session.exec(listing(category).offset(offset - 1).limit(1))
+            last = result.one()
+            cursor = encode_cursor("newest", last.created_at, last.id)
+
+        for _ in range(runs):
+            start = time.perf_counter()
+            result = await session.exec(
+                listing(category).offset(offset).limit(PAGE_SIZE)
+            )
+            result.all()
+            offset_sql.append(time.perf_counter() - start)
+
+            start = time.perf_counter()
+            await catalog_service.list_products(
+                session, category=category, limit=PAGE_SIZE, cursor=cursor
+            )
+            keyset_sql.append(time.perf_counter() - start)
+
+    params = {"category": category, "limit": PAGE_SIZE}
+    if cursor:
+        params["cursor"] = cursor
+    for _ in range(runs):
+        start = time.perf_counter()
+        res = await client.get("/api/v1/catalog/products", params=params)
+        res.raise_for_status()
+        keyset_api.append(time.perf_counter() - start)
+
+    return {
+        "keyset_sql": summarize(keyset_sql),
+        "offset_sql": summarize(offset_sql),
+        "keyset_api": summarize(keyset_api),
+    }
+
+
+async def main(products: int, pages: list[int], runs: int, database_url: str | None):
+    async with bench_client(database_url) as client:
+        start = time.perf_counter()
+        await seed(client.session_factory, products)
+        seeded_in = time.perf_counter() - start
+
+        per_category = products // len(CATEGORIES)
+        results = {}
+        for page in pages:
+            if page * PAGE_SIZE > per_category:
+                continue
+            results[f"page_{page}"] = await time_page(
+                client, client.session_factory, CATEGORIES[0], page, runs
+            )
+
+    print(
+        json.dumps(
+            {
+                "products": products,
+                "seed_s": round(seeded_in, 1),
+                "page_size": PAGE_SIZE,
+                "pages": results,
+            },
+            indent=2,
+        )
+    )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--products", type=int, default=1_000_000)
+    parser.add_argument(
+        "--pages", type=int, nargs="+", default=[1, 10, 100, 1000, 10000]
+    )
+    parser.add_argument("--runs", type=int, default=20)
+    parser.add_argument("--database-url", default=None)
+    args = parser.parse_args()
+    asyncio.run(main(args.products, args.pages, args.runs, args.database_url))
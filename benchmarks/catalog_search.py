@@ -0,0 +1,153 @@
+"""Throughput and tail latency of /api/v1/catalog/search
+
+Seeds `--products` rows with names and descriptions drawn from a small
+vocabulary, then runs `--queries` searches through the API from
+`--concurrency` workers, mixing exact words, prefixes and misspellings
+(which take the fuzzy path).
+
+    python -m benchmarks.catalog_search --products 1000000
+    python -m benchmarks.catalog_search --database-url postgresql+asyncpg://...
+"""
+
+import argparse
+import asyncio
+import json
+import random
+import time
+import uuid
+from datetime import datetime, timezone
+
+from sqlalchemy import insert
+
+from src.db.models import Product
+from .common import bench_client, summarize
+
+ADJECTIVES = [
+    "classic", "rugged", "vintage", "compact", "premium", "organic",
+    "wireless", "heated", "foldable", "waterproof", "ergonomic", "modular",
+]  # fmt: skip
+MATERIALS = [
+    "leather", "canvas", "merino", "bamboo", "titanium", "walnut",
+    "ceramic", "linen", "carbon", "copper", "denim", "suede",
+]  # fmt: skip
+NOUNS = [
+    "boots", "backpack", "kettle", "lantern", "blanket", "headphones",
+    "wallet", "jacket", "skillet", "tent", "keyboard", "sneakers",
+    "umbrella", "notebook", "thermos", "hammock",
+]  # fmt: skip
+# Descriptions use their own words so a "material noun" query matches about
+# 1 in 192 products, roughly what a real catalog's two-word query would
+FILLER = [
+    "durable", "everyday", "lightweight", "handmade", "travel", "outdoor",
+    "gift", "warranty", "stitched", "finish", "design", "quality",
+]  # fmt: skip
+
+
+def misspell(word: str, rng: random.Random) -> str:
+    i = rng.randrange(1, len(word) - 1)
+    return word[:i] + word[i + 1] + word[i] + word[i + 2 :]
+
+
+def make_queries(count: int, seed: int = 7) -> list[tuple[str, str]]:
+    rng = random.Random(seed)
+    queries = []
+    for _ in range(count):
+        kind = rng.choice(["exact", "prefix", "typo"])
+        material, noun = rng.choice(MATERIALS), rng.choice(NOUNS)
+        if kind == "exact":
+            q = f"{material} {noun}"
+        elif kind == "prefix":
+            q = f"{material} {noun[:4]}"
+        else:
+            q = f"{misspell(material, rng)} {misspell(noun, rng)}"
+        queries.append((kind, q))
+    return queries
+
+
+async def seed(session_factory, products: int, chunk: int = 10000):
+    rng = random.Random(42)
+    now = datetime(2024, 1, 1, tzinfo=timezone.utc)
+    for offset in range(0, products, chunk):
+        rows = []
+        for i in range(offset, min(offset + chunk, products)):
+            name = " ".join(
+                (rng.choice(ADJECTIVES), rng.choice(MATERIALS), rng.choice(NOUNS))
+            )
+            rows.append(
+                {
+                    "id": uuid.uuid4(),
+                    "sku": f"SKU-{i:08}",
+                    "name": f"{name} {i}",
+                    "description": " ".join(rng.choices(FILLER, k=12)),
+                    "category": rng.choice(NOUNS),
+                    "price_cents": rng.randrange(100, 100000),
+                    "is_active": True,
+                    "created_at": now,
+                    "updated_at": now,
+                }
+            )
+        async with session_factory() as session:
+            conn = await session.connection()
+            await conn.execute(insert(Product), rows)
+            await session.commit()
+
+
+async def run_api(client, queries: list[tuple[str, str]], concurrency: int):
+    latencies = {"exact": [], "prefix": [], "typo": []}
+    fuzzy_hits, empty = 0, 0
+    pending = iter(queries)
+
+    async def worker():
+        nonlocal fuzzy_hits, empty
+        for kind, q in pending:
+            start = time.perf_counter()
+            res = await client.get("/api/v1/catalog/search", params={"q": q})
+            res.raise_for_status()
+            latencies[kind].append(time.perf_counter() - start)
+            body = res.json()
+            fuzzy_hits += body["fuzzy"]
+            empty += not body["items"]
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - start
+
+    return {
+        "queries": len(queries),
+        "qps": round(len(queries) / elapsed, 1),
+        "all": summarize([s for samples in latencies.values() for s in samples]),
+        **{kind: summarize(samples) for kind, samples in latencies.items()},
+        "fuzzy_results": fuzzy_hits,
+        "empty_results": empty,
+    }
+
+
+async def main(products: int, queries: int, concurrency: int, database_url: str | None):
+    async with bench_client(database_url) as client:
+        start = time.perf_counter()
+        await seed(client.session_factory, products)
+        seeded_in = time.perf_counter() - start
+
+        api = await run_api(client, make_queries(queries), concurrency)
+
+    print(
+        json.dumps(
+            {
+                "products": products,
+                "seed_s": round(seeded_in, 1),
+                "concurrency": concurrency,
+                "search_api": api,
+            },
+            indent=2,
+        )
+    )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--products", type=int, default=1_000_000)
+    parser.add_argument("--queries", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--database-url", default=None)
+    args = parser.parse_args()
+    asyncio.run(main(args.products, args.queries, args.concurrency, args.database_url))
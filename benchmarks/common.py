@@ -0,0 +1,97 @@
+"""Helpers for driving the real app in-process during benchmarks"""
+
+import os
+import tempfile
+from contextlib import asynccontextmanager
+from unittest.mock import AsyncMock, patch
+
+from httpx import AsyncClient, ASGITransport
+from sqlalchemy.ext.asyncio import create_async_engine
+from sqlalchemy.orm import sessionmaker
+from sqlmodel import SQLModel
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from src.mail import smtp_transport
+from src.main import app
+from src.db.main import get_read_session, get_session
+from src.ratelimit import rate_limiter
+
+auth_prefix = "/api/v1/auth"
+
+
+def percentile(samples: list[float], pct: float) -> float:
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def summarize(samples: list[float]) -> dict:
+    """Latency summary in milliseconds"""
+    return {
+        "count": len(samples),
+        "p50_ms": round(percentile(samples, 50) * 1000, 2),
+        "p95_ms": round(percentile(samples, 95) * 1000, 2),
+        "p99_ms": round(percentile(samples, 99) * 1000, 2),
+    }
+
+
+@asynccontextmanager
+async def bench_client(database_url: str | None = None):
+    """Yield an AsyncClient bound to the app, backed by a throwaway database
+
+    The SMTP transport is stubbed so mail never shows up in the numbers, and
+    rate limiting is switched off so it doesn't cap the load being measured.
+    """
+    tmpdir = None
+    if database_url is None:
+        tmpdir = tempfile.TemporaryDirectory()
+        database_url = f"sqlite+aiosqlite:///{os.path.join(tmpdir.name, 'bench.db')}"
+
+    engine = create_async_engine(database_url)
+    Session = sessionmaker(bind=engine, class_=AsyncSession, expire_on_commit=False)
+
+    async def bench_session():
+        async with Session() as session:
+            yield session
+
+    async with engine.begin() as conn:
+        await conn.run_sync(SQLModel.metadata.create_all)
+
+    app.dependency_overrides[get_session] = bench_session
+    app.dependency_overrides[get_read_session] = bench_session
+    limiter_enabled, rate_limiter.enabled = rate_limiter.enabled, False
+    try:
+        with patch.object(smtp_transport, "send_email", AsyncMock()):
+            transport = ASGITransport(app=app)
+            async with AsyncClient(
+                transport=transport, base_url="http://localhost"
+            ) as client:
+                client.session_factory = Session
+                yield client
+    finally:
+        rate_limiter.enabled = limiter_enabled
+        app.dependency_overrides.clear()
+        await engine.dispose()
+        if tmpdir is not None:
+            tmpdir.cleanup()
+
+
+async def signup_and_login(client: AsyncClient, index: int, password: str) -> dict:
+    email = f"bench{index}@example.com"
+    await client.post(
+        f"{auth_prefix}/signup",
+        json={
+            "first_name": "Bench",
+            "last_name": "User",
+            "username": f"bench{index}",
+            "email": email,
+            "password": password,
+        },
+    )
+    res = await client.post(
+        f"{auth_prefix}/login", json={"email": email, "password": password}
+    )
+    res.raise_for_status()
+    return {"email": email, **res.json()}
@@ -0,0 +1,95 @@
+"""Flash sale: `--buyers` concurrent checkouts of one SKU with `--stock` units
+
+Every buyer adds the SKU to their cart and checks out at the same moment.
+Reports checkout throughput and latency, how many orders won, and whether
+reserved units ever exceeded the stock (they must not).
+
+    python -m benchmarks.flash_sale --buyers 500 --stock 100
+    python -m benchmarks.flash_sale --database-url postgresql+asyncpg://...
+"""
+
+import argparse
+import asyncio
+import json
+import time
+import uuid
+from collections import Counter
+
+from sqlalchemy import func, insert
+from sqlmodel import select
+
+from src.cart.routes import cart_service
+from src.db.models import Inventory, OrderItem
+from .cart import seed
+from .common import bench_client, summarize
+
+
+async def buy(client, token: str, product_id: str, start: asyncio.Event):
+    headers = {"Authorization": f"Bearer {token}"}
+    res = await client.post(
+        "/api/v1/cart/items", json={"product_id": product_id}, headers=headers
+    )
+    res.raise_for_status()
+
+    await start.wait()
+    began = time.perf_counter()
+    res = await client.post("/api/v1/orders/checkout", headers=headers)
+    return res.status_code, time.perf_counter() - began
+
+
+async def main(buyers: int, stock: int, database_url: str | None):
+    async with bench_client(database_url) as client:
+        cart_service.session_factory = client.session_factory
+        tokens, (product_id,) = await seed(client.session_factory, buyers, 1)
+        async with client.session_factory() as session:
+            conn = await session.connection()
+            await conn.execute(
+                insert(Inventory),
+                [{"product_id": uuid.UUID(product_id), "available": stock}],
+            )
+            await session.commit()
+
+        start = asyncio.Event()
+        tasks = [
+            asyncio.create_task(buy(client, token, product_id, start))
+            for token in tokens
+        ]
+        # Let every buyer get their cart ready, then open the sale
+        await asyncio.sleep(0)
+        while cart_service.stats()["pending"] < buyers:
+            await asyncio.sleep(0.01)
+        began = time.perf_counter()
+        start.set()
+        results = await asyncio.gather(*tasks)
+        elapsed = time.perf_counter() - began
+
+        async with client.session_factory() as session:
+            left = (await session.exec(select(Inventory.available))).one()
+            reserved = (await session.exec(select(func.sum(OrderItem.quantity)))).one()
+
+    statuses = Counter(status for status, _ in results)
+    print(
+        json.dumps(
+            {
+                "buyers": buyers,
+                "stock": stock,
+                "elapsed_s": round(elapsed, 3),
+                "checkouts_per_s": round(buyers / elapsed, 1),
+                "checkout": summarize([seconds for _, seconds in results]),
+                "statuses": {str(k): v for k, v in statuses.items()},
+                "reserved_units": reserved or 0,
+                "stock_left": left,
+                "oversold": (reserved or 0) > stock or left < 0,
+            },
+            indent=2,
+        )
+    )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--buyers", type=int, default=500)
+    parser.add_argument("--stock", type=int, default=100)
+    parser.add_argument("--database-url", default=None)
+    args = parser.parse_args()
+    asyncio.run(main(args.buyers, args.stock, args.database_url))
@@ -0,0 +1,119 @@
+"""Checkout contention on one hot SKU stored as 1 vs. N inventory shards
+
+For each shard count in `--shards`, `--concurrency` workers place `--orders`
+single-unit orders for the same product through OrderService, and the
+throughput, latency, slow-path and rebalance counts are reported. The
+stock check at the end must show nothing oversold.
+
+SQLite serializes every writer whatever the row, so shards can't help
+there; run against Postgres to see row-lock contention go away.
+
+    python -m benchmarks.inventory_shards --orders 2000 --concurrency 32
+    python -m benchmarks.inventory_shards --database-url postgresql+asyncpg://...
+"""
+
+import argparse
+import asyncio
+import json
+import time
+import uuid
+
+from sqlalchemy import func
+from sqlalchemy.exc import DBAPIError
+from sqlmodel import select
+
+from src.db.models import Inventory, OrderItem, User
+from src.errors import OutOfStock
+from src.orders.service import OrderService
+from .cart import seed
+from .common import bench_client, summarize
+
+
+async def run(
+    database_url: str | None, shards: int, orders: int, stock: int, concurrency: int
+) -> dict:
+    service = OrderService()
+    async with bench_client(database_url) as client:
+        session_factory = client.session_factory
+        _, (product_id,) = await seed(session_factory, 1, 1)
+        async with session_factory() as session:
+            user_uid = (await session.exec(select(User.uid))).one()
+            await service.set_stock(uuid.UUID(product_id), stock, session)
+            await service.set_shards(uuid.UUID(product_id), shards, session)
+
+        queue = asyncio.Queue()
+        for _ in range(orders):
+            queue.put_nowait(None)
+        latencies, statuses = [], {"ok": 0, "out_of_stock": 0, "error": 0}
+
+        async def worker():
+            async with session_factory() as session:
+                while not queue.empty():
+                    queue.get_nowait()
+                    began = time.perf_counter()
+                    try:
+                        await service.place_order(user_uid, {product_id: 1}, session)
+                        statuses["ok"] += 1
+                    except OutOfStock:
+                        statuses["out_of_stock"] += 1
+                    except DBAPIError:
+                        # SQLite's "database is locked" under write contention
+                        await session.rollback()
+                        statuses["error"] += 1
+                    latencies.append(time.perf_counter() - began)
+
+        began = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+        elapsed = time.perf_counter() - began
+
+        async with session_factory() as session:
+            left = (await session.exec(select(func.sum(Inventory.available)))).one()
+            reserved = (await session.exec(select(func.sum(OrderItem.quantity)))).one()
+
+    return {
+        "shards": shards,
+        "orders_per_s": round(orders / elapsed, 1),
+        "place_order": summarize(latencies),
+        "statuses": statuses,
+        **service.stats(),
+        "reserved_units": reserved or 0,
+        "stock_left": left,
+        "oversold": (reserved or 0) > stock or left < 0,
+    }
+
+
+async def main(
+    shard_counts: list[int],
+    orders: int,
+    stock: int,
+    concurrency: int,
+    database_url: str | None,
+):
+    results = [
+        await run(database_url, shards, orders, stock, concurrency)
+        for shards in shard_counts
+    ]
+    print(
+        json.dumps(
+            {
+                "orders": orders,
+                "stock": stock,
+                "concurrency": concurrency,
+                "results": results,
+            },
+            indent=2,
+        )
+    )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--shards", type=int, nargs="+", default=[1, 16])
+    parser.add_argument("--orders", type=int, default=2000)
+    parser.add_argument("--stock", type=int, default=1500)
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--database-url", default=None)
+    args = parser.parse_args()
+    asyncio.run(
+        main(args.shards, args.orders, args.stock, args.concurrency, args.database_url)
+    )
@@ -0,0 +1,66 @@
+"""p99 latency of /me while /login requests hammer bcrypt
+
+Runs the same workload twice: once with password checks executed inline on
+the event loop (the old behaviour) and once through the bounded hashing pool.
+
+    python -m benchmarks.password_hashing --logins 40
+"""
+
+import argparse
+import asyncio
+import json
+import time
+from unittest.mock import patch
+
+from src.auth import utils
+from .common import auth_prefix, bench_client, signup_and_login, summarize
+
+PASSWORD = "benchpass"
+
+
+async def blocking_verify(password: str, hash: str) -> bool:
+    return utils.verify_password(password, hash)
+
+
+async def run_workload(logins: int) -> dict:
+    async with bench_client() as client:
+        user = await signup_and_login(client, 0, PASSWORD)
+        headers = {"Authorization": f"Bearer {user['access_token']}"}
+        me_latencies = []
+        done = asyncio.Event()
+
+        async def login():
+            await client.post(
+                f"{auth_prefix}/login",
+                json={"email": user["email"], "password": PASSWORD},
+            )
+
+        async def me():
+            while not done.is_set():
+                start = time.perf_counter()
+                await client.get(f"{auth_prefix}/me", headers=headers)
+                me_latencies.append(time.perf_counter() - start)
+                await asyncio.sleep(0.005)
+
+        async def login_burst():
+            await asyncio.gather(*(login() for _ in range(logins)))
+            done.set()
+
+        await asyncio.gather(me(), login_burst())
+        return {**summarize(me_latencies), "max_ms": round(max(me_latencies) * 1000, 2)}
+
+
+async def main(logins: int):
+    with patch("src.auth.service.verify_password_async", blocking_verify):
+        before = await run_workload(logins)
+    after = await run_workload(logins)
+    utils.password_hasher.shutdown()
+
+    print(json.dumps({"me_inline_bcrypt": before, "me_pooled_bcrypt": after}, indent=2))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--logins", type=int, default=40)
+    args = parser.parse_args()
+    asyncio.run(main(args.logins))
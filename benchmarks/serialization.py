@@ -0,0 +1,84 @@
+"""Per-endpoint serialization cost: generic FastAPI path vs precompiled serializers
+
+Times only turning a route's return value into response bytes, with no
+HTTP or database work, so the difference is purely encoder overhead.
+
+    python -m benchmarks.serialization --number 20000
+"""
+
+import argparse
+import json
+import timeit
+import uuid
+from datetime import datetime, timezone
+
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse, ORJSONResponse
+
+from src.auth.schemas import UserModel, dump_signup, dump_user
+from src.db.models import User
+
+
+def sample_user() -> User:
+    now = datetime.now(timezone.utc)
+    return User(
+        uid=uuid.uuid4(),
+        username="bench",
+        email="bench@example.com",
+        first_name="Bench",
+        last_name="User",
+        role="user",
+        is_verified=True,
+        password_hash="$2b$12$" + "x" * 53,
+        created_at=now,
+        updated_at=now,
+    )
+
+
+def cases(user: User) -> dict:
+    login = {
+        "message": "Login successful",
+        "access_token": "a" * 300,
+        "refresh_token": "r" * 300,
+        "user": {"email": user.email, "uid": str(user.uid)},
+    }
+    signup_message = "Account created successfully. Check email to verify your account"
+
+    def me_generic():
+        # What response_model=UserModel did: validate the ORM row, then encode
+        model = UserModel.model_validate(user, from_attributes=True)
+        return JSONResponse(jsonable_encoder(model)).body
+
+    def signup_generic():
+        model = UserModel.model_validate(user, from_attributes=True)
+        content = {"message": signup_message, "user": model}
+        return JSONResponse(jsonable_encoder(content)).body
+
+    return {
+        "me": (me_generic, lambda: dump_user(user)),
+        "signup": (signup_generic, lambda: dump_signup(signup_message, user)),
+        "login": (
+            lambda: JSONResponse(login).body,
+            lambda: ORJSONResponse(login).body,
+        ),
+    }
+
+
+def main(number: int):
+    results = {}
+    for name, (generic, fast) in cases(sample_user()).items():
+        timings = {}
+        for label, func in (("generic", generic), ("fast", fast)):
+            best = min(timeit.repeat(func, number=number, repeat=5))
+            timings[f"{label}_us"] = round(best / number * 1e6, 2)
+        timings["speedup"] = round(timings["generic_us"] / timings["fast_us"], 2)
+        results[name] = timings
+
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--number", type=int, default=20000)
+    args = parser.parse_args()
+    main(args.number)
@@ -0,0 +1,75 @@
+"""Signup throughput when many clients race for the same emails
+
+Every email is submitted by `--racers` concurrent clients at once. Exactly
+one of them should get a 201 and the rest a 403 UserAlreadyExists; any 500
+means the race leaked an IntegrityError.
+
+    python -m benchmarks.signup_contention --emails 200 --racers 4
+    python -m benchmarks.signup_contention --database-url postgresql+asyncpg://...
+"""
+
+import argparse
+import asyncio
+import json
+import time
+from collections import Counter
+from unittest.mock import patch
+
+from .common import auth_prefix, bench_client, summarize
+
+
+async def cheap_hash(password: str) -> str:
+    return f"bench${password}"
+
+
+async def main(emails: int, racers: int, concurrency: int, database_url: str | None):
+    statuses = Counter()
+    latencies = []
+    limit = asyncio.Semaphore(concurrency)
+
+    async with bench_client(database_url) as client:
+
+        async def signup(index: int):
+            payload = {
+                "first_name": "Race",
+                "last_name": "User",
+                "username": f"race{index}",
+                "email": f"race{index}@example.com",
+                "password": "racepass",
+            }
+            async with limit:
+                start = time.perf_counter()
+                res = await client.post(f"{auth_prefix}/signup", json=payload)
+                latencies.append(time.perf_counter() - start)
+            statuses[res.status_code] += 1
+
+        start = time.perf_counter()
+        # bcrypt would dominate the numbers, so measure the database path only
+        with patch("src.auth.service.generate_password_hash_async", cheap_hash):
+            await asyncio.gather(
+                *(signup(i) for i in range(emails) for _ in range(racers))
+            )
+        elapsed = time.perf_counter() - start
+
+    print(
+        json.dumps(
+            {
+                "requests": emails * racers,
+                "elapsed_s": round(elapsed, 3),
+                "requests_per_s": round(emails * racers / elapsed, 1),
+                "statuses": dict(statuses),
+                "latency": summarize(latencies),
+            },
+            indent=2,
+        )
+    )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--emails", type=int, default=200)
+    parser.add_argument("--racers", type=int, default=4)
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--database-url", default=None)
+    args = parser.parse_args()
+    asyncio.run(main(args.emails, args.racers, args.concurrency, args.database_url))
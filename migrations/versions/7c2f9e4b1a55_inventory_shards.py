@@ -0,0 +1,36 @@
+"""inventory shards
+
+Revision ID: 7c2f9e4b1a55
+Revises: 0b8e5d2a6c14
+Create Date: 2026-10-18 18:05:51.774310
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '7c2f9e4b1a55'
+down_revision: Union[str, Sequence[str], None] = '0b8e5d2a6c14'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Existing rows become shard 0, i.e. plain (unsharded) inventory
+    op.add_column('inventory', sa.Column('shard', sa.Integer(), server_default='0', nullable=False))
+    op.drop_constraint('inventory_pkey', 'inventory', type_='primary')
+    op.create_primary_key('inventory_pkey', 'inventory', ['product_id', 'shard'])
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    # Fold every SKU back into shard 0 before dropping the column
+    op.execute("UPDATE inventory SET available = totals.available FROM (SELECT product_id, sum(available) AS available FROM inventory GROUP BY product_id) AS totals WHERE inventory.product_id = totals.product_id AND inventory.shard = 0")
+    op.execute('DELETE FROM inventory WHERE shard <> 0')
+    op.drop_constraint('inventory_pkey', 'inventory', type_='primary')
+    op.create_primary_key('inventory_pkey', 'inventory', ['product_id'])
+    op.drop_column('inventory', 'shard')
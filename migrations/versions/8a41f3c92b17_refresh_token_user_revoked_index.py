@@ -0,0 +1,31 @@
+"""refresh token user_uid revoked index
+
+Revision ID: 8a41f3c92b17
+Revises: 5d2c8e1f7a90
+Create Date: 2026-10-18 10:03:27.418206
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '8a41f3c92b17'
+down_revision: Union[str, Sequence[str], None] = '5d2c8e1f7a90'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Built concurrently so it does not block logins on a large table
+    with op.get_context().autocommit_block():
+        op.create_index('ix_refresh_tokens_user_uid_revoked', 'refresh_tokens', ['user_uid', 'revoked'], unique=False, postgresql_concurrently=True)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.get_context().autocommit_block():
+        op.drop_index('ix_refresh_tokens_user_uid_revoked', table_name='refresh_tokens', postgresql_concurrently=True)
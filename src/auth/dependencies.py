@@ -3,15 +3,16 @@ from fastapi.security import HTTPBearer
 from sqlmodel import select
 from sqlmodel.ext.asyncio.session import AsyncSession
 from src.db.main import get_session
-from src.db.models import RefreshToken
+from src.db.models import RefreshToken, User
 from src.errors import (
     InvalidToken,
     InvalidAccessToken,
     InvalidRefreshToken,
     AccessTokenRequired,
     UserNotFound,
+    InsufficientPermission,
 )
-from .utils import decode_token
+from .utils import decode_token_cached, user_cache
 from .service import UserService
 
 
@@ -34,9 +35,9 @@ class TokenBearer(HTTPBearer):
     ) -> dict:
         creds = await super().__call__(request)
         token = creds.credentials
-        token_data = decode_token(token)
+        token_data = decode_token_cached(token)
 
-        if not self.token_valid(token):
+        if token_data is None:
             raise InvalidToken()
 
         await self.verify_token_data(token_data, session)
@@ -44,7 +45,7 @@ class TokenBearer(HTTPBearer):
         return token_data
 
     def token_valid(self, token: str) -> bool:
-        token_data = decode_token(token)
+        token_data = decode_token_cached(token)
         return token_data is not None
 
     async def verify_token_data(self, token_data: dict, session: AsyncSession):
@@ -76,9 +77,25 @@ async def get_current_user(
     if token_details.get("refresh"):
         raise AccessTokenRequired()
 
-    user_email = token_details["user"]["email"]
-    user = await user_service.get_user(user_email, session)
+    user_uid = token_details["user"]["user_uid"]
+    user = user_cache.get(user_uid)
+
+    if user is None:
+        user = await user_service.get_user_by_uid(user_uid, session)
+
+        if not user:
+            raise UserNotFound()
+        user_cache.set(user_uid, user)
 
-    if not user:
-        raise UserNotFound()
     return user
+
+
+class RoleChecker:
+    def __init__(self, allowed_roles: list[str]):
+        self.allowed_roles = allowed_roles
+
+    async def __call__(self, current_user: User = Depends(get_current_user)) -> bool:
+        if current_user.role in self.allowed_roles:
+            return True
+
+        raise InsufficientPermission()
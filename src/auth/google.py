@@ -0,0 +1,120 @@
+import asyncio
+import logging
+import re
+import time
+
+import httpx
+
+GOOGLE_ISSUERS = ("accounts.google.com", "https://accounts.google.com")
+
+_max_age = re.compile(r"max-age=(\d+)")
+
+
+def cache_lifetime(response: httpx.Response, default: int) -> int:
+    """Seconds a response may be cached for, based on Cache-Control and Age"""
+    match = _max_age.search(response.headers.get("cache-control", ""))
+    if not match:
+        return default
+    age = int(response.headers.get("age", "0") or 0)
+    return max(int(match.group(1)) - age, 0)
+
+
+class GoogleCertsCache:
+    """In-memory copy of Google's ID token signing certificates
+
+    Certificates are kept for as long as Google's Cache-Control allows and
+    refreshed in the background shortly before they expire, so the OAuth
+    callback normally never waits on a certificate fetch.
+    """
+
+    def __init__(
+        self,
+        certs_url: str,
+        default_ttl: int = 300,
+        refresh_margin: int = 60,
+        retry_interval: int = 30,
+    ):
+        self.certs_url = certs_url
+        self.default_ttl = default_ttl
+        self.refresh_margin = refresh_margin
+        self.retry_interval = retry_interval
+        self.certs: dict[str, str] = {}
+        self.expires_at = 0.0
+        self.fetches = 0
+        self._lock: asyncio.Lock | None = None
+        self._task: asyncio.Task | None = None
+
+    def fresh(self) -> bool:
+        return bool(self.certs) and time.monotonic() < self.expires_at
+
+    async def refresh(self, client: httpx.AsyncClient):
+        response = await client.get(self.certs_url)
+        response.raise_for_status()
+        self.certs = response.json()
+        self.expires_at = time.monotonic() + cache_lifetime(response, self.default_ttl)
+        self.fetches += 1
+
+    async def get(self, client: httpx.AsyncClient) -> dict[str, str]:
+        if self.fresh():
+            return self.certs
+
+        if self._lock is None:
+            self._lock = asyncio.Lock()
+        async with self._lock:
+            # Another request may have refreshed while we waited
+            if not self.fresh():
+                await self.refresh(client)
+        return self.certs
+
+    async def _refresh_loop(self, client: httpx.AsyncClient):
+        while True:
+            try:
+                await self.refresh(client)
+            except (httpx.HTTPError, ValueError) as err:
+                logging.warning("Failed to refresh Google certs: %s", err)
+                await asyncio.sleep(self.retry_interval)
+                continue
+            # Certs can arrive with less lifetime left than refresh_margin
+            # (an Age close to max-age, or a short max-age); never refetch
+            # sooner than retry_interval
+            delay = self.expires_at - time.monotonic() - self.refresh_margin
+            await asyncio.sleep(max(delay, self.retry_interval))
+
+    def start(self, client: httpx.AsyncClient):
+        """Fetch certs now and keep them fresh until stop() is called"""
+        self._task = asyncio.create_task(self._refresh_loop(client))
+
+    async def stop(self):
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+
+
+def _decode_id_token(token: str, certs: dict[str, str], audience: str) -> dict:
+    # google.auth and its crypto backends are slow to import and only needed
+    # once someone signs in with Google, so keep them out of app startup
+    from google.auth import exceptions as google_exceptions
+    from google.auth import jwt as google_jwt
+
+    try:
+        return google_jwt.decode(token, certs=certs, audience=audience)
+    except google_exceptions.GoogleAuthError as err:
+        raise ValueError(str(err)) from err
+
+
+async def verify_google_id_token(
+    token: str, certs: dict[str, str], audience: str
+) -> dict:
+    """Verify a Google ID token against cached certs without blocking the loop
+
+    Raises ValueError if the signature, audience, expiry or issuer is wrong.
+    """
+    idinfo = await asyncio.to_thread(_decode_id_token, token, certs, audience)
+    if idinfo.get("iss") not in GOOGLE_ISSUERS:
+        raise ValueError(f"Wrong issuer: {idinfo.get('iss')}")
+    return idinfo
@@ -0,0 +1,269 @@
+import argparse
+import json
+import logging
+import os
+from dataclasses import dataclass
+from datetime import datetime, timezone
+
+import jwt
+
+ASYMMETRIC_ALGORITHMS = ("RS256", "RS384", "RS512", "ES256", "EdDSA")
+
+
+def parse_time(value: str | None) -> datetime | None:
+    if not value:
+        return None
+    parsed = datetime.fromisoformat(value.replace("Z", "+00:00"))
+    return parsed if parsed.tzinfo else parsed.replace(tzinfo=timezone.utc)
+
+
+@dataclass
+class SigningKey:
+    """One key pair, parsed once when the key ring is loaded"""
+
+    kid: str
+    algorithm: str
+    private_key: object
+    public_key: object
+    not_before: datetime | None = None
+    not_after: datetime | None = None
+
+    def active(self, now: datetime) -> bool:
+        """The key is published and accepted for verification"""
+        return self.not_after is None or now < self.not_after
+
+    def signing(self, now: datetime) -> bool:
+        """The key may sign new tokens"""
+        started = self.not_before is None or self.not_before <= now
+        return started and self.active(now)
+
+    def jwk(self) -> dict:
+        algorithm = jwt.get_algorithm_by_name(self.algorithm)
+        return {
+            **algorithm.to_jwk(self.public_key, as_dict=True),
+            "kid": self.kid,
+            "alg": self.algorithm,
+            "use": "sig",
+        }
+
+
+class KeyRing:
+    """Signs tokens with the newest active key and verifies against any active one
+
+    Keys are scheduled with `not_before`/`not_after`. A key is published in
+    the JWKS from the moment it is loaded, so downstream services have it
+    cached before it starts signing at `not_before`, and stays accepted
+    until `not_after`, which should be at least the longest token lifetime
+    after its successor took over.
+
+    Without asymmetric keys the ring signs with the shared HMAC secret, as
+    before. Until `accept_hmac_until`, tokens without a `kid` are still
+    verified with that secret, so tokens issued before the switch keep
+    working; it should be the switch plus the longest token lifetime.
+    """
+
+    def __init__(
+        self,
+        keys: list[SigningKey],
+        secret: str,
+        hmac_algorithm: str = "HS256",
+        accept_hmac_until: datetime | None = None,
+    ):
+        self.keys = {key.kid: key for key in keys}
+        self.secret = secret
+        self.hmac_algorithm = hmac_algorithm
+        self.accept_hmac_until = accept_hmac_until
+        self._jwks: bytes | None = None
+        self._jwks_until: datetime | None = None
+
+    @classmethod
+    def from_file(cls, path: str, **kwargs) -> "KeyRing":
+        """Load keys listed in a JSON file
+
+        Each entry is `{"kid", "algorithm", "private_key_file", "not_before",
+        "not_after"}`; key paths are relative to the JSON file.
+        """
+        with open(path) as f:
+            entries = json.load(f)["keys"]
+
+        keys = []
+        for entry in entries:
+            algorithm = jwt.get_algorithm_by_name(entry["algorithm"])
+            with open(
+                os.path.join(os.path.dirname(path), entry["private_key_file"])
+            ) as f:
+                private_key = algorithm.prepare_key(f.read())
+            keys.append(
+                SigningKey(
+                    kid=entry["kid"],
+                    algorithm=entry["algorithm"],
+                    private_key=private_key,
+                    public_key=private_key.public_key(),
+                    not_before=parse_time(entry.get("not_before")),
+                    not_after=parse_time(entry.get("not_after")),
+                )
+            )
+        return cls(keys, **kwargs)
+
+    def accepts_hmac(self, now: datetime | None = None) -> bool:
+        if not self.keys:
+            return True
+        now = now or datetime.now(timezone.utc)
+        return self.accept_hmac_until is not None and now < self.accept_hmac_until
+
+    def signing_key(self, now: datetime | None = None) -> SigningKey | None:
+        now = now or datetime.now(timezone.utc)
+        candidates = [key for key in self.keys.values() if key.signing(now)]
+        if not candidates:
+            return None
+        epoch = datetime.min.replace(tzinfo=timezone.utc)
+        return max(candidates, key=lambda key: key.not_before or epoch)
+
+    def encode(self, payload: dict) -> str:
+        key = self.signing_key()
+        if key is None:
+            if self.keys:
+                raise RuntimeError("No JWT signing key is active")
+            return jwt.encode(payload, self.secret, algorithm=self.hmac_algorithm)
+
+        return jwt.encode(
+            payload,
+            key.private_key,
+            algorithm=key.algorithm,
+            headers={"kid": key.kid},
+        )
+
+    def decode(self, token: str) -> dict:
+        """Verify a token with the key named by its `kid` header
+
+        Raises jwt.PyJWTError (or a subclass) if it can't be verified.
+        """
+        kid = jwt.get_unverified_header(token).get("kid")
+        if kid is None:
+            if not self.accepts_hmac():
+                raise jwt.InvalidTokenError("Token has no kid")
+            return jwt.decode(
+                token,
+                self.secret,
+                algorithms=[self.hmac_algorithm],
+                options={"verify_exp": True},
+            )
+
+        key = self.keys.get(kid)
+        if key is None or not key.active(datetime.now(timezone.utc)):
+            raise jwt.InvalidTokenError(f"Unknown or retired kid: {kid}")
+        return jwt.decode(
+            token,
+            key.public_key,
+            algorithms=[key.algorithm],
+            options={"verify_exp": True},
+        )
+
+    def accepted_until(self, token: str) -> datetime | None:
+        """When the key that verifies `token` stops being accepted, if ever"""
+        kid = jwt.get_unverified_header(token).get("kid")
+        if kid is None:
+            return self.accept_hmac_until if self.keys else None
+        key = self.keys.get(kid)
+        return key.not_after if key else None
+
+    def jwks(self) -> bytes:
+        """Serialized JWKS of all active public keys, rebuilt when one retires"""
+        now = datetime.now(timezone.utc)
+        if self._jwks is None or (self._jwks_until and now >= self._jwks_until):
+            active = [key for key in self.keys.values() if key.active(now)]
+            self._jwks = json.dumps({"keys": [key.jwk() for key in active]}).encode()
+            self._jwks_until = min(
+                (key.not_after for key in active if key.not_after), default=None
+            )
+        return self._jwks
+
+
+def build_key_ring(settings) -> KeyRing:
+    kwargs = {
+        "secret": settings.JWT_SECRET,
+        "hmac_algorithm": settings.JWT_ALGORITHM,
+        "accept_hmac_until": parse_time(settings.JWT_ACCEPT_HMAC_UNTIL),
+    }
+    if not settings.JWT_KEYS_FILE:
+        return KeyRing([], **kwargs)
+
+    ring = KeyRing.from_file(settings.JWT_KEYS_FILE, **kwargs)
+    if ring.accepts_hmac():
+        logging.warning(
+            "Accepting HMAC-signed JWTs alongside asymmetric keys until %s",
+            ring.accept_hmac_until.isoformat(),
+        )
+    return ring
+
+
+def generate_private_key_pem(algorithm: str) -> str:
+    from cryptography.hazmat.primitives import serialization
+    from cryptography.hazmat.primitives.asymmetric import ec, ed25519, rsa
+
+    if algorithm.startswith("RS"):
+        key = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+    elif algorithm == "ES256":
+        key = ec.generate_private_key(ec.SECP256R1())
+    elif algorithm == "EdDSA":
+        key = ed25519.Ed25519PrivateKey.generate()
+    else:
+        raise ValueError(f"Unsupported signing algorithm: {algorithm}")
+
+    return key.private_bytes(
+        serialization.Encoding.PEM,
+        serialization.PrivateFormat.PKCS8,
+        serialization.NoEncryption(),
+    ).decode()
+
+
+def rotate(
+    keys_file: str,
+    algorithm: str,
+    kid: str,
+    not_before: str | None,
+    retire_after: str | None,
+):
+    """Add a new key to `keys_file`, scheduling the current ones to retire"""
+    entries = []
+    if os.path.exists(keys_file):
+        with open(keys_file) as f:
+            entries = json.load(f)["keys"]
+    if any(entry["kid"] == kid for entry in entries):
+        raise SystemExit(f"kid {kid} already exists in {keys_file}")
+
+    key_file = f"{kid}.pem"
+    key_path = os.path.join(os.path.dirname(keys_file), key_file)
+    fd = os.open(key_path, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o600)
+    with os.fdopen(fd, "w") as f:
+        f.write(generate_private_key_pem(algorithm))
+
+    for entry in entries:
+        if retire_after and not entry.get("not_after"):
+            entry["not_after"] = retire_after
+    entries.append(
+        {
+            "kid": kid,
+            "algorithm": algorithm,
+            "private_key_file": key_file,
+            "not_before": not_before,
+            "not_after": None,
+        }
+    )
+    with open(keys_file, "w") as f:
+        json.dump({"keys": entries}, f, indent=2)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Add a JWT signing key")
+    parser.add_argument("keys_file")
+    parser.add_argument("--kid", required=True)
+    parser.add_argument("--algorithm", default="RS256", choices=ASYMMETRIC_ALGORITHMS)
+    parser.add_argument(
+        "--not-before", help="ISO time the new key starts signing (default: now)"
+    )
+    parser.add_argument(
+        "--retire-after", help="ISO time existing keys stop being accepted"
+    )
+    args = parser.parse_args()
+    rotate(args.keys_file, args.algorithm, args.kid, args.not_before, args.retire_after)
@@ -1,53 +1,76 @@
-from fastapi import APIRouter, Depends, status
+from fastapi import APIRouter, Depends, Request, status
 
 # from fastapi import HTTPException
-from fastapi.responses import JSONResponse
+from fastapi.responses import ORJSONResponse, Response
 from sqlmodel import select
 from sqlmodel.ext.asyncio.session import AsyncSession
 from datetime import datetime
 from src.db.main import get_session
-from src.db.models import RefreshToken, User
+from src.config import settings
+from src.db.models import User
+from src.ratelimit import rate_limiter
+from src.responses import (
+    NO_STORE,
+    PRIVATE_REVALIDATE,
+    RawJSONResponse,
+    etag_matches,
+    not_modified,
+    weak_etag,
+)
 from src.errors import (
     InvalidRefreshToken,
     UserNotFound,
-    UserAlreadyExists,
 )
-from .service import UserService, PasswordResetService, GoogleAuthService
+from .service import (
+    UserService,
+    PasswordResetService,
+    GoogleAuthService,
+    TokenRevocationService,
+)
 from .schemas import (
     SignupModel,
     LoginModel,
     UserModel,
     ForgotPasswordRequest,
     ResetPasswordRequest,
+    RevokeSessionsRequest,
+    dump_signup,
+    dump_user,
 )
 from .utils import (
     # verify_password,
     create_access_token,
+    key_ring,
     # create_refresh_token,
     decode_url_safe_token,
 )
-from .dependencies import get_current_user, AccessTokenBearer, RefreshTokenBearer
+from .dependencies import (
+    get_current_user,
+    AccessTokenBearer,
+    RefreshTokenBearer,
+    RoleChecker,
+)
 
 auth_router = APIRouter()
+jwks_router = APIRouter()
 user_service = UserService()
 oauth_service = GoogleAuthService()
-# password_reset_service = PasswordResetService(AsyncSession=Depends(get_session))
+password_reset_service = PasswordResetService()
+revocation_service = TokenRevocationService()
+admin_role_checker = RoleChecker(["admin"])
 
 
 @auth_router.post("/signup", status_code=status.HTTP_201_CREATED)
 async def signup(user_data: SignupModel, session: AsyncSession = Depends(get_session)):
-    email = user_data.email
-    user_exists = await user_service.user_exists(email, session)
-
-    if user_exists:
-        raise UserAlreadyExists()
-
     new_user = await user_service.create_user(user_data, session)
 
-    return {
-        "message": "Account created successfully. Check email to verify your account",
-        "user": new_user,
-    }
+    return RawJSONResponse(
+        dump_signup(
+            "Account created successfully. Check email to verify your account",
+            new_user,
+        ),
+        status_code=status.HTTP_201_CREATED,
+    )
 
 
 @auth_router.get("/verify/{token}")
@@ -63,28 +86,38 @@ async def verify_user_account(token: str, session: AsyncSession = Depends(get_se
 
         await user_service.update_user(user, {"is_verified": True}, session)
 
-        return JSONResponse(
+        return ORJSONResponse(
             content={"message": "Account verified successfully"},
             status_code=status.HTTP_200_OK,
         )
 
 
 @auth_router.post("/login")
-async def login(data: LoginModel, session: AsyncSession = Depends(get_session)):
+async def login(
+    data: LoginModel, request: Request, session: AsyncSession = Depends(get_session)
+):
+    await rate_limiter.hit("login", request, email=data.email)
     res = await user_service.login(data, session)
-    return JSONResponse(
+    return ORJSONResponse(
         content={
             "message": "Login successful",
             "access_token": res["access_token"],
             "refresh_token": res["refresh_token"],
             "user": res["user"],
-        }
+        },
+        headers={"Cache-Control": NO_STORE},
     )
 
 
 @auth_router.get("/me", response_model=UserModel)
-async def current_user(user=Depends(get_current_user)):
-    return user
+async def current_user(request: Request, user=Depends(get_current_user)):
+    # The user usually comes from user_cache, so a revalidation costs no query
+    etag = weak_etag(user.uid, user.updated_at)
+    if etag_matches(request, etag):
+        return not_modified(etag, PRIVATE_REVALIDATE)
+    return RawJSONResponse(
+        dump_user(user), headers={"ETag": etag, "Cache-Control": PRIVATE_REVALIDATE}
+    )
 
 
 @auth_router.get("/logout")
@@ -93,23 +126,23 @@ async def logout(
     session: AsyncSession = Depends(get_session),
 ):
     user_uid = token_details["user"]["user_uid"]
+    await revocation_service.revoke_user_tokens(user_uid, session)
 
-    result = await session.exec(
-        select(RefreshToken).where(
-            RefreshToken.user_uid == user_uid, RefreshToken.revoked.is_(False)
-        )
+    return ORJSONResponse(
+        content={"message": "Logged out successfully"}, status_code=status.HTTP_200_OK
     )
 
-    tokens = result.all()
-
-    for token in tokens:
-        token.revoked = True
-        session.add(token)
-
-    await session.commit()
 
-    return JSONResponse(
-        content={"message": "Logged out successfully"}, status_code=status.HTTP_200_OK
+@auth_router.post("/admin/revoke-sessions", dependencies=[Depends(admin_role_checker)])
+async def revoke_sessions(
+    data: RevokeSessionsRequest, session: AsyncSession = Depends(get_session)
+):
+    revoked = await revocation_service.revoke_many(
+        session, user_uids=data.user_uids, issued_before=data.issued_before
+    )
+    return ORJSONResponse(
+        content={"message": "Sessions revoked", "revoked": revoked},
+        status_code=status.HTTP_200_OK,
     )
 
 
@@ -119,45 +152,56 @@ async def get_access_token(token_details: dict = Depends(RefreshTokenBearer())):
 
     if datetime.fromtimestamp(expiry_time) > datetime.now():
         access_token = create_access_token(user_data=token_details["user"])
-        return JSONResponse(content={"access_token": access_token})
+        return ORJSONResponse(
+            content={"access_token": access_token},
+            headers={"Cache-Control": NO_STORE},
+        )
 
     raise InvalidRefreshToken()
 
 
 @auth_router.post("/try-mail")
 async def test_mail(
-    data: ForgotPasswordRequest, session: AsyncSession = Depends(get_session)
+    data: ForgotPasswordRequest,
+    request: Request,
+    session: AsyncSession = Depends(get_session),
 ):
+    await rate_limiter.hit("try-mail", request, email=data.email)
     result = await session.exec(select(User).where(User.email == data.email))
     user = result.first()
     if not user:
         raise UserNotFound()
 
-    service = PasswordResetService(session)
-    await service.send_mail_test(user)
+    await password_reset_service.send_mail_test(user)
     return {"message": "Test Email sent"}
 
 
 @auth_router.post("/forgot-password")
 async def forgot_password(
-    data: ForgotPasswordRequest, session: AsyncSession = Depends(get_session)
+    data: ForgotPasswordRequest,
+    request: Request,
+    session: AsyncSession = Depends(get_session),
 ):
+    await rate_limiter.hit("forgot-password", request, email=data.email)
     result = await session.exec(select(User).where(User.email == data.email))
     user = result.first()
     if not user:
         raise UserNotFound()
 
-    service = PasswordResetService(session)
-    await service.send_reset_email(user)
+    await password_reset_service.send_reset_email(user, session)
     return {"message": "Password reset email sent"}
 
 
 @auth_router.post("/reset-password")
 async def reset_password(
-    data: ResetPasswordRequest, session: AsyncSession = Depends(get_session)
+    data: ResetPasswordRequest,
+    request: Request,
+    session: AsyncSession = Depends(get_session),
 ):
-    service = PasswordResetService(session)
-    await service.reset_password(token=data.token, new_password=data.new_password)
+    await rate_limiter.hit("reset-password", request)
+    await password_reset_service.reset_password(
+        token=data.token, new_password=data.new_password, session=session
+    )
     return {"message": "Password has been reset successfully"}
 
 
@@ -171,3 +215,13 @@ async def google_login():
 async def oauth_callback(code: str, session: AsyncSession = Depends(get_session)):
     user_data = await oauth_service.google_callback(code, session)
     return user_data
+
+
+@jwks_router.get("/.well-known/jwks.json", include_in_schema=False)
+async def jwks():
+    """Public keys other services can use to verify our access tokens locally"""
+    return Response(
+        content=key_ring.jwks(),
+        media_type="application/json",
+        headers={"Cache-Control": f"public, max-age={settings.JWT_JWKS_MAX_AGE}"},
+    )
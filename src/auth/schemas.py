@@ -1,4 +1,5 @@
-from pydantic import BaseModel, Field, EmailStr
+from pydantic import BaseModel, Field, EmailStr, TypeAdapter, model_validator
+from typing import List, Optional
 import uuid
 from datetime import datetime
 
@@ -29,6 +30,37 @@ class UserModel(BaseModel):
     updated_at: datetime
 
 
+class SignupResponse(BaseModel):
+    message: str
+    user: UserModel
+
+
+# Compiled once; dump_json runs pydantic-core's serializer straight to bytes
+user_serializer = TypeAdapter(UserModel)
+signup_serializer = TypeAdapter(SignupResponse)
+
+
+def user_snapshot(user) -> UserModel:
+    """Wrap a User row in a UserModel without validating it again
+
+    Rows loaded from our own database already satisfy the schema, so
+    model_construct only copies the attributes across.
+    """
+    return UserModel.model_construct(
+        **{name: getattr(user, name) for name in UserModel.model_fields}
+    )
+
+
+def dump_user(user) -> bytes:
+    return user_serializer.dump_json(user_snapshot(user))
+
+
+def dump_signup(message: str, user) -> bytes:
+    return signup_serializer.dump_json(
+        SignupResponse.model_construct(message=message, user=user_snapshot(user))
+    )
+
+
 class ForgotPasswordRequest(BaseModel):
     email: EmailStr
 
@@ -36,3 +68,14 @@ class ForgotPasswordRequest(BaseModel):
 class ResetPasswordRequest(BaseModel):
     token: str
     new_password: str
+
+
+class RevokeSessionsRequest(BaseModel):
+    user_uids: List[uuid.UUID] = Field(default_factory=list)
+    issued_before: Optional[datetime] = None
+
+    @model_validator(mode="after")
+    def check_target(self):
+        if not self.user_uids and self.issued_before is None:
+            raise ValueError("Provide user_uids, issued_before or both")
+        return self
@@ -1,28 +1,33 @@
+import asyncio
+import logging
 import secrets
+import uuid
 
 import httpx
 from fastapi import HTTPException, status
-from fastapi_mail import FastMail, MessageSchema
 
 # from fastapi.responses import JSONResponse
 from sqlmodel.ext.asyncio.session import AsyncSession
-from sqlmodel import select, delete
+from sqlmodel import select, delete, update, or_
+from sqlalchemy.dialects.postgresql import insert as postgres_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.orm import selectinload
 from datetime import datetime, timezone, timedelta
 
-from google.oauth2 import id_token
-from google.auth.transport import requests as grequests
-from src.db.models import User, PasswordResetToken
-from src.mail import mail_config
+from src.db.models import User, PasswordResetToken, RefreshToken
+from src.mail import smtp_transport, queue_email
 from src.config import settings
-from src.errors import InvalidToken, UserNotFound, FailedOauth
+from src.errors import InvalidToken, UserNotFound, FailedOauth, UserAlreadyExists
 from .schemas import SignupModel
+from .google import GoogleCertsCache, verify_google_id_token
 from .utils import (
-    generate_password_hash,
+    generate_password_hash_async,
     hash_token,
     create_url_safe_token,
-    verify_password,
+    verify_password_async,
     create_access_token,
     create_refresh_token,
+    user_cache,
 )
 
 
@@ -49,33 +54,83 @@ class UserService:
         user = result.first()
         return user
 
+    async def get_user_by_uid(self, user_uid: str, session: AsyncSession):
+        return await session.get(User, uuid.UUID(str(user_uid)))
+
+    async def get_user_with_refresh_tokens(self, email: str, session: AsyncSession):
+        """Load a user together with every refresh token issued to them"""
+        statement = (
+            select(User)
+            .where(User.email == email)
+            .options(selectinload(User.refresh_tokens))
+        )
+        result = await session.exec(statement)
+        return result.first()
+
     async def user_exists(self, email, session: AsyncSession):
-        user = await self.get_user(email, session)
-        return True if user is not None else False
+        result = await session.exec(select(User.uid).where(User.email == email))
+        return result.first() is not None
 
     async def create_user(self, data: SignupModel, session: AsyncSession):
-        user_data = data.model_dump()
-        new_user = User(**user_data)
+        """Insert a new user, raising UserAlreadyExists on an email/username clash
+
+        Clashes are checked with an indexed lookup before hashing, so a
+        duplicate or retried signup doesn't cost a bcrypt hash. The insert
+        still uses ON CONFLICT DO NOTHING, so concurrent signups for the same
+        email that both pass the check can't race into an IntegrityError.
+        """
+        field = await self._conflicting_field(data, session)
+        if field is not None:
+            raise UserAlreadyExists(field)
+
+        user_data = data.model_dump(exclude={"password"})
         email = user_data["email"]
-        new_user.password_hash = generate_password_hash(user_data["password"])
-        new_user.role = "user"
-        session.add(new_user)
-        await session.commit()
+        password_hash = await generate_password_hash_async(data.password)
+
+        insert = (
+            postgres_insert
+            if session.bind.dialect.name == "postgresql"
+            else sqlite_insert
+        )
+        statement = (
+            insert(User)
+            .values(**user_data, password_hash=password_hash, role="user")
+            .on_conflict_do_nothing()
+            .returning(User)
+        )
+        result = await session.exec(statement)
+        new_user = result.scalar_one_or_none()
+
+        if new_user is None:
+            await session.rollback()
+            field = await self._conflicting_field(data, session)
+            raise UserAlreadyExists(field or "email")
 
         token = create_url_safe_token({"email": email})
         link = f"http://{settings.DOMAIN}/api/v1/auth/verify/{token}"
-        mail = FastMail(config=mail_config)
-        message = MessageSchema(
-            subject="Verify your Email",
+        queue_email(
+            session,
             recipients=[email],
+            subject="Verify your Email",
             body=f"<p>Click the <a href='{link}'>link</a> to verify your email/p>",
-            subtype="html",
         )
-
-        await mail.send_message(message)
+        await session.commit()
 
         return new_user
 
+    async def _conflicting_field(
+        self, data: SignupModel, session: AsyncSession
+    ) -> str | None:
+        result = await session.exec(
+            select(User.email).where(
+                or_(User.email == data.email, User.username == data.username)
+            )
+        )
+        emails = result.all()
+        if not emails:
+            return None
+        return "email" if data.email in emails else "username"
+
     async def login(self, data: dict, session: AsyncSession):
         email = data.email
         password = data.password
@@ -83,7 +138,7 @@ class UserService:
         user = await self.get_user(email, session)
 
         if user is not None:
-            password_valid = verify_password(password, user.password_hash)
+            password_valid = await verify_password_async(password, user.password_hash)
 
             if password_valid:
                 tokens = await generate_tokens(user, session)
@@ -103,21 +158,84 @@ class UserService:
             setattr(user, k, v)
 
         await session.commit()
+        user_cache.invalidate(user.uid)
         return user
 
 
+class TokenRevocationService:
+    """Revokes refresh tokens with set-based UPDATEs instead of per-row ORM writes"""
+
+    def __init__(self, batch_size: int = settings.TOKEN_REVOCATION_BATCH_SIZE):
+        self.batch_size = batch_size
+
+    async def revoke_user_tokens(self, user_uid, session: AsyncSession) -> int:
+        result = await session.exec(
+            update(RefreshToken)
+            .where(
+                RefreshToken.user_uid == uuid.UUID(str(user_uid)),
+                RefreshToken.revoked.is_(False),
+            )
+            .values(revoked=True)
+            .execution_options(synchronize_session=False)
+        )
+        await session.commit()
+        return result.rowcount
+
+    async def revoke_many(
+        self,
+        session: AsyncSession,
+        user_uids: list[uuid.UUID] | None = None,
+        issued_before: datetime | None = None,
+    ) -> int:
+        """Revoke tokens for a set of users and/or everything issued before a time
+
+        Work is split into batches that are committed one at a time, so no
+        single statement holds row locks on a large part of the table.
+        """
+        revoked = 0
+        filters = [RefreshToken.revoked.is_(False)]
+        if issued_before is not None:
+            filters.append(RefreshToken.created_at < issued_before)
+
+        if user_uids:
+            for start in range(0, len(user_uids), self.batch_size):
+                chunk = user_uids[start : start + self.batch_size]
+                result = await session.exec(
+                    update(RefreshToken)
+                    .where(RefreshToken.user_uid.in_(chunk), *filters)
+                    .values(revoked=True)
+                    .execution_options(synchronize_session=False)
+                )
+                await session.commit()
+                revoked += result.rowcount
+            return revoked
+
+        while True:
+            batch = (
+                select(RefreshToken.id).where(*filters).limit(self.batch_size)
+            ).scalar_subquery()
+            result = await session.exec(
+                update(RefreshToken)
+                .where(RefreshToken.id.in_(batch))
+                .values(revoked=True)
+                .execution_options(synchronize_session=False)
+            )
+            await session.commit()
+            revoked += result.rowcount
+            if result.rowcount < self.batch_size:
+                return revoked
+
+
 class PasswordResetService:
     def __init__(self):
-        self.mail = FastMail(config=mail_config)
+        self.mail = smtp_transport
 
     async def send_mail_test(self, user: User):
-        message = MessageSchema(
-            subject="Test Mail",
+        await self.mail.send_email(
             recipients=[user.email],
+            subject="Test Mail",
             body="<p>Testing on sending mails to emails </p>",
-            subtype="html",
         )
-        await self.mail.send_message(message)
 
     async def send_reset_email(self, user: User, session: AsyncSession):
         # Delete all old tokens for this user
@@ -135,22 +253,19 @@ class PasswordResetService:
             token=token_hash,
             expires_at=datetime.now(timezone.utc) + timedelta(minutes=30),
         )
-        self.session.add(reset_token)
-        await self.session.commit()
-        await self.session.refresh(reset_token)
+        session.add(reset_token)
 
         # Email content
         reset_link = (
             f"http://{settings.DOMAIN}/api/v1/auth/reset-password?token={raw_token}"
         )
-        message = MessageSchema(
-            subject="Password Reset Request",
+        queue_email(
+            session,
             recipients=[user.email],
+            subject="Password Reset Request",
             body=f"<p>Click the link to reset your password: </p><a href='{reset_link}'>{reset_link}</a>",
-            subtype="html",
         )
-
-        await self.mail.send_message(message)
+        await session.commit()
 
     async def reset_password(
         self, token: str, new_password: str, session: AsyncSession
@@ -177,17 +292,60 @@ class PasswordResetService:
             raise UserNotFound()
 
         # Update password
-        user.password_hash = generate_password_hash(new_password)
+        user.password_hash = await generate_password_hash_async(new_password)
         reset_token.used = True
 
         session.add(user)
         session.add(reset_token)
         await session.commit()
+        user_cache.invalidate(user.uid)
 
 
 class GoogleAuthService:
-    def __init__(self):
+    def __init__(self, transport: httpx.AsyncBaseTransport | None = None):
         self.redirect_url = f"http://{settings.DOMAIN}/api/v1/auth/oauth2callback"
+        self.transport = transport
+        self.certs = GoogleCertsCache(settings.GOOGLE_CERTS_URL)
+        self._client: httpx.AsyncClient | None = None
+        self._warm_up_task: asyncio.Task | None = None
+
+    def _new_client(self) -> httpx.AsyncClient:
+        return httpx.AsyncClient(
+            timeout=settings.GOOGLE_HTTP_TIMEOUT, transport=self.transport
+        )
+
+    @property
+    def client(self) -> httpx.AsyncClient:
+        """Pooled HTTP client shared by every callback, kept open between requests"""
+        if self._client is None:
+            self._client = self._new_client()
+        return self._client
+
+    async def _warm_up(self):
+        # Building the client loads the CA bundle, which takes ~100ms, so do
+        # it off the loop instead of holding up startup
+        client = await asyncio.to_thread(self._new_client)
+        if self._client is None:
+            self._client = client
+        else:
+            await client.aclose()
+        self.certs.start(self._client)
+
+    async def startup(self):
+        self._warm_up_task = asyncio.create_task(self._warm_up())
+
+    async def shutdown(self):
+        if self._warm_up_task is not None:
+            self._warm_up_task.cancel()
+            try:
+                await self._warm_up_task
+            except asyncio.CancelledError:
+                pass
+            self._warm_up_task = None
+        await self.certs.stop()
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
 
     async def google_login(self):
         google_oauth_url = (
@@ -200,7 +358,6 @@ class GoogleAuthService:
         return {"auth_url": google_oauth_url}
 
     async def google_callback(self, code: str, session: AsyncSession):
-        token_url = "https://oauth2.googleapis.com/token"
         data = {
             "code": code,
             "client_id": settings.CLIENT_ID,
@@ -208,16 +365,20 @@ class GoogleAuthService:
             "redirect_uri": self.redirect_url,
             "grant_type": "authorization_code",
         }
-        async with httpx.AsyncClient() as client:
-            response = await client.post(token_url, data=data)
-            token_data = response.json()
+        response = await self.client.post(settings.GOOGLE_TOKEN_URL, data=data)
+        token_data = response.json()
 
         if "id_token" not in token_data:
             raise FailedOauth()
 
-        idinfo = id_token.verify_oauth2_token(
-            token_data["id_token"], grequests.Request(), settings.CLIENT_ID
-        )
+        certs = await self.certs.get(self.client)
+        try:
+            idinfo = await verify_google_id_token(
+                token_data["id_token"], certs, settings.CLIENT_ID
+            )
+        except ValueError as err:
+            logging.warning("Google ID token rejected: %s", err)
+            raise FailedOauth()
 
         google_id = idinfo["sub"]
         email = idinfo.get("email")
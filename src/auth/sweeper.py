@@ -0,0 +1,287 @@
+import argparse
+import asyncio
+import logging
+from datetime import datetime, timezone
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncConnection
+from sqlmodel import delete, or_, select
+from src.db.models import RefreshToken, PasswordResetToken
+
+
+def month_start(value: datetime) -> datetime:
+    return value.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+
+
+def add_months(value: datetime, months: int) -> datetime:
+    month = value.month - 1 + months
+    return value.replace(year=value.year + month // 12, month=month % 12 + 1)
+
+
+class TokenPartitionManager:
+    """Monthly range partitions on expires_at for the token tables (Postgres only)
+
+    Once a table is partitioned, expired tokens are reclaimed by dropping a
+    whole month's partition instead of deleting rows. Partitioned tables
+    need the partition key in every unique constraint, so `id`, `jti` and
+    `token` are only unique together with `expires_at`; all three are random
+    values, so this does not weaken them in practice.
+    """
+
+    tables = {
+        "refresh_tokens": {
+            "unique": ["jti"],
+            "indexes": [["jti"], ["user_uid", "revoked"]],
+        },
+        "password_reset_tokens": {
+            "unique": ["token"],
+            "indexes": [["token"]],
+        },
+    }
+
+    def __init__(self, months_ahead: int = 2):
+        self.months_ahead = months_ahead
+
+    @staticmethod
+    def partition_name(table: str, month: datetime) -> str:
+        return f"{table}_p{month:%Y%m}"
+
+    async def is_partitioned(self, conn: AsyncConnection, table: str) -> bool:
+        result = await conn.execute(
+            text(
+                "SELECT 1 FROM pg_partitioned_table p "
+                "JOIN pg_class c ON c.oid = p.partrelid WHERE c.relname = :table"
+            ),
+            {"table": table},
+        )
+        return result.first() is not None
+
+    async def ensure_partitions(
+        self, conn: AsyncConnection, table: str, since: datetime | None = None
+    ):
+        now = datetime.now(timezone.utc)
+        month = month_start(since or now)
+        last = add_months(month_start(now), self.months_ahead)
+
+        while month <= last:
+            upper = add_months(month, 1)
+            await conn.execute(
+                text(
+                    f"CREATE TABLE IF NOT EXISTS {self.partition_name(table, month)} "
+                    f"PARTITION OF {table} FOR VALUES "
+                    f"FROM ('{month.isoformat()}') TO ('{upper.isoformat()}')"
+                )
+            )
+            month = upper
+
+    async def drop_expired_partitions(self, conn: AsyncConnection, table: str) -> int:
+        """Drop partitions whose whole range has expired, returning rows reclaimed"""
+        result = await conn.execute(
+            text(
+                "SELECT c.relname FROM pg_inherits i "
+                "JOIN pg_class c ON c.oid = i.inhrelid "
+                "JOIN pg_class p ON p.oid = i.inhparent WHERE p.relname = :table"
+            ),
+            {"table": table},
+        )
+        current = month_start(datetime.now(timezone.utc))
+        reclaimed = 0
+
+        for (name,) in result.all():
+            suffix = name.rsplit("_p", 1)[-1]
+            month = datetime.strptime(suffix, "%Y%m").replace(tzinfo=timezone.utc)
+            if add_months(month, 1) > current:
+                continue
+
+            count = await conn.execute(text(f"SELECT count(*) FROM {name}"))
+            reclaimed += count.scalar_one()
+            await conn.execute(text(f"ALTER TABLE {table} DETACH PARTITION {name}"))
+            await conn.execute(text(f"DROP TABLE {name}"))
+            logging.info("Dropped expired token partition %s", name)
+
+        return reclaimed
+
+    async def convert(self, conn: AsyncConnection, table: str):
+        """Rebuild `table` as a partitioned table, keeping only unexpired rows
+
+        Meant to be run once per table in a maintenance window.
+        """
+        spec = self.tables[table]
+        legacy = f"{table}_legacy"
+
+        await conn.execute(text(f"ALTER TABLE {table} RENAME TO {legacy}"))
+        await conn.execute(
+            text(
+                f"CREATE TABLE {table} (LIKE {legacy} INCLUDING DEFAULTS) "
+                "PARTITION BY RANGE (expires_at)"
+            )
+        )
+        await conn.execute(
+            text(f"ALTER TABLE {table} ADD PRIMARY KEY (id, expires_at)")
+        )
+        await conn.execute(
+            text(
+                f"ALTER TABLE {table} ADD FOREIGN KEY (user_uid) "
+                "REFERENCES users (uid) ON DELETE CASCADE"
+            )
+        )
+        for column in spec["unique"]:
+            await conn.execute(
+                text(
+                    f"CREATE UNIQUE INDEX uq_{table}_{column}_expires_at "
+                    f"ON {table} ({column}, expires_at)"
+                )
+            )
+        for columns in spec["indexes"]:
+            await conn.execute(
+                text(
+                    f"CREATE INDEX ix_{table}_{'_'.join(columns)}_part "
+                    f"ON {table} ({', '.join(columns)})"
+                )
+            )
+
+        oldest = await conn.execute(
+            text(f"SELECT min(expires_at) FROM {legacy} WHERE expires_at >= now()")
+        )
+        await self.ensure_partitions(conn, table, since=oldest.scalar_one())
+        await conn.execute(
+            text(
+                f"INSERT INTO {table} SELECT * FROM {legacy} WHERE expires_at >= now()"
+            )
+        )
+        await conn.execute(text(f"DROP TABLE {legacy}"))
+
+
+class TokenSweeper:
+    """Deletes expired, revoked and used tokens in small, paced batches
+
+    Each batch is its own short transaction and the sweeper sleeps between
+    batches, so it never holds locks long enough to stall logins.
+    """
+
+    def __init__(
+        self,
+        session_factory,
+        interval: float = 300.0,
+        batch_size: int = 500,
+        batch_pause: float = 0.1,
+        max_batches: int = 100,
+        partitions: TokenPartitionManager | None = None,
+    ):
+        self.session_factory = session_factory
+        self.interval = interval
+        self.batch_size = batch_size
+        self.batch_pause = batch_pause
+        self.max_batches = max_batches
+        self.partitions = partitions
+        self.reclaimed = {"refresh_tokens": 0, "password_reset_tokens": 0}
+        self.partitions_reclaimed = 0
+        self.runs = 0
+        self.last_run_at: datetime | None = None
+        self._task: asyncio.Task | None = None
+        self._stopping = asyncio.Event()
+
+    def _targets(self, now: datetime):
+        yield RefreshToken, or_(
+            RefreshToken.expires_at < now, RefreshToken.revoked.is_(True)
+        )
+        yield PasswordResetToken, or_(
+            PasswordResetToken.expires_at < now, PasswordResetToken.used.is_(True)
+        )
+
+    async def _sweep_partitions(self):
+        async with self.session_factory() as session:
+            conn = await session.connection()
+            if conn.dialect.name != "postgresql":
+                return
+
+            for table in TokenPartitionManager.tables:
+                if await self.partitions.is_partitioned(conn, table):
+                    await self.partitions.ensure_partitions(conn, table)
+                    self.partitions_reclaimed += (
+                        await self.partitions.drop_expired_partitions(conn, table)
+                    )
+            await session.commit()
+
+    async def run_once(self) -> int:
+        """Run one sweep over both token tables, returning rows deleted"""
+        now = datetime.now(timezone.utc)
+        deleted = 0
+
+        if self.partitions is not None:
+            await self._sweep_partitions()
+
+        for model, condition in self._targets(now):
+            for _ in range(self.max_batches):
+                async with self.session_factory() as session:
+                    batch = select(model.id).where(condition).limit(self.batch_size)
+                    result = await session.exec(
+                        delete(model)
+                        .where(model.id.in_(batch.scalar_subquery()))
+                        .execution_options(synchronize_session=False)
+                    )
+                    await session.commit()
+
+                self.reclaimed[model.__tablename__] += result.rowcount
+                deleted += result.rowcount
+                if result.rowcount < self.batch_size or self._stopping.is_set():
+                    break
+                await asyncio.sleep(self.batch_pause)
+
+        self.runs += 1
+        self.last_run_at = now
+        return deleted
+
+    async def run(self):
+        while not self._stopping.is_set():
+            try:
+                await self.run_once()
+            except Exception:
+                logging.exception("Token sweeper run failed")
+
+            try:
+                await asyncio.wait_for(self._stopping.wait(), timeout=self.interval)
+            except asyncio.TimeoutError:
+                pass
+
+    def start(self):
+        self._stopping = asyncio.Event()
+        self._task = asyncio.create_task(self.run())
+
+    async def stop(self):
+        if self._task is None:
+            return
+        self._stopping.set()
+        await self._task
+        self._task = None
+
+    def stats(self) -> dict:
+        return {
+            "runs": self.runs,
+            "last_run_at": self.last_run_at.isoformat() if self.last_run_at else None,
+            "rows_reclaimed": dict(self.reclaimed),
+            "partition_rows_reclaimed": self.partitions_reclaimed,
+        }
+
+
+async def main(tables: list[str]):
+    from src.config import settings
+    from src.db.main import engine
+
+    manager = TokenPartitionManager(months_ahead=settings.TOKEN_PARTITION_MONTHS_AHEAD)
+    async with engine.begin() as conn:
+        for table in tables:
+            if await manager.is_partitioned(conn, table):
+                print(f"{table} is already partitioned")
+                continue
+            await manager.convert(conn, table)
+            print(f"{table} converted to monthly partitions on expires_at")
+    await engine.dispose()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Convert token tables to range partitions on expires_at"
+    )
+    parser.add_argument("tables", nargs="*", default=list(TokenPartitionManager.tables))
+    asyncio.run(main(parser.parse_args().tables))
@@ -3,13 +3,18 @@ from passlib.context import CryptContext
 from datetime import datetime, timedelta, timezone
 from jwt import ExpiredSignatureError
 from itsdangerous import URLSafeTimedSerializer
+from cachetools import TLRUCache, TTLCache
 from src.config import settings
-from src.db.models import RefreshToken
-from src.errors import TokenExpired, InvalidToken
+from src.db.models import RefreshToken, User
+from src.errors import TokenExpired, InvalidToken, PasswordHasherBusy
+from .keys import build_key_ring
+from concurrent.futures import Executor, ThreadPoolExecutor, ProcessPoolExecutor
+import asyncio
 import uuid
 import jwt
 import logging
 import hashlib
+import time
 
 
 password_context = CryptContext(schemes=["bcrypt"])
@@ -17,6 +22,8 @@ password_context = CryptContext(schemes=["bcrypt"])
 ACCESS_TOKEN_EXPIRY = 180
 REFRESH_TOKEN_EXPIRY = 86400
 
+key_ring = build_key_ring(settings)
+
 
 def generate_password_hash(password: str) -> str:
     return password_context.hash(password)
@@ -26,6 +33,70 @@ def verify_password(password: str, hash: str) -> bool:
     return password_context.verify(password, hash)
 
 
+class PasswordHasher:
+    """Runs bcrypt hashing/verification on a bounded worker pool
+
+    The executor runs at most `max_workers` calls at once and at most
+    `max_queue` more may wait for a worker; anything beyond that is rejected
+    with PasswordHasherBusy instead of piling up behind the pool.
+    """
+
+    def __init__(
+        self, executor_type: str = "thread", max_workers: int = 4, max_queue: int = 64
+    ):
+        if executor_type not in ("thread", "process"):
+            raise ValueError(f"Unknown password hash executor: {executor_type}")
+
+        self.executor_type = executor_type
+        self.max_workers = max_workers
+        self.max_queue = max_queue
+        self.pending = 0
+        self._executor: Executor | None = None
+
+    def _get_executor(self) -> Executor:
+        if self._executor is None:
+            if self.executor_type == "process":
+                self._executor = ProcessPoolExecutor(max_workers=self.max_workers)
+            else:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=self.max_workers, thread_name_prefix="password-hash"
+                )
+        return self._executor
+
+    async def run(self, func, *args):
+        if self.pending >= self.max_workers + self.max_queue:
+            raise PasswordHasherBusy()
+
+        self.pending += 1
+        try:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(self._get_executor(), func, *args)
+        finally:
+            self.pending -= 1
+
+    def shutdown(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+
+password_hasher = PasswordHasher(
+    executor_type=settings.PASSWORD_HASH_EXECUTOR,
+    max_workers=settings.PASSWORD_HASH_WORKERS,
+    max_queue=settings.PASSWORD_HASH_MAX_QUEUE,
+)
+
+
+async def generate_password_hash_async(password: str) -> str:
+    """Hash a password without blocking the event loop"""
+    return await password_hasher.run(generate_password_hash, password)
+
+
+async def verify_password_async(password: str, hash: str) -> bool:
+    """Verify a password without blocking the event loop"""
+    return await password_hasher.run(verify_password, password, hash)
+
+
 def hash_token(raw_token: str) -> str:
     return hashlib.sha256(raw_token.encode()).hexdigest()
 
@@ -43,9 +114,7 @@ def create_access_token(
         "jti": str(uuid.uuid4()),
         "refresh": refresh,
     }
-    return jwt.encode(
-        payload=payload, key=settings.JWT_SECRET, algorithm=settings.JWT_ALGORITHM
-    )
+    return key_ring.encode(payload)
 
 
 async def create_refresh_token(
@@ -64,13 +133,14 @@ async def create_refresh_token(
         "refresh": True,
     }
 
-    token = jwt.encode(
-        token_payload, settings.JWT_SECRET, algorithm=settings.JWT_ALGORITHM
-    )
+    token = key_ring.encode(token_payload)
 
     # Save refresh token in DB
     refresh_token = RefreshToken(
-        jti=jti, user_uid=user_data["user_uid"], expires_at=expires, revoked=False
+        jti=jti,
+        user_uid=uuid.UUID(user_data["user_uid"]),
+        expires_at=expires,
+        revoked=False,
     )
     session.add(refresh_token)
     await session.commit()
@@ -81,12 +151,7 @@ async def create_refresh_token(
 def decode_token(token: str) -> dict:
     """Decode and validate a JWT token, raise error if invalid/expired"""
     try:
-        return jwt.decode(
-            jwt=token,
-            key=settings.JWT_SECRET,
-            algorithms=[settings.JWT_ALGORITHM],
-            options={"verify_exp": True},
-        )
+        return key_ring.decode(token)
 
     except ExpiredSignatureError:
         logging.warning("Token has expired")
@@ -97,6 +162,108 @@ def decode_token(token: str) -> dict:
         raise InvalidToken()
 
 
+class TokenCache:
+    """Bounded LRU of verified token claims, keyed by a digest of the raw token
+
+    Entries never outlive the token's own `exp`, nor the retirement of the key
+    that verified it, so a cached token can't be accepted after it would have
+    failed verification.
+    """
+
+    def __init__(self, maxsize: int = 10000):
+        self._cache = TLRUCache(maxsize=maxsize, ttu=self._ttu, timer=time.time)
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def _ttu(key: str, entry: tuple[dict, float], now: float) -> float:
+        return entry[1]
+
+    def get(self, token: str) -> dict | None:
+        entry = self._cache.get(hash_token(token))
+        if entry is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return entry[0]
+
+    def set(self, token: str, claims: dict, until: datetime | None = None):
+        """Cache `claims` until the token expires or `until`, whichever is first"""
+        expires = claims.get("exp", 0)
+        if until is not None:
+            expires = min(expires, until.timestamp())
+        self._cache[hash_token(token)] = (claims, expires)
+
+    def clear(self):
+        self._cache.clear()
+
+    def stats(self) -> dict:
+        return {
+            "size": len(self._cache),
+            "maxsize": self._cache.maxsize,
+            "hits": self.hits,
+            "misses": self.misses,
+        }
+
+
+token_cache = TokenCache(maxsize=settings.TOKEN_CACHE_SIZE)
+
+
+def decode_token_cached(token: str) -> dict:
+    """Like decode_token, but skips signature checks for recently seen tokens
+
+    The returned claims are shared between requests and must not be mutated.
+    """
+    claims = token_cache.get(token)
+    if claims is None:
+        claims = decode_token(token)
+        token_cache.set(token, claims, key_ring.accepted_until(token))
+    return claims
+
+
+class UserCache:
+    """Per-process TTL cache of resolved users, keyed by uid
+
+    `ttl` bounds how stale a cached user can get when it is changed by
+    another worker; writes in this process invalidate explicitly. Cached
+    users are detached snapshots and must be treated as read-only.
+    """
+
+    def __init__(self, maxsize: int = 10000, ttl: int = 30):
+        self._cache = TTLCache(maxsize=maxsize, ttl=ttl)
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, uid) -> User | None:
+        user = self._cache.get(str(uid))
+        if user is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return user
+
+    def set(self, uid, user: User):
+        self._cache[str(uid)] = user
+
+    def invalidate(self, uid):
+        self._cache.pop(str(uid), None)
+
+    def clear(self):
+        self._cache.clear()
+
+    def stats(self) -> dict:
+        return {
+            "size": len(self._cache),
+            "maxsize": self._cache.maxsize,
+            "ttl": self._cache.ttl,
+            "hits": self.hits,
+            "misses": self.misses,
+        }
+
+
+user_cache = UserCache(maxsize=settings.USER_CACHE_SIZE, ttl=settings.USER_CACHE_TTL)
+
+
 serializer = URLSafeTimedSerializer(
     secret_key=settings.JWT_SECRET, salt="email-configuration"
 )
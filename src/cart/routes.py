@@ -0,0 +1,72 @@
+import uuid
+
+from fastapi import APIRouter, Depends
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from src.auth.dependencies import get_current_user
+from src.config import settings
+from src.db.main import async_session, get_session
+from src.responses import RawJSONResponse
+from .schemas import CartAddModel, CartModel, CartQuantityModel, dump_cart
+from .service import CartService
+from .store import MemoryCartStore, RedisCartStore
+
+cart_router = APIRouter()
+cart_service = CartService(
+    store=(
+        RedisCartStore(settings.CART_REDIS_URL)
+        if settings.CART_REDIS_URL
+        else MemoryCartStore(maxsize=settings.CART_STORE_SIZE)
+    ),
+    session_factory=async_session,
+    flush_interval=settings.CART_FLUSH_INTERVAL,
+    batch_size=settings.CART_FLUSH_BATCH_SIZE,
+    max_quantity=settings.CART_MAX_QUANTITY,
+)
+
+
+@cart_router.get("", response_model=CartModel)
+async def get_cart(
+    user=Depends(get_current_user), session: AsyncSession = Depends(get_session)
+):
+    return RawJSONResponse(dump_cart(await cart_service.get_cart(user.uid, session)))
+
+
+@cart_router.post("/items", response_model=CartModel)
+async def add_item(
+    data: CartAddModel,
+    user=Depends(get_current_user),
+    session: AsyncSession = Depends(get_session),
+):
+    items = await cart_service.add_item(
+        user.uid, data.product_id, data.quantity, session
+    )
+    return RawJSONResponse(dump_cart(items))
+
+
+@cart_router.put("/items/{product_id}", response_model=CartModel)
+async def set_quantity(
+    product_id: uuid.UUID,
+    data: CartQuantityModel,
+    user=Depends(get_current_user),
+    session: AsyncSession = Depends(get_session),
+):
+    items = await cart_service.set_quantity(
+        user.uid, product_id, data.quantity, session
+    )
+    return RawJSONResponse(dump_cart(items))
+
+
+@cart_router.delete("/items/{product_id}", response_model=CartModel)
+async def remove_item(
+    product_id: uuid.UUID,
+    user=Depends(get_current_user),
+    session: AsyncSession = Depends(get_session),
+):
+    items = await cart_service.set_quantity(user.uid, product_id, 0, session)
+    return RawJSONResponse(dump_cart(items))
+
+
+@cart_router.delete("", response_model=CartModel)
+async def clear_cart(user=Depends(get_current_user)):
+    return RawJSONResponse(dump_cart(await cart_service.clear(user.uid)))
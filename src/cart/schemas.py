@@ -0,0 +1,36 @@
+from pydantic import BaseModel, Field, TypeAdapter
+from typing import List
+import uuid
+
+
+class CartAddModel(BaseModel):
+    product_id: uuid.UUID
+    quantity: int = Field(default=1, ge=1)
+
+
+class CartQuantityModel(BaseModel):
+    quantity: int = Field(ge=0)
+
+
+class CartLine(BaseModel):
+    product_id: uuid.UUID
+    quantity: int
+
+
+class CartModel(BaseModel):
+    items: List[CartLine]
+    total_quantity: int
+
+
+cart_serializer = TypeAdapter(CartModel)
+
+
+def dump_cart(items: dict[str, int]) -> bytes:
+    """Serialize hot-tier cart contents, sorted so responses are stable"""
+    lines = [
+        CartLine.model_construct(product_id=uuid.UUID(product_id), quantity=quantity)
+        for product_id, quantity in sorted(items.items())
+    ]
+    return cart_serializer.dump_json(
+        CartModel.model_construct(items=lines, total_quantity=sum(items.values()))
+    )
@@ -0,0 +1,211 @@
+import asyncio
+import logging
+import uuid
+from datetime import datetime, timezone
+
+from cachetools import TTLCache
+from sqlalchemy import delete, insert
+from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from src.db.models import CartItem, Product
+from src.errors import CartQuantityExceeded, ProductNotFound
+from .store import CartStore, Items
+
+
+class CartService:
+    """Carts served from a hot tier, written to the database behind the request
+
+    Every mutation lands in `store` and marks the cart dirty. Dirty carts are
+    coalesced (ten adds to one cart are one pending write) and flushed in
+    batches at least every `flush_interval` seconds, which bounds how much
+    can be lost if the process dies; a full batch flushes straight away. A
+    flush replaces each cart's rows with its latest state, so flushes from
+    several workers sharing a store converge on the same contents.
+    """
+
+    def __init__(
+        self,
+        store: CartStore,
+        session_factory,
+        flush_interval: float = 2.0,
+        batch_size: int = 500,
+        max_quantity: int = 99,
+        product_cache_ttl: int = 60,
+    ):
+        self.store = store
+        self.session_factory = session_factory
+        self.flush_interval = flush_interval
+        self.batch_size = batch_size
+        self.max_quantity = max_quantity
+        self.flushed = 0
+        self.flushes = 0
+        self.failed_flushes = 0
+        # user uid -> latest contents, until written; `_inflight` holds the
+        # batch being written so a reload can't read the older DB copy
+        self._pending: dict[str, Items] = {}
+        self._inflight: dict[str, Items] = {}
+        self._products = TTLCache(maxsize=10000, ttl=product_cache_ttl)
+        self._task: asyncio.Task | None = None
+        self._stopping = asyncio.Event()
+        self._batch_full = asyncio.Event()
+        # Flushes must commit in order, or an older copy could land last
+        self._flush_lock = asyncio.Lock()
+
+    async def _load(self, user_uid: str, session: AsyncSession) -> Items:
+        result = await session.exec(
+            select(CartItem.product_id, CartItem.quantity).where(
+                CartItem.user_uid == uuid.UUID(user_uid)
+            )
+        )
+        return {str(product_id): quantity for product_id, quantity in result}
+
+    async def get_cart(self, user_uid, session: AsyncSession) -> Items:
+        user_uid = str(user_uid)
+        items = await self.store.get(user_uid)
+        if items is not None:
+            return items
+
+        items = self._pending.get(user_uid, self._inflight.get(user_uid))
+        if items is None:
+            items = await self._load(user_uid, session)
+        await self.store.load(user_uid, dict(items))
+        return items
+
+    async def _check_product(self, product_id: str, session: AsyncSession):
+        if product_id in self._products:
+            return
+        product = await session.get(Product, uuid.UUID(product_id))
+        if product is None or not product.is_active:
+            raise ProductNotFound()
+        self._products[product_id] = True
+
+    def _mark_dirty(self, user_uid: str, items: Items):
+        self._pending[user_uid] = dict(items)
+        if len(self._pending) >= self.batch_size:
+            self._batch_full.set()
+
+    async def add_item(
+        self, user_uid, product_id, quantity: int, session: AsyncSession
+    ) -> Items:
+        user_uid, product_id = str(user_uid), str(product_id)
+        await self._check_product(product_id, session)
+        items = await self.get_cart(user_uid, session)
+        if items.get(product_id, 0) + quantity > self.max_quantity:
+            raise CartQuantityExceeded(self.max_quantity)
+
+        items = await self.store.add(user_uid, product_id, quantity)
+        self._mark_dirty(user_uid, items)
+        return items
+
+    async def set_quantity(
+        self, user_uid, product_id, quantity: int, session: AsyncSession
+    ) -> Items:
+        user_uid, product_id = str(user_uid), str(product_id)
+        if quantity > self.max_quantity:
+            raise CartQuantityExceeded(self.max_quantity)
+        if quantity > 0:
+            await self._check_product(product_id, session)
+
+        await self.get_cart(user_uid, session)
+        items = await self.store.set_quantity(user_uid, product_id, quantity)
+        self._mark_dirty(user_uid, items)
+        return items
+
+    async def clear(self, user_uid) -> Items:
+        user_uid = str(user_uid)
+        items = await self.store.clear(user_uid)
+        self._mark_dirty(user_uid, items)
+        return items
+
+    async def _write(self, carts: dict[str, Items]):
+        now = datetime.now(timezone.utc)
+        uids = [uuid.UUID(user_uid) for user_uid in carts]
+        rows = [
+            {
+                "user_uid": uuid.UUID(user_uid),
+                "product_id": uuid.UUID(product_id),
+                "quantity": quantity,
+                "updated_at": now,
+            }
+            for user_uid, items in carts.items()
+            for product_id, quantity in items.items()
+        ]
+        async with self.session_factory() as session:
+            conn = await session.connection()
+            await conn.execute(delete(CartItem).where(CartItem.user_uid.in_(uids)))
+            if rows:
+                await conn.execute(insert(CartItem), rows)
+            await session.commit()
+
+    async def flush(self) -> int:
+        """Write the carts dirty as of now, returning how many were written
+
+        Carts changed while this runs wait for the next flush, so a busy
+        cart is still written once per interval rather than once per change.
+        """
+        async with self._flush_lock:
+            self._batch_full.clear()
+            dirty = list(self._pending)
+            written = 0
+            for start in range(0, len(dirty), self.batch_size):
+                uids = dirty[start : start + self.batch_size]
+                self._inflight = {uid: self._pending.pop(uid) for uid in uids}
+
+                carts = {}
+                for user_uid, snapshot in self._inflight.items():
+                    # Prefer the store's copy: with a shared store another
+                    # worker may have changed the cart since it was marked
+                    latest = await self.store.get(user_uid)
+                    carts[user_uid] = dict(snapshot if latest is None else latest)
+
+                try:
+                    await self._write(carts)
+                except Exception:
+                    self.failed_flushes += 1
+                    for user_uid, items in carts.items():
+                        self._pending.setdefault(user_uid, items)
+                    raise
+                finally:
+                    self._inflight = {}
+
+                written += len(carts)
+                self.flushed += len(carts)
+                self.flushes += 1
+            return written
+
+    async def run(self):
+        while not self._stopping.is_set():
+            try:
+                await asyncio.wait_for(
+                    self._batch_full.wait(), timeout=self.flush_interval
+                )
+            except asyncio.TimeoutError:
+                pass
+
+            try:
+                await self.flush()
+            except Exception:
+                logging.exception("Cart write-behind flush failed, will retry")
+                self._batch_full.clear()
+
+    def start(self):
+        self._stopping = asyncio.Event()
+        self._task = asyncio.create_task(self.run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._stopping.set()
+            self._batch_full.set()
+            await self._task
+            self._task = None
+        await self.flush()
+
+    def stats(self) -> dict:
+        return {
+            "pending": len(self._pending),
+            "flushed": self.flushed,
+            "flushes": self.flushes,
+            "failed_flushes": self.failed_flushes,
+            "store": self.store.stats(),
+        }
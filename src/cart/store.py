@@ -0,0 +1,171 @@
+from collections import OrderedDict
+
+# Cart contents as held in the hot tier: product id (str) -> quantity
+Items = dict[str, int]
+
+
+class CartStore:
+    """Hot tier for active carts; subclasses decide where cart state lives
+
+    Mutations are applied by the store itself so they stay atomic when several
+    requests (or workers, for a shared store) change the same cart at once.
+    """
+
+    async def get(self, user_uid: str) -> Items | None:
+        """The cart, or None if it is not in the hot tier"""
+        raise NotImplementedError("Override this method in a subclass.")
+
+    async def load(self, user_uid: str, items: Items):
+        """Seed a cart read from the database, unless it was loaded meanwhile"""
+        raise NotImplementedError("Override this method in a subclass.")
+
+    async def add(self, user_uid: str, product_id: str, quantity: int) -> Items:
+        raise NotImplementedError("Override this method in a subclass.")
+
+    async def set_quantity(
+        self, user_uid: str, product_id: str, quantity: int
+    ) -> Items:
+        """Set a line's quantity, removing the line when it is 0"""
+        raise NotImplementedError("Override this method in a subclass.")
+
+    async def clear(self, user_uid: str) -> Items:
+        raise NotImplementedError("Override this method in a subclass.")
+
+    async def reset(self):
+        raise NotImplementedError("Override this method in a subclass.")
+
+    def stats(self) -> dict:
+        return {}
+
+
+class MemoryCartStore(CartStore):
+    """Per-process LRU of carts, bounded by `maxsize`
+
+    Evicting a cart loses nothing: unflushed changes are also held by the
+    CartService until they are written, and clean carts reload from the DB.
+    """
+
+    def __init__(self, maxsize: int = 100000):
+        self.maxsize = maxsize
+        self._carts: OrderedDict[str, Items] = OrderedDict()
+
+    def _touch(self, user_uid: str, items: Items) -> Items:
+        self._carts[user_uid] = items
+        self._carts.move_to_end(user_uid)
+        if len(self._carts) > self.maxsize:
+            self._carts.popitem(last=False)
+        return items
+
+    async def get(self, user_uid: str) -> Items | None:
+        items = self._carts.get(user_uid)
+        if items is not None:
+            self._carts.move_to_end(user_uid)
+        return items
+
+    async def load(self, user_uid: str, items: Items):
+        if user_uid not in self._carts:
+            self._touch(user_uid, items)
+
+    async def add(self, user_uid: str, product_id: str, quantity: int) -> Items:
+        items = self._carts.get(user_uid, {})
+        items[product_id] = items.get(product_id, 0) + quantity
+        return self._touch(user_uid, items)
+
+    async def set_quantity(
+        self, user_uid: str, product_id: str, quantity: int
+    ) -> Items:
+        items = self._carts.get(user_uid, {})
+        if quantity > 0:
+            items[product_id] = quantity
+        else:
+            items.pop(product_id, None)
+        return self._touch(user_uid, items)
+
+    async def clear(self, user_uid: str) -> Items:
+        return self._touch(user_uid, {})
+
+    async def reset(self):
+        self._carts.clear()
+
+    def stats(self) -> dict:
+        return {"size": len(self._carts), "maxsize": self.maxsize}
+
+
+class RedisCartStore(CartStore):
+    """Cart store shared by every worker through Redis, one hash per cart
+
+    A `_` field marks a loaded cart, so an empty cart is still a hit. Carts
+    idle for `ttl` seconds expire and reload from the database. Requires the
+    optional `redis` package.
+    """
+
+    # KEYS[1] cart; ARGV: product id, quantity, mode ("add" or "set"), ttl
+    script = """
+    local quantity = tonumber(ARGV[2])
+    if ARGV[3] == 'add' then
+        quantity = redis.call('HINCRBY', KEYS[1], ARGV[1], quantity)
+    elseif quantity > 0 then
+        redis.call('HSET', KEYS[1], ARGV[1], quantity)
+    end
+    if quantity <= 0 then
+        redis.call('HDEL', KEYS[1], ARGV[1])
+    end
+    redis.call('HSET', KEYS[1], '_', 1)
+    redis.call('EXPIRE', KEYS[1], ARGV[4])
+    return redis.call('HGETALL', KEYS[1])
+    """
+
+    def __init__(self, url: str, prefix: str = "cart:", ttl: int = 86400):
+        try:
+            from redis import asyncio as redis
+        except ImportError as err:
+            raise RuntimeError(
+                "CART_REDIS_URL is set but the redis package is not installed"
+            ) from err
+
+        self.prefix = prefix
+        self.ttl = ttl
+        self.client = redis.from_url(url, decode_responses=True)
+        self._update = self.client.register_script(self.script)
+
+    @staticmethod
+    def _items(fields) -> Items:
+        if isinstance(fields, list):
+            fields = dict(zip(fields[::2], fields[1::2]))
+        return {key: int(value) for key, value in fields.items() if key != "_"}
+
+    async def get(self, user_uid: str) -> Items | None:
+        fields = await self.client.hgetall(self.prefix + user_uid)
+        return self._items(fields) if fields else None
+
+    async def load(self, user_uid: str, items: Items):
+        key = self.prefix + user_uid
+        if await self.client.hsetnx(key, "_", 1):
+            if items:
+                await self.client.hset(key, mapping=items)
+            await self.client.expire(key, self.ttl)
+
+    async def add(self, user_uid: str, product_id: str, quantity: int) -> Items:
+        fields = await self._update(
+            keys=[self.prefix + user_uid], args=[product_id, quantity, "add", self.ttl]
+        )
+        return self._items(fields)
+
+    async def set_quantity(
+        self, user_uid: str, product_id: str, quantity: int
+    ) -> Items:
+        fields = await self._update(
+            keys=[self.prefix + user_uid], args=[product_id, quantity, "set", self.ttl]
+        )
+        return self._items(fields)
+
+    async def clear(self, user_uid: str) -> Items:
+        key = self.prefix + user_uid
+        async with self.client.pipeline(transaction=True) as pipe:
+            pipe.delete(key).hset(key, "_", 1).expire(key, self.ttl)
+            await pipe.execute()
+        return {}
+
+    async def reset(self):
+        async for key in self.client.scan_iter(match=self.prefix + "*"):
+            await self.client.delete(key)
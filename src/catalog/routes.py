@@ -0,0 +1,103 @@
+import uuid
+
+from fastapi import APIRouter, Depends, Query, Request, status
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from src.auth.dependencies import RoleChecker
+from src.config import settings
+from src.db.main import get_read_session, get_session
+from src.errors import ProductNotFound
+from src.responses import (
+    RawJSONResponse,
+    conditional_json,
+    etag_matches,
+    not_modified,
+    public_max_age,
+    weak_etag,
+)
+from .schemas import (
+    ProductCreateModel,
+    ProductModel,
+    ProductPage,
+    ProductSearchResults,
+    ProductSort,
+    dump_page,
+    dump_product,
+    dump_search,
+)
+from .service import CatalogService
+
+catalog_router = APIRouter()
+catalog_service = CatalogService()
+admin_role_checker = RoleChecker(["admin"])
+catalog_cache_control = public_max_age(settings.CATALOG_CACHE_MAX_AGE)
+
+
+@catalog_router.get("/products", response_model=ProductPage)
+async def list_products(
+    request: Request,
+    category: str | None = None,
+    sort: ProductSort = "newest",
+    limit: int = Query(default=20, ge=1, le=100),
+    cursor: str | None = None,
+    session: AsyncSession = Depends(get_read_session),
+):
+    rows, next_cursor = await catalog_service.list_products(
+        session, category=category, sort=sort, limit=limit, cursor=cursor
+    )
+    return conditional_json(
+        request, dump_page(rows, next_cursor), catalog_cache_control
+    )
+
+
+@catalog_router.get("/search", response_model=ProductSearchResults)
+async def search_products(
+    request: Request,
+    q: str = Query(min_length=1, max_length=200),
+    category: str | None = None,
+    limit: int = Query(default=20, ge=1, le=50),
+    session: AsyncSession = Depends(get_read_session),
+):
+    rows, fuzzy = await catalog_service.search_products(
+        session, q, category=category, limit=limit
+    )
+    return conditional_json(request, dump_search(rows, fuzzy), catalog_cache_control)
+
+
+@catalog_router.get("/products/{product_id}", response_model=ProductModel)
+async def get_product(
+    request: Request,
+    product_id: uuid.UUID,
+    session: AsyncSession = Depends(get_read_session),
+):
+    # Revalidations check the version alone, before the row is loaded
+    if "if-none-match" in request.headers:
+        version = await catalog_service.get_product_version(product_id, session)
+        if version is not None:
+            etag = weak_etag(product_id, version)
+            if etag_matches(request, etag):
+                return not_modified(etag, catalog_cache_control)
+
+    product = await catalog_service.get_product(product_id, session)
+    if product is None:
+        raise ProductNotFound()
+    return RawJSONResponse(
+        dump_product(product),
+        headers={
+            "ETag": weak_etag(product.id, product.updated_at),
+            "Cache-Control": catalog_cache_control,
+        },
+    )
+
+
+@catalog_router.post(
+    "/products",
+    status_code=status.HTTP_201_CREATED,
+    response_model=ProductModel,
+    dependencies=[Depends(admin_role_checker)],
+)
+async def create_product(
+    data: ProductCreateModel, session: AsyncSession = Depends(get_session)
+):
+    product = await catalog_service.create_product(data, session)
+    return RawJSONResponse(dump_product(product), status_code=status.HTTP_201_CREATED)
@@ -0,0 +1,69 @@
+from pydantic import BaseModel, Field, TypeAdapter
+from typing import List, Literal, Optional
+import uuid
+from datetime import datetime
+
+ProductSort = Literal["newest", "price", "-price"]
+
+
+class ProductCreateModel(BaseModel):
+    sku: str = Field(max_length=64)
+    name: str = Field(max_length=255)
+    description: str = ""
+    category: str = Field(max_length=100)
+    price_cents: int = Field(ge=0)
+
+
+class ProductSummary(BaseModel):
+    id: uuid.UUID
+    sku: str
+    name: str
+    category: str
+    price_cents: int
+    created_at: datetime
+
+
+class ProductModel(ProductSummary):
+    description: str
+    is_active: bool
+    updated_at: datetime
+
+
+class ProductPage(BaseModel):
+    items: List[ProductSummary]
+    next_cursor: Optional[str] = None
+
+
+class ProductSearchResults(BaseModel):
+    items: List[ProductSummary]
+    # True when nothing matched exactly and these are typo-tolerant matches
+    fuzzy: bool = False
+
+
+product_serializer = TypeAdapter(ProductModel)
+page_serializer = TypeAdapter(ProductPage)
+search_serializer = TypeAdapter(ProductSearchResults)
+
+
+def dump_product(product) -> bytes:
+    """Serialize a Product row without validating it again"""
+    return product_serializer.dump_json(
+        ProductModel.model_construct(
+            **{name: getattr(product, name) for name in ProductModel.model_fields}
+        )
+    )
+
+
+def dump_page(rows, next_cursor: str | None) -> bytes:
+    """Serialize summary rows (as selected by CatalogService) into a page"""
+    items = [ProductSummary.model_construct(**row._mapping) for row in rows]
+    return page_serializer.dump_json(
+        ProductPage.model_construct(items=items, next_cursor=next_cursor)
+    )
+
+
+def dump_search(rows, fuzzy: bool) -> bytes:
+    items = [ProductSummary.model_construct(**row._mapping) for row in rows]
+    return search_serializer.dump_json(
+        ProductSearchResults.model_construct(items=items, fuzzy=fuzzy)
+    )
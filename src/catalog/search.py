@@ -0,0 +1,129 @@
+"""Full-text product search on Postgres, with an SQLite FTS5 fallback
+
+Postgres keeps a weighted `search_vector` as a stored generated column, so
+it is maintained by the database on every insert/update, with a GIN index
+on it and a pg_trgm GIN index on `name` for typo-tolerant matching.
+
+SQLite mirrors `name`/`description` into an external-content FTS5 table
+kept in sync by triggers. It joins back on the implicit rowid, so after a
+VACUUM run `INSERT INTO products_fts(products_fts) VALUES ('rebuild')`.
+
+The migration creates the Postgres objects; the DDL below covers databases
+built with create_all (local runs and tests).
+"""
+
+import re
+
+from sqlalchemy import (
+    DDL,
+    column,
+    event,
+    func,
+    literal,
+    literal_column,
+    table,
+    text,
+)
+from sqlmodel import select
+
+from src.db.models import Product
+
+SEARCH_VECTOR = (
+    "setweight(to_tsvector('english', coalesce(name, '')), 'A') || "
+    "setweight(to_tsvector('english', coalesce(description, '')), 'B')"
+)
+
+POSTGRES_DDL = [
+    "CREATE EXTENSION IF NOT EXISTS pg_trgm",
+    f"ALTER TABLE products ADD COLUMN search_vector tsvector "
+    f"GENERATED ALWAYS AS ({SEARCH_VECTOR}) STORED",
+    "CREATE INDEX ix_products_search_vector ON products "
+    "USING gin (search_vector) WHERE is_active",
+    "CREATE INDEX ix_products_name_trgm ON products "
+    "USING gin (name gin_trgm_ops) WHERE is_active",
+]
+
+SQLITE_DDL = [
+    "CREATE VIRTUAL TABLE products_fts USING fts5(name, description, "
+    "content='products', content_rowid='rowid', tokenize='porter unicode61')",
+    "CREATE TRIGGER products_fts_ai AFTER INSERT ON products BEGIN "
+    "INSERT INTO products_fts(rowid, name, description) "
+    "VALUES (new.rowid, new.name, new.description); END",
+    "CREATE TRIGGER products_fts_ad AFTER DELETE ON products BEGIN "
+    "INSERT INTO products_fts(products_fts, rowid, name, description) "
+    "VALUES ('delete', old.rowid, old.name, old.description); END",
+    "CREATE TRIGGER products_fts_au AFTER UPDATE OF name, description "
+    "ON products BEGIN "
+    "INSERT INTO products_fts(products_fts, rowid, name, description) "
+    "VALUES ('delete', old.rowid, old.name, old.description); "
+    "INSERT INTO products_fts(rowid, name, description) "
+    "VALUES (new.rowid, new.name, new.description); END",
+]
+
+for statement in POSTGRES_DDL:
+    event.listen(
+        Product.__table__,
+        "after_create",
+        DDL(statement).execute_if(dialect="postgresql"),
+    )
+for statement in SQLITE_DDL:
+    event.listen(
+        Product.__table__, "after_create", DDL(statement).execute_if(dialect="sqlite")
+    )
+
+products_fts = table("products_fts", column("rowid"))
+search_vector = literal_column("products.search_vector")
+
+
+def search_terms(query: str) -> list[str]:
+    return re.findall(r"\w+", query.lower())[:8]
+
+
+def fts5_query(terms: list[str], relaxed: bool = False) -> str:
+    """All terms, the last one as a prefix since it may still be being typed
+
+    FTS5 has no fuzzy matching, so with `relaxed` each term only has to share
+    its first 3 letters with a word in the name: a rough stand-in for pg_trgm
+    that finds "running shoes" from "runing shoos".
+    """
+    if relaxed:
+        return "name : (" + " ".join(f'"{term[:3]}"*' for term in terms) + ")"
+    return " ".join(f'"{term}"' for term in terms[:-1]) + f' "{terms[-1]}"*'
+
+
+def ranked_statement(dialect: str, columns, query: str, limit: int):
+    """Relevance-ranked matches, served from the full-text index"""
+    if dialect == "postgresql":
+        tsquery = func.websearch_to_tsquery("english", query)
+        return (
+            select(*columns)
+            .where(Product.is_active, search_vector.op("@@")(tsquery))
+            .order_by(func.ts_rank_cd(search_vector, tsquery).desc(), Product.id)
+            .limit(limit)
+        )
+
+    return (
+        select(*columns)
+        .join(products_fts, products_fts.c.rowid == literal_column("products.rowid"))
+        .where(Product.is_active, text("products_fts MATCH :match"))
+        .order_by(text("bm25(products_fts, 10.0, 1.0)"), Product.id)
+        .limit(limit)
+        .params(match=fts5_query(search_terms(query)))
+    )
+
+
+def fuzzy_statement(dialect: str, columns, query: str, limit: int):
+    """Typo-tolerant matches for when the ranked search finds nothing"""
+    if dialect == "postgresql":
+        return (
+            select(*columns)
+            # `<%` compares against the best-matching run of words in the
+            # name, so a short misspelt query still clears the threshold
+            .where(Product.is_active, literal(query).op("<%")(Product.name))
+            .order_by(func.word_similarity(query, Product.name).desc(), Product.id)
+            .limit(limit)
+        )
+
+    return ranked_statement(dialect, columns, query, limit).params(
+        match=fts5_query(search_terms(query), relaxed=True)
+    )
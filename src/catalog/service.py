@@ -0,0 +1,147 @@
+import uuid
+from datetime import datetime
+
+from itsdangerous import BadSignature, URLSafeSerializer
+from sqlalchemy import tuple_
+from sqlalchemy.dialects.postgresql import insert as postgres_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from src.config import settings
+from src.db.models import PRODUCT_SUMMARY_COLUMNS, Product
+from src.errors import InvalidCursor, ProductAlreadyExists
+from .schemas import ProductCreateModel
+from .search import fuzzy_statement, ranked_statement, search_terms
+
+# Listing order -> (sort column, descending); `id` breaks ties in every order
+SORTS = {
+    "newest": (Product.created_at, True),
+    "price": (Product.price_cents, False),
+    "-price": (Product.price_cents, True),
+}
+
+SUMMARY_COLUMNS = tuple(getattr(Product, name) for name in PRODUCT_SUMMARY_COLUMNS)
+
+cursor_serializer = URLSafeSerializer(settings.JWT_SECRET, salt="catalog-cursor")
+
+
+def encode_cursor(sort: str, value, last_id: uuid.UUID) -> str:
+    """Opaque, signed token for the position just after (value, last_id)"""
+    if isinstance(value, datetime):
+        value = value.isoformat()
+    return cursor_serializer.dumps([sort, value, str(last_id)])
+
+
+def decode_cursor(cursor: str, sort: str) -> tuple:
+    try:
+        cursor_sort, value, last_id = cursor_serializer.loads(cursor)
+        if cursor_sort != sort:
+            raise ValueError("cursor was issued for a different sort")
+        if SORTS[sort][0] is Product.created_at:
+            value = datetime.fromisoformat(value)
+        return value, uuid.UUID(last_id)
+    except (BadSignature, ValueError, TypeError):
+        raise InvalidCursor()
+
+
+class CatalogService:
+    async def list_products(
+        self,
+        session: AsyncSession,
+        category: str | None = None,
+        sort: str = "newest",
+        limit: int = 20,
+        cursor: str | None = None,
+    ):
+        """One page of active products in keyset order, plus the next cursor
+
+        Pages seek past the previous page's last (sort value, id) instead of
+        using OFFSET, so page 10,000 costs the same index range scan as page
+        1. Each sort/category combination has a matching partial index.
+        """
+        column, descending = SORTS[sort]
+        statement = select(*SUMMARY_COLUMNS).where(Product.is_active)
+        if category is not None:
+            statement = statement.where(Product.category == category)
+
+        if cursor is not None:
+            position = tuple_(column, Product.id)
+            after = decode_cursor(cursor, sort)
+            statement = statement.where(
+                position < after if descending else position > after
+            )
+
+        if descending:
+            statement = statement.order_by(column.desc(), Product.id.desc())
+        else:
+            statement = statement.order_by(column.asc(), Product.id.asc())
+
+        result = await session.exec(statement.limit(limit + 1))
+        rows = result.all()
+
+        next_cursor = None
+        if len(rows) > limit:
+            rows = rows[:limit]
+            last = rows[-1]
+            next_cursor = encode_cursor(sort, last._mapping[column.key], last.id)
+        return rows, next_cursor
+
+    async def search_products(
+        self,
+        session: AsyncSession,
+        query: str,
+        category: str | None = None,
+        limit: int = 20,
+    ):
+        """Best matches for `query`, and whether they came from the fuzzy pass
+
+        The ranked full-text pass runs first; only when it finds nothing do we
+        pay for the typo-tolerant one (pg_trgm, or relaxed prefixes on SQLite).
+        """
+        if not search_terms(query):
+            return [], False
+
+        dialect = session.bind.dialect.name
+        for fuzzy, build in ((False, ranked_statement), (True, fuzzy_statement)):
+            statement = build(dialect, SUMMARY_COLUMNS, query, limit)
+            if category is not None:
+                statement = statement.where(Product.category == category)
+            rows = (await session.exec(statement)).all()
+            if rows:
+                return rows, fuzzy
+        return [], False
+
+    async def get_product(self, product_id: uuid.UUID, session: AsyncSession):
+        return await session.get(Product, product_id)
+
+    async def get_product_version(
+        self, product_id: uuid.UUID, session: AsyncSession
+    ) -> datetime | None:
+        """Just the product's `updated_at`, to revalidate without loading it"""
+        result = await session.exec(
+            select(Product.updated_at).where(Product.id == product_id)
+        )
+        return result.first()
+
+    async def create_product(self, data: ProductCreateModel, session: AsyncSession):
+        insert = (
+            postgres_insert
+            if session.bind.dialect.name == "postgresql"
+            else sqlite_insert
+        )
+        statement = (
+            insert(Product)
+            .values(**data.model_dump())
+            .on_conflict_do_nothing()
+            .returning(Product)
+        )
+        result = await session.exec(statement)
+        product = result.scalar_one_or_none()
+
+        if product is None:
+            await session.rollback()
+            raise ProductAlreadyExists()
+
+        await session.commit()
+        return product
@@ -3,8 +3,14 @@ from pydantic_settings import BaseSettings, SettingsConfigDict
 
 class Settings(BaseSettings):
     DATABASE_URL: str
+    DATABASE_REPLICA_URL: str | None = None
     JWT_SECRET: str
     JWT_ALGORITHM: str
+    JWT_KEYS_FILE: str | None = None
+    # While moving to JWT_KEYS_FILE: keep accepting HMAC tokens until this ISO
+    # timestamp (the switch plus the longest token lifetime), then stop
+    JWT_ACCEPT_HMAC_UNTIL: str | None = None
+    JWT_JWKS_MAX_AGE: int = 300
     MAIL_USERNAME: str
     MAIL_PASSWORD: str
     MAIL_FROM: str
@@ -17,6 +23,64 @@ class Settings(BaseSettings):
     DOMAIN: str
     CLIENT_ID: str
     CLIENT_SECRET: str
+    GOOGLE_TOKEN_URL: str = "https://oauth2.googleapis.com/token"
+    GOOGLE_CERTS_URL: str = "https://www.googleapis.com/oauth2/v1/certs"
+    GOOGLE_HTTP_TIMEOUT: float = 10.0
+    MAIL_POOL_SIZE: int = 2
+    MAIL_IDLE_TIMEOUT: float = 30.0
+    MAIL_OUTBOX_ENABLED: bool = True
+    MAIL_OUTBOX_BATCH_SIZE: int = 50
+    MAIL_OUTBOX_POLL_INTERVAL: float = 1.0
+    MAIL_OUTBOX_MAX_ATTEMPTS: int = 5
+    TOKEN_REVOCATION_BATCH_SIZE: int = 1000
+    TOKEN_SWEEPER_ENABLED: bool = True
+    TOKEN_SWEEP_INTERVAL: float = 300.0
+    TOKEN_SWEEP_BATCH_SIZE: int = 500
+    TOKEN_SWEEP_BATCH_PAUSE: float = 0.1
+    TOKEN_PARTITIONING: bool = False
+    TOKEN_PARTITION_MONTHS_AHEAD: int = 2
+    RATE_LIMIT_ENABLED: bool = True
+    RATE_LIMIT_IP_PER_MINUTE: int = 20
+    RATE_LIMIT_EMAIL_PER_MINUTE: int = 5
+    RATE_LIMIT_GLOBAL_PER_SECOND: int = 50
+    RATE_LIMIT_STORE_SIZE: int = 100000
+    RATE_LIMIT_REDIS_URL: str | None = None
+    DB_POOL_SIZE: int = 10
+    DB_MAX_OVERFLOW: int = 20
+    DB_POOL_TIMEOUT: int = 30
+    DB_POOL_RECYCLE: int = 1800
+    DB_POOL_PRE_PING: bool = True
+    DB_STATEMENT_CACHE_SIZE: int = 100
+    # Deployments must be migrated with Alembic; set to "create_all" for a
+    # throwaway local database
+    DB_STARTUP_SCHEMA: str = "check"
+    DB_POOL_PREWARM: int = 0
+    DB_REPLICA_MAX_LAG: float = 5.0
+    DB_REPLICA_CHECK_INTERVAL: float = 1.0
+    DB_READ_STICKY_SECONDS: float = 5.0
+    PASSWORD_HASH_EXECUTOR: str = "thread"
+    PASSWORD_HASH_WORKERS: int = 4
+    PASSWORD_HASH_MAX_QUEUE: int = 64
+    TOKEN_CACHE_SIZE: int = 10000
+    USER_CACHE_SIZE: int = 10000
+    USER_CACHE_TTL: int = 30
+    CART_STORE_SIZE: int = 100000
+    CART_REDIS_URL: str | None = None
+    CART_FLUSH_INTERVAL: float = 2.0
+    CART_FLUSH_BATCH_SIZE: int = 500
+    CART_MAX_QUANTITY: int = 99
+    ORDER_RESERVATION_TTL: int = 900
+    ORDER_EXPIRY_ENABLED: bool = True
+    ORDER_EXPIRY_INTERVAL: float = 5.0
+    ORDER_EXPIRY_BATCH_SIZE: int = 100
+    CATALOG_CACHE_MAX_AGE: int = 60
+    IDEMPOTENCY_ENABLED: bool = True
+    IDEMPOTENCY_STORE: str = "memory"
+    IDEMPOTENCY_STORE_SIZE: int = 10000
+    IDEMPOTENCY_TTL: int = 86400
+    IDEMPOTENCY_WAIT_TIMEOUT: float = 10.0
+    # How long an unfinished claim blocks retries; keep above the wait timeout
+    IDEMPOTENCY_LOCK_TIMEOUT: float = 30.0
 
     model_config = SettingsConfigDict(env_file=".env", extra="ignore")
 
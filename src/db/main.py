@@ -1,19 +1,201 @@
-from sqlalchemy.ext.asyncio import create_async_engine
-from sqlalchemy.orm import sessionmaker
+import asyncio
+import time
+from pathlib import Path
+from fastapi import Request
+from sqlalchemy import event
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import AsyncEngine, async_sessionmaker, create_async_engine
+from sqlalchemy.pool import AsyncAdaptedQueuePool
 from sqlmodel import SQLModel
 from sqlmodel.ext.asyncio.session import AsyncSession
 from src.config import settings
+from .routing import ReadRouter, RoutingSession
 
-engine = create_async_engine(url=settings.DATABASE_URL)
 
+class PoolStats:
+    """Counters for how long requests wait to check a connection out"""
 
-async def init_db():
-    async with engine.begin() as conn:
-        await conn.run_sync(SQLModel.metadata.create_all)
+    def __init__(self):
+        self.checkouts = 0
+        self.total_wait = 0.0
+        self.max_wait = 0.0
 
+    def record_wait(self, seconds: float):
+        self.checkouts += 1
+        self.total_wait += seconds
+        self.max_wait = max(self.max_wait, seconds)
 
-async def get_session() -> AsyncSession:
-    Session = sessionmaker(bind=engine, class_=AsyncSession, expire_on_commit=False)
+    def reset(self):
+        self.__init__()
 
-    async with Session() as session:
+
+pool_stats = PoolStats()
+
+
+class TimedQueuePool(AsyncAdaptedQueuePool):
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            return super()._do_get()
+        finally:
+            pool_stats.record_wait(time.perf_counter() - start)
+
+
+def build_engine(url: str) -> AsyncEngine:
+    """Create an engine with pool sizing from settings
+
+    SQLite keeps SQLAlchemy's defaults; the pool and asyncpg statement cache
+    options only apply to server databases.
+    """
+    if make_url(url).get_backend_name() == "sqlite":
+        return create_async_engine(url=url)
+
+    connect_args = {}
+    if make_url(url).get_driver_name() == "asyncpg":
+        connect_args = {
+            "statement_cache_size": settings.DB_STATEMENT_CACHE_SIZE,
+            "prepared_statement_cache_size": settings.DB_STATEMENT_CACHE_SIZE,
+        }
+
+    return create_async_engine(
+        url=url,
+        poolclass=TimedQueuePool,
+        pool_size=settings.DB_POOL_SIZE,
+        max_overflow=settings.DB_MAX_OVERFLOW,
+        pool_timeout=settings.DB_POOL_TIMEOUT,
+        pool_recycle=settings.DB_POOL_RECYCLE,
+        pool_pre_ping=settings.DB_POOL_PRE_PING,
+        connect_args=connect_args,
+    )
+
+
+engine = build_engine(settings.DATABASE_URL)
+replica_engine = (
+    build_engine(settings.DATABASE_REPLICA_URL)
+    if settings.DATABASE_REPLICA_URL
+    else None
+)
+
+read_router = ReadRouter(
+    engine,
+    replica_engine,
+    max_lag=settings.DB_REPLICA_MAX_LAG,
+    sticky_seconds=settings.DB_READ_STICKY_SECONDS,
+    check_interval=settings.DB_REPLICA_CHECK_INTERVAL,
+)
+
+if replica_engine is not None:
+
+    @event.listens_for(replica_engine.sync_engine, "handle_error")
+    def _replica_error(context):
+        # Stop routing reads to a replica that is refusing connections right
+        # away instead of waiting for the next health check
+        if context.is_disconnect:
+            read_router.mark_down(context.original_exception)
+
+
+async_session = async_sessionmaker(
+    bind=engine,
+    class_=AsyncSession,
+    sync_session_class=RoutingSession,
+    info={"read_router": read_router},
+    expire_on_commit=False,
+)
+
+
+def get_pool_stats() -> dict:
+    pool = engine.pool
+    stats = {"pool": pool.status()}
+
+    if isinstance(pool, AsyncAdaptedQueuePool):
+        stats.update(
+            size=pool.size(),
+            checked_in=pool.checkedin(),
+            checked_out=pool.checkedout(),
+            overflow=max(pool.overflow(), 0),
+        )
+
+    if pool_stats.checkouts:
+        stats.update(
+            checkouts=pool_stats.checkouts,
+            avg_wait_ms=round(pool_stats.total_wait / pool_stats.checkouts * 1000, 3),
+            max_wait_ms=round(pool_stats.max_wait * 1000, 3),
+        )
+
+    if read_router.enabled:
+        stats["replica"] = read_router.stats()
+
+    return stats
+
+
+MIGRATIONS_DIR = Path(__file__).resolve().parents[2] / "migrations"
+
+
+def _current_heads(connection) -> set[str]:
+    from alembic.runtime.migration import MigrationContext
+
+    return set(MigrationContext.configure(connection).get_current_heads())
+
+
+async def check_schema(bind: AsyncEngine = engine):
+    """Fail fast unless the database is at the Alembic head revision
+
+    Much cheaper than create_all, which reflects every table on each boot.
+    """
+    from alembic.script import ScriptDirectory
+
+    expected = set(ScriptDirectory(str(MIGRATIONS_DIR)).get_heads())
+    async with bind.connect() as conn:
+        current = await conn.run_sync(_current_heads)
+
+    if current != expected:
+        raise RuntimeError(
+            f"Database schema is at {sorted(current) or 'no revision'}, "
+            f"expected {sorted(expected)}; run `alembic upgrade head`"
+        )
+
+
+async def prewarm_pool(connections: int, bind: AsyncEngine = engine) -> int:
+    """Open up to `connections` pooled connections before serving traffic
+
+    Returns how many were opened. They go back to the pool idle, so the
+    first requests after boot don't pay for connection setup.
+    """
+    if isinstance(bind.pool, AsyncAdaptedQueuePool):
+        connections = min(connections, bind.pool.size())
+    if connections <= 0:
+        return 0
+
+    conns = await asyncio.gather(*(bind.connect() for _ in range(connections)))
+    try:
+        await asyncio.gather(*(conn.exec_driver_sql("SELECT 1") for conn in conns))
+    finally:
+        for conn in conns:
+            await conn.close()
+    return connections
+
+
+async def init_db(schema: str = "check"):
+    """Prepare the schema on boot: `create_all`, `check` (Alembic head) or `skip`"""
+    if schema == "create_all":
+        async with engine.begin() as conn:
+            await conn.run_sync(SQLModel.metadata.create_all)
+    elif schema == "check":
+        await check_schema()
+    elif schema != "skip":
+        raise ValueError(f"Unknown DB_STARTUP_SCHEMA: {schema}")
+
+
+async def get_session(request: Request) -> AsyncSession:
+    """Request session on the primary; its writes make the client sticky"""
+    async with async_session() as session:
+        session.info["request"] = request
+        yield session
+
+
+async def get_read_session(request: Request) -> AsyncSession:
+    """Session for read-only routes; plain SELECTs may use the read replica"""
+    async with async_session() as session:
+        session.info["request"] = request
+        session.info["replica_ok"] = True
         yield session
@@ -1,5 +1,6 @@
 from sqlmodel import SQLModel, Field, Relationship
-from sqlalchemy import Column, String, Boolean, ForeignKey
+from sqlalchemy import Column, String, Boolean, ForeignKey, Integer, Text, JSON, Index
+from sqlalchemy import CheckConstraint, LargeBinary, Uuid, text, true
 import sqlalchemy.dialects.postgresql as pg
 from datetime import datetime, timezone, timedelta
 from typing import Optional, List
@@ -43,12 +44,22 @@ class User(SQLModel, table=True):
     created_at: datetime = Field(
         sa_column=Column(pg.TIMESTAMP(timezone=True), default=utc_now, nullable=False)
     )
+    # Bumped on every change; /me derives its ETag from it
     updated_at: datetime = Field(
-        sa_column=Column(pg.TIMESTAMP(timezone=True), default=utc_now, nullable=False)
+        sa_column=Column(
+            pg.TIMESTAMP(timezone=True),
+            default=utc_now,
+            onupdate=utc_now,
+            nullable=False,
+        )
     )
     refresh_tokens: List["RefreshToken"] = Relationship(
         back_populates="user",
-        sa_relationship_kwargs={"lazy": "selectin", "cascade": "all, delete-orphan"},
+        sa_relationship_kwargs={
+            "lazy": "raise_on_sql",
+            "cascade": "all, delete-orphan",
+            "passive_deletes": True,
+        },
     )
 
     def __repr__(self):
@@ -57,6 +68,9 @@ class User(SQLModel, table=True):
 
 class RefreshToken(SQLModel, table=True):
     __tablename__ = "refresh_tokens"
+    __table_args__ = (
+        Index("ix_refresh_tokens_user_uid_revoked", "user_uid", "revoked"),
+    )
 
     id: uuid.UUID = Field(
         sa_column=Column(pg.UUID, primary_key=True, default=uuid.uuid4, nullable=False)
@@ -106,3 +120,221 @@ class PasswordResetToken(SQLModel, table=True):
     created_at: datetime = Field(
         sa_column=Column(pg.TIMESTAMP(timezone=True), default=utc_now, nullable=False)
     )
+
+
+class EmailOutbox(SQLModel, table=True):
+    __tablename__ = "email_outbox"
+    __table_args__ = (
+        Index("ix_email_outbox_status_next_attempt_at", "status", "next_attempt_at"),
+    )
+
+    id: uuid.UUID = Field(
+        sa_column=Column(pg.UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    )
+    recipients: List[str] = Field(sa_column=Column(JSON, nullable=False))
+    subject: str = Field(sa_column=Column(pg.VARCHAR(255), nullable=False))
+    body: str = Field(sa_column=Column(Text, nullable=False))
+    subtype: str = Field(
+        sa_column=Column(pg.VARCHAR(20), nullable=False, server_default="html")
+    )
+    status: str = Field(
+        sa_column=Column(pg.VARCHAR(20), nullable=False, server_default="pending")
+    )
+    attempts: int = Field(sa_column=Column(Integer, nullable=False, server_default="0"))
+    last_error: Optional[str] = Field(sa_column=Column(Text, nullable=True))
+    next_attempt_at: datetime = Field(
+        sa_column=Column(pg.TIMESTAMP(timezone=True), default=utc_now, nullable=False)
+    )
+    created_at: datetime = Field(
+        sa_column=Column(pg.TIMESTAMP(timezone=True), default=utc_now, nullable=False)
+    )
+    sent_at: Optional[datetime] = Field(
+        sa_column=Column(pg.TIMESTAMP(timezone=True), nullable=True)
+    )
+
+
+PRODUCT_SUMMARY_COLUMNS = ["id", "sku", "name", "category", "price_cents", "created_at"]
+
+
+def _listing_index(name: str, *columns: str) -> Index:
+    """Index for one catalog listing order, covering the summary columns
+
+    Partial on active products, which are the only ones listings show; on
+    Postgres the INCLUDE columns let a page be served by an index-only scan.
+    """
+    return Index(
+        name,
+        *columns,
+        postgresql_include=[c for c in PRODUCT_SUMMARY_COLUMNS if c not in columns],
+        postgresql_where=text("is_active"),
+        sqlite_where=text("is_active = 1"),
+    )
+
+
+class Product(SQLModel, table=True):
+    __tablename__ = "products"
+    __table_args__ = (
+        _listing_index("ix_products_active_price", "price_cents", "id"),
+        _listing_index("ix_products_active_created", "created_at", "id"),
+        _listing_index(
+            "ix_products_active_category_price", "category", "price_cents", "id"
+        ),
+        _listing_index(
+            "ix_products_active_category_created", "category", "created_at", "id"
+        ),
+    )
+
+    # Generic Uuid: native UUID on Postgres, CHAR(32) elsewhere. SQLite gives
+    # a column declared "UUID" numeric affinity, which mangles hex ids that
+    # look like numbers (e.g. "1234e5...")
+    id: uuid.UUID = Field(sa_column=Column(Uuid, primary_key=True, default=uuid.uuid4))
+    sku: str = Field(sa_column=Column(pg.VARCHAR(64), unique=True, nullable=False))
+    name: str = Field(sa_column=Column(pg.VARCHAR(255), nullable=False))
+    description: str = Field(sa_column=Column(Text, nullable=False, server_default=""))
+    category: str = Field(sa_column=Column(pg.VARCHAR(100), nullable=False))
+    price_cents: int = Field(sa_column=Column(Integer, nullable=False))
+    is_active: bool = Field(
+        sa_column=Column(Boolean, nullable=False, default=True, server_default=true())
+    )
+    created_at: datetime = Field(
+        sa_column=Column(pg.TIMESTAMP(timezone=True), default=utc_now, nullable=False)
+    )
+    updated_at: datetime = Field(
+        sa_column=Column(
+            pg.TIMESTAMP(timezone=True),
+            default=utc_now,
+            onupdate=utc_now,
+            nullable=False,
+        )
+    )
+
+
+class CartItem(SQLModel, table=True):
+    """Durable copy of a cart line; the live cart is in src.cart's hot tier"""
+
+    __tablename__ = "cart_items"
+
+    user_uid: uuid.UUID = Field(
+        sa_column=Column(
+            Uuid, ForeignKey("users.uid", ondelete="CASCADE"), primary_key=True
+        )
+    )
+    product_id: uuid.UUID = Field(
+        sa_column=Column(
+            Uuid, ForeignKey("products.id", ondelete="CASCADE"), primary_key=True
+        )
+    )
+    quantity: int = Field(sa_column=Column(Integer, nullable=False))
+    updated_at: datetime = Field(
+        sa_column=Column(pg.TIMESTAMP(timezone=True), default=utc_now, nullable=False)
+    )
+
+
+class Inventory(SQLModel, table=True):
+    """Stock for a product, as one row (shard 0) or split across N shards
+
+    Sharding spreads a hot SKU's decrements over several rows so checkouts
+    don't all queue on one row lock; the product's stock is the sum.
+    """
+
+    __tablename__ = "inventory"
+    __table_args__ = (CheckConstraint("available >= 0", name="ck_inventory_available"),)
+
+    product_id: uuid.UUID = Field(
+        sa_column=Column(
+            Uuid, ForeignKey("products.id", ondelete="CASCADE"), primary_key=True
+        )
+    )
+    shard: int = Field(
+        sa_column=Column(Integer, primary_key=True, default=0, server_default="0")
+    )
+    available: int = Field(
+        sa_column=Column(Integer, nullable=False, server_default="0")
+    )
+    updated_at: datetime = Field(
+        sa_column=Column(
+            pg.TIMESTAMP(timezone=True),
+            default=utc_now,
+            onupdate=utc_now,
+            nullable=False,
+        )
+    )
+
+
+class Order(SQLModel, table=True):
+    """A checkout; while `reserved` it holds stock until `expires_at`"""
+
+    __tablename__ = "orders"
+    __table_args__ = (
+        Index("ix_orders_user_uid_created_at", "user_uid", "created_at"),
+        # Only reserved orders are ever scanned for expiry
+        Index(
+            "ix_orders_reserved_expires_at",
+            "expires_at",
+            postgresql_where=text("status = 'reserved'"),
+            sqlite_where=text("status = 'reserved'"),
+        ),
+    )
+
+    id: uuid.UUID = Field(sa_column=Column(Uuid, primary_key=True, default=uuid.uuid4))
+    user_uid: uuid.UUID = Field(
+        sa_column=Column(
+            Uuid, ForeignKey("users.uid", ondelete="CASCADE"), nullable=False
+        )
+    )
+    status: str = Field(
+        sa_column=Column(pg.VARCHAR(20), nullable=False, server_default="reserved")
+    )
+    total_cents: int = Field(sa_column=Column(Integer, nullable=False))
+    expires_at: datetime = Field(
+        sa_column=Column(pg.TIMESTAMP(timezone=True), nullable=False)
+    )
+    created_at: datetime = Field(
+        sa_column=Column(pg.TIMESTAMP(timezone=True), default=utc_now, nullable=False)
+    )
+    updated_at: datetime = Field(
+        sa_column=Column(
+            pg.TIMESTAMP(timezone=True),
+            default=utc_now,
+            onupdate=utc_now,
+            nullable=False,
+        )
+    )
+
+
+class OrderItem(SQLModel, table=True):
+    __tablename__ = "order_items"
+
+    order_id: uuid.UUID = Field(
+        sa_column=Column(
+            Uuid, ForeignKey("orders.id", ondelete="CASCADE"), primary_key=True
+        )
+    )
+    product_id: uuid.UUID = Field(
+        sa_column=Column(Uuid, ForeignKey("products.id"), primary_key=True)
+    )
+    quantity: int = Field(sa_column=Column(Integer, nullable=False))
+    unit_price_cents: int = Field(sa_column=Column(Integer, nullable=False))
+
+
+class IdempotencyRecord(SQLModel, table=True):
+    """First response to a request carrying an Idempotency-Key
+
+    `status_code` is NULL while the first request is still running, which
+    is how other app instances know to wait rather than run it again. Until
+    then `expires_at` is a short lease, so a claim left by a dead worker
+    lapses; once the response is stored it's extended to the full TTL.
+    """
+
+    __tablename__ = "idempotency_keys"
+
+    key: str = Field(sa_column=Column(pg.VARCHAR(64), primary_key=True))
+    fingerprint: str = Field(sa_column=Column(pg.VARCHAR(64), nullable=False))
+    status_code: Optional[int] = Field(sa_column=Column(Integer, nullable=True))
+    headers: List[List[str]] = Field(
+        sa_column=Column(JSON, nullable=False, server_default="[]")
+    )
+    body: bytes = Field(sa_column=Column(LargeBinary, nullable=False, default=b""))
+    expires_at: datetime = Field(
+        sa_column=Column(pg.TIMESTAMP(timezone=True), nullable=False, index=True)
+    )
@@ -0,0 +1,178 @@
+import asyncio
+import logging
+import time
+
+from cachetools import TTLCache
+from fastapi import Request
+from sqlalchemy import Select, text
+from sqlalchemy.ext.asyncio import AsyncEngine
+from sqlmodel import Session
+
+from src.auth.utils import decode_token_cached
+from src.errors import EcommerceException
+
+# Zero when the replica has replayed everything it received, so an idle
+# primary doesn't look like replication lag
+POSTGRES_LAG_QUERY = text(
+    "SELECT CASE WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0 "
+    "ELSE COALESCE(EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()), 0) "
+    "END"
+)
+
+
+class ReadRouter:
+    """Decides whether a read may go to the replica
+
+    A background probe tracks replica lag; while the replica is down or
+    further behind than `max_lag` seconds every read falls back to the
+    primary. Clients that wrote recently (keyed by user and by IP) are
+    pinned to the primary for `sticky_seconds` so they read their own
+    writes.
+    """
+
+    def __init__(
+        self,
+        primary: AsyncEngine,
+        replica: AsyncEngine | None = None,
+        max_lag: float = 5.0,
+        sticky_seconds: float = 5.0,
+        check_interval: float = 1.0,
+        max_sticky_keys: int = 100000,
+    ):
+        self.primary = primary
+        self.replica = replica
+        self.max_lag = max_lag
+        self.sticky_seconds = sticky_seconds
+        self.check_interval = check_interval
+        self.healthy = False
+        self.lag: float | None = None
+        self.replica_reads = 0
+        self.primary_reads = 0
+        self._sticky = TTLCache(maxsize=max_sticky_keys, ttl=sticky_seconds)
+        self._task: asyncio.Task | None = None
+
+    @property
+    def enabled(self) -> bool:
+        return self.replica is not None
+
+    def is_sticky(self, keys: list[str]) -> bool:
+        return any(key in self._sticky for key in keys)
+
+    def stick(self, keys: list[str]):
+        if self.sticky_seconds > 0:
+            for key in keys:
+                self._sticky[key] = True
+
+    def mark_down(self, reason):
+        if self.healthy:
+            logging.warning("Read replica unavailable, using primary: %s", reason)
+        self.healthy = False
+
+    async def check(self):
+        try:
+            async with self.replica.connect() as conn:
+                if conn.dialect.name == "postgresql":
+                    lag = (await conn.execute(POSTGRES_LAG_QUERY)).scalar_one()
+                else:
+                    await conn.exec_driver_sql("SELECT 1")
+                    lag = 0.0
+        except Exception as err:
+            self.lag = None
+            self.mark_down(err)
+            return
+
+        self.lag = float(lag)
+        if self.lag > self.max_lag:
+            self.mark_down(f"lag {self.lag:.1f}s")
+        else:
+            self.healthy = True
+
+    async def _check_loop(self):
+        while True:
+            await self.check()
+            await asyncio.sleep(self.check_interval)
+
+    def start(self):
+        if self.enabled:
+            self._task = asyncio.create_task(self._check_loop())
+
+    async def stop(self):
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+
+    def stats(self) -> dict:
+        return {
+            "enabled": self.enabled,
+            "healthy": self.healthy,
+            "lag_s": self.lag,
+            "replica_reads": self.replica_reads,
+            "primary_reads": self.primary_reads,
+            "sticky_clients": len(self._sticky),
+        }
+
+
+def sticky_keys(request: Request) -> list[str]:
+    """Identify the client for read-your-writes: by user when known, and by IP"""
+    keys = [f"ip:{request.client.host}"] if request.client else []
+    scheme, _, token = request.headers.get("authorization", "").partition(" ")
+    if scheme.lower() == "bearer" and token:
+        try:
+            claims = decode_token_cached(token)
+            keys.append(f"user:{claims['user']['user_uid']}")
+        except (EcommerceException, KeyError, TypeError):
+            pass
+    return keys
+
+
+class RoutingSession(Session):
+    """Session that sends plain SELECTs to the replica when allowed
+
+    Request sessions carry `info["request"]` so that a write makes the
+    client sticky. The client's keys are worked out lazily, only when a
+    replica is configured. Only sessions opened with `info["replica_ok"]`
+    (see get_read_session) read from the replica, and even then writes, locking reads and anything issued after the
+    session's first write go to the primary.
+    """
+
+    def read_keys(self) -> list[str]:
+        if "read_keys" not in self.info:
+            self.info["read_keys"] = sticky_keys(self.info["request"])
+        return self.info["read_keys"]
+
+    def get_bind(self, mapper=None, clause=None, **kw):
+        router: ReadRouter | None = self.info.get("read_router")
+        if (
+            router is None
+            or not router.enabled
+            or ("read_keys" not in self.info and "request" not in self.info)
+        ):
+            return super().get_bind(mapper=mapper, clause=clause, **kw)
+
+        is_read = (
+            isinstance(clause, Select)
+            and clause._for_update_arg is None
+            and not self._flushing
+        )
+        if not is_read:
+            if not self.info.get("wrote"):
+                self.info["wrote"] = True
+                router.stick(self.read_keys())
+            return router.primary.sync_engine
+
+        if (
+            self.info.get("replica_ok")
+            and router.healthy
+            and not self.info.get("wrote")
+            and not router.is_sticky(self.read_keys())
+        ):
+            router.replica_reads += 1
+            return router.replica.sync_engine
+
+        router.primary_reads += 1
+        return router.primary.sync_engine
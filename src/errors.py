@@ -1,4 +1,5 @@
 from fastapi import HTTPException, status
+import math
 
 
 class EcommerceException(HTTPException):
@@ -10,13 +11,14 @@ class EcommerceException(HTTPException):
         message: str = "An unexpected error occurred",
         resolution: str = "Contact support",
         error_code: str = "UnknownError",
+        headers: dict[str, str] | None = None,
     ):
         detail = {
             "message": message,
             "resolution": resolution,
             "error_code": error_code,
         }
-        super().__init__(status_code=status_code, detail=detail)
+        super().__init__(status_code=status_code, detail=detail, headers=headers)
 
 
 class InvalidToken(EcommerceException):
@@ -80,15 +82,25 @@ class UserNotFound(EcommerceException):
 
 
 class UserAlreadyExists(EcommerceException):
-    def __init__(self):
+    def __init__(self, field: str = "email"):
         super().__init__(
             status_code=status.HTTP_403_FORBIDDEN,
-            message="User with email already exists",
+            message=f"User with {field} already exists",
             resolution="User already exists, try login",
             error_code="UserAlreadyExists",
         )
 
 
+class InsufficientPermission(EcommerceException):
+    def __init__(self):
+        super().__init__(
+            status_code=status.HTTP_403_FORBIDDEN,
+            message="You do not have enough permissions to perform this action",
+            resolution="Contact an administrator",
+            error_code="InsufficientPermission",
+        )
+
+
 class InvalidCredentials(EcommerceException):
     def __init__(self):
         super().__init__(
@@ -107,3 +119,136 @@ class FailedOauth(EcommerceException):
             resolution="Try again",
             error_code="FailedIDToken",
         )
+
+
+class PasswordHasherBusy(EcommerceException):
+    def __init__(self):
+        super().__init__(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            message="Server is busy processing other requests",
+            resolution="Try again shortly",
+            error_code="PasswordHasherBusy",
+        )
+
+
+class RateLimitExceeded(EcommerceException):
+    def __init__(self, retry_after: float):
+        seconds = max(1, math.ceil(retry_after))
+        super().__init__(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            message="Too many requests",
+            resolution=f"Try again in {seconds} seconds",
+            error_code="RateLimitExceeded",
+            headers={"Retry-After": str(seconds)},
+        )
+
+
+class ProductNotFound(EcommerceException):
+    def __init__(self):
+        super().__init__(
+            status_code=status.HTTP_404_NOT_FOUND,
+            message="Product not found",
+            resolution="Check the product id",
+            error_code="ProductNotFound",
+        )
+
+
+class ProductAlreadyExists(EcommerceException):
+    def __init__(self):
+        super().__init__(
+            status_code=status.HTTP_409_CONFLICT,
+            message="Product with this sku already exists",
+            resolution="Use a different sku",
+            error_code="ProductAlreadyExists",
+        )
+
+
+class InvalidCursor(EcommerceException):
+    def __init__(self):
+        super().__init__(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            message="Pagination cursor is invalid",
+            resolution="Start again from the first page",
+            error_code="InvalidCursor",
+        )
+
+
+class CartQuantityExceeded(EcommerceException):
+    def __init__(self, limit: int):
+        super().__init__(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            message=f"A cart can hold at most {limit} of each product",
+            resolution="Lower the quantity",
+            error_code="CartQuantityExceeded",
+        )
+
+
+class EmptyCart(EcommerceException):
+    def __init__(self):
+        super().__init__(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            message="Cart is empty",
+            resolution="Add items to the cart before checking out",
+            error_code="EmptyCart",
+        )
+
+
+class OutOfStock(EcommerceException):
+    def __init__(self):
+        super().__init__(
+            status_code=status.HTTP_409_CONFLICT,
+            message="Not enough stock for one or more items",
+            resolution="Lower the quantities or remove the items",
+            error_code="OutOfStock",
+        )
+
+
+class OrderNotFound(EcommerceException):
+    def __init__(self):
+        super().__init__(
+            status_code=status.HTTP_404_NOT_FOUND,
+            message="Order not found",
+            resolution="Check the order id",
+            error_code="OrderNotFound",
+        )
+
+
+class OrderNotReserved(EcommerceException):
+    def __init__(self):
+        super().__init__(
+            status_code=status.HTTP_409_CONFLICT,
+            message="Order is no longer awaiting confirmation",
+            resolution="Check out again",
+            error_code="OrderNotReserved",
+        )
+
+
+class InvalidIdempotencyKey(EcommerceException):
+    def __init__(self):
+        super().__init__(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            message="Idempotency-Key must be 1 to 255 characters",
+            resolution="Send a shorter key, such as a UUID",
+            error_code="InvalidIdempotencyKey",
+        )
+
+
+class IdempotencyKeyReused(EcommerceException):
+    def __init__(self):
+        super().__init__(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            message="Idempotency-Key was already used for a different request",
+            resolution="Use a new key for a new request",
+            error_code="IdempotencyKeyReused",
+        )
+
+
+class IdempotencyKeyInProgress(EcommerceException):
+    def __init__(self):
+        super().__init__(
+            status_code=status.HTTP_409_CONFLICT,
+            message="A request with this Idempotency-Key is still being processed",
+            resolution="Retry shortly",
+            error_code="IdempotencyKeyInProgress",
+            headers={"Retry-After": "1"},
+        )
@@ -0,0 +1,53 @@
+from fastapi import APIRouter, Depends, Request
+from fastapi.responses import PlainTextResponse
+from src.db.main import get_pool_stats
+from src.auth.dependencies import RoleChecker
+from src.auth.utils import password_hasher, token_cache, user_cache
+from src.mail import smtp_transport
+from src.metrics import request_metrics
+from src.ratelimit import rate_limiter
+from src.middleware import access_handler, idempotency_store
+
+# Pool, cache and worker internals are for operators only
+internal_router = APIRouter(
+    include_in_schema=False, dependencies=[Depends(RoleChecker(["admin"]))]
+)
+metrics_router = APIRouter(include_in_schema=False)
+
+
+@metrics_router.get("/metrics")
+async def metrics():
+    return PlainTextResponse(
+        request_metrics.render(), media_type="text/plain; version=0.0.4"
+    )
+
+
+@internal_router.get("/stats")
+async def stats(request: Request):
+    state = request.app.state
+    workers = {
+        name: getattr(state, name).stats()
+        for name in (
+            "outbox_worker",
+            "token_sweeper",
+            "cart_service",
+            "reservation_expirer",
+            "order_service",
+            "startup",
+        )
+        if hasattr(state, name)
+    }
+    return {
+        **workers,
+        "db": get_pool_stats(),
+        "token_cache": token_cache.stats(),
+        "user_cache": user_cache.stats(),
+        "mail": smtp_transport.stats(),
+        "access_log": {"dropped": access_handler.dropped},
+        "rate_limiter": {"rejected": rate_limiter.rejected},
+        "idempotency": idempotency_store.stats(),
+        "password_hasher": {
+            "workers": password_hasher.max_workers,
+            "pending": password_hasher.pending,
+        },
+    }
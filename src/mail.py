@@ -1,5 +1,16 @@
+import asyncio
+import logging
+import time
+from datetime import datetime, timedelta, timezone
+from email.message import EmailMessage
+from email.utils import formataddr
+
+import aiosmtplib
 from fastapi_mail import ConnectionConfig
+from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
 from src.config import settings
+from src.db.models import EmailOutbox
 
 
 mail_config = ConnectionConfig(
@@ -21,3 +32,267 @@ mail_config = ConnectionConfig(
 #         recipients=recipients, subject=subject, body=body, subtype=MessageType.html
 #     )
 #     return message
+
+
+class _PooledConnection:
+    def __init__(self, smtp: aiosmtplib.SMTP):
+        self.smtp = smtp
+        self.last_used = time.monotonic()
+        self.messages = 0
+
+
+class SMTPTransport:
+    """Keeps a small pool of authenticated SMTP connections open between sends
+
+    Each connection carries many messages one after another instead of paying
+    for a new TCP + STARTTLS + AUTH handshake per email. Connections idle for
+    longer than `idle_timeout` are probed with NOOP before reuse, and a
+    connection the server has dropped is replaced transparently.
+    """
+
+    def __init__(
+        self,
+        config: ConnectionConfig = mail_config,
+        size: int = 2,
+        idle_timeout: float = 30.0,
+        from_name: str | None = None,
+    ):
+        self.config = config
+        self.size = size
+        self.idle_timeout = idle_timeout
+        self.from_name = from_name
+        self.sent = 0
+        self.reused = 0
+        self.connections_opened = 0
+        self._idle: list[_PooledConnection] = []
+        self._slots: asyncio.Semaphore | None = None
+        self._started: float | None = None
+
+    def build_message(
+        self, recipients: list[str], subject: str, body: str, subtype: str = "html"
+    ) -> EmailMessage:
+        message = EmailMessage()
+        message["From"] = formataddr((self.from_name or "", self.config.MAIL_FROM))
+        message["To"] = ", ".join(recipients)
+        message["Subject"] = subject
+        message.set_content(body, subtype=subtype)
+        return message
+
+    async def _connect(self) -> _PooledConnection:
+        credentials = {}
+        if self.config.USE_CREDENTIALS:
+            credentials = {
+                "username": self.config.MAIL_USERNAME,
+                "password": self.config.MAIL_PASSWORD.get_secret_value(),
+            }
+
+        smtp = aiosmtplib.SMTP(
+            hostname=self.config.MAIL_SERVER,
+            port=self.config.MAIL_PORT,
+            timeout=self.config.TIMEOUT,
+            use_tls=self.config.MAIL_SSL_TLS,
+            start_tls=self.config.MAIL_STARTTLS,
+            validate_certs=self.config.VALIDATE_CERTS,
+            local_hostname=self.config.LOCAL_HOSTNAME,
+            **credentials,
+        )
+        await smtp.connect()
+        self.connections_opened += 1
+        return _PooledConnection(smtp)
+
+    async def _is_usable(self, conn: _PooledConnection) -> bool:
+        if not conn.smtp.is_connected:
+            return False
+        if time.monotonic() - conn.last_used < self.idle_timeout:
+            return True
+        try:
+            await conn.smtp.noop()
+            return True
+        except aiosmtplib.SMTPException:
+            return False
+
+    async def _acquire(self) -> _PooledConnection:
+        while self._idle:
+            conn = self._idle.pop()
+            if await self._is_usable(conn):
+                return conn
+            conn.smtp.close()
+        return await self._connect()
+
+    def _release(self, conn: _PooledConnection):
+        conn.last_used = time.monotonic()
+        self._idle.append(conn)
+
+    async def send(self, message: EmailMessage):
+        if self._slots is None:
+            self._slots = asyncio.Semaphore(self.size)
+        if self._started is None:
+            self._started = time.monotonic()
+
+        async with self._slots:
+            for attempt in range(2):
+                conn = await self._acquire() if attempt == 0 else await self._connect()
+                try:
+                    await conn.smtp.send_message(message)
+                    break
+                except aiosmtplib.SMTPServerDisconnected:
+                    # The server dropped an idle connection between our check
+                    # and the send, so retry once on a fresh one.
+                    conn.smtp.close()
+                    if attempt:
+                        raise
+                except Exception:
+                    conn.smtp.close()
+                    raise
+
+            if conn.messages:
+                self.reused += 1
+            conn.messages += 1
+            self.sent += 1
+            self._release(conn)
+
+    async def send_email(
+        self, recipients: list[str], subject: str, body: str, subtype: str = "html"
+    ):
+        await self.send(self.build_message(recipients, subject, body, subtype))
+
+    async def close(self):
+        while self._idle:
+            conn = self._idle.pop()
+            try:
+                await conn.smtp.quit()
+            except aiosmtplib.SMTPException:
+                conn.smtp.close()
+        self._slots = None
+
+    def stats(self) -> dict:
+        elapsed = time.monotonic() - self._started if self._started else 0
+        return {
+            "sent": self.sent,
+            "connections_opened": self.connections_opened,
+            "reused": self.reused,
+            "idle_connections": len(self._idle),
+            "messages_per_sec": round(self.sent / elapsed, 2) if elapsed else 0.0,
+        }
+
+
+smtp_transport = SMTPTransport(
+    mail_config,
+    size=settings.MAIL_POOL_SIZE,
+    idle_timeout=settings.MAIL_IDLE_TIMEOUT,
+    from_name=settings.MAIL_FROM_NAME,
+)
+
+
+def queue_email(
+    session: AsyncSession, recipients: list[str], subject: str, body: str
+) -> EmailOutbox:
+    """Add an email to the outbox as part of the caller's transaction
+
+    Nothing is sent until the caller commits and the OutboxWorker picks the
+    row up, so the email only goes out if the surrounding write succeeds.
+    """
+    email = EmailOutbox(recipients=recipients, subject=subject, body=body)
+    session.add(email)
+    return email
+
+
+class OutboxWorker:
+    """Drains pending EmailOutbox rows in batches, retrying with backoff"""
+
+    def __init__(
+        self,
+        session_factory,
+        transport: SMTPTransport = smtp_transport,
+        batch_size: int = 50,
+        poll_interval: float = 1.0,
+        max_attempts: int = 5,
+        backoff_base: float = 2.0,
+    ):
+        self.session_factory = session_factory
+        self.transport = transport
+        self.batch_size = batch_size
+        self.poll_interval = poll_interval
+        self.max_attempts = max_attempts
+        self.backoff_base = backoff_base
+        self.sent = 0
+        self.failed = 0
+        self._task: asyncio.Task | None = None
+        self._stopping = asyncio.Event()
+
+    async def send(self, email: EmailOutbox):
+        await self.transport.send_email(
+            email.recipients, email.subject, email.body, email.subtype
+        )
+
+    async def _deliver(self, email: EmailOutbox, now: datetime):
+        try:
+            await self.send(email)
+        except Exception as err:
+            email.attempts += 1
+            email.last_error = str(err)[:1000]
+            if email.attempts >= self.max_attempts:
+                email.status = "failed"
+                self.failed += 1
+                logging.error("Giving up on email %s: %s", email.id, err)
+            else:
+                delay = self.backoff_base**email.attempts
+                email.next_attempt_at = now + timedelta(seconds=delay)
+                logging.warning("Email %s failed, retrying: %s", email.id, err)
+        else:
+            email.status = "sent"
+            email.sent_at = datetime.now(timezone.utc)
+            self.sent += 1
+
+    async def run_once(self) -> int:
+        """Send one batch of due emails, returning how many were picked up"""
+        async with self.session_factory() as session:
+            now = datetime.now(timezone.utc)
+            statement = (
+                select(EmailOutbox)
+                .where(
+                    EmailOutbox.status == "pending",
+                    EmailOutbox.next_attempt_at <= now,
+                )
+                .order_by(EmailOutbox.next_attempt_at)
+                .limit(self.batch_size)
+                .with_for_update(skip_locked=True)
+            )
+            result = await session.exec(statement)
+            batch = result.all()
+
+            await asyncio.gather(*(self._deliver(email, now) for email in batch))
+            session.add_all(batch)
+
+            await session.commit()
+            return len(batch)
+
+    async def run(self):
+        while not self._stopping.is_set():
+            try:
+                picked_up = await self.run_once()
+            except Exception:
+                logging.exception("Email outbox worker failed to drain batch")
+                picked_up = 0
+
+            if picked_up < self.batch_size:
+                try:
+                    await asyncio.wait_for(
+                        self._stopping.wait(), timeout=self.poll_interval
+                    )
+                except asyncio.TimeoutError:
+                    pass
+
+    def start(self):
+        self._stopping = asyncio.Event()
+        self._task = asyncio.create_task(self.run())
+
+    async def stop(self):
+        if self._task is None:
+            return
+        self._stopping.set()
+        await self._task
+        self._task = None
+
+    def stats(self) -> dict:
+        return {"sent": self.sent, "failed": self.failed}
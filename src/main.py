@@ -1,16 +1,94 @@
+from src.startup import StartupTimer
+
+# Started before the imports below so the breakdown includes import time
+startup_timer = StartupTimer()
+
 from fastapi import FastAPI
+from fastapi.responses import ORJSONResponse
 from contextlib import asynccontextmanager
-from src.db.main import init_db
-from src.auth.routes import auth_router
-from .middleware import register_middleware
+from src.db.main import init_db, prewarm_pool, async_session, read_router
+from src.config import settings
+from src.mail import OutboxWorker, smtp_transport
+from src.auth.routes import auth_router, jwks_router, oauth_service
+from src.auth.utils import password_hasher
+from src.catalog.routes import catalog_router
+from src.cart.routes import cart_router, cart_service
+from src.orders.expiry import ReservationExpirer
+from src.orders.routes import orders_router, order_service
+from src.auth.sweeper import TokenSweeper, TokenPartitionManager
+from src.internal.routes import internal_router, metrics_router
+from .middleware import register_middleware, access_listener
+
+startup_timer.mark("imports")
 
 
 @asynccontextmanager
 async def life_span(app: FastAPI):
+    access_listener.start()
     print("server is starting....")
-    await init_db()
+    with startup_timer.phase("schema"):
+        await init_db(settings.DB_STARTUP_SCHEMA)
+    with startup_timer.phase("pool_prewarm"):
+        await prewarm_pool(settings.DB_POOL_PREWARM)
+        if read_router.enabled:
+            await prewarm_pool(settings.DB_POOL_PREWARM, bind=read_router.replica)
+            await read_router.check()
+    read_router.start()
+
+    outbox_worker = OutboxWorker(
+        async_session,
+        batch_size=settings.MAIL_OUTBOX_BATCH_SIZE,
+        poll_interval=settings.MAIL_OUTBOX_POLL_INTERVAL,
+        max_attempts=settings.MAIL_OUTBOX_MAX_ATTEMPTS,
+    )
+    if settings.MAIL_OUTBOX_ENABLED:
+        outbox_worker.start()
+    app.state.outbox_worker = outbox_worker
+
+    token_sweeper = TokenSweeper(
+        async_session,
+        interval=settings.TOKEN_SWEEP_INTERVAL,
+        batch_size=settings.TOKEN_SWEEP_BATCH_SIZE,
+        batch_pause=settings.TOKEN_SWEEP_BATCH_PAUSE,
+        partitions=(
+            TokenPartitionManager(months_ahead=settings.TOKEN_PARTITION_MONTHS_AHEAD)
+            if settings.TOKEN_PARTITIONING
+            else None
+        ),
+    )
+    if settings.TOKEN_SWEEPER_ENABLED:
+        token_sweeper.start()
+    app.state.token_sweeper = token_sweeper
+
+    cart_service.start()
+    app.state.cart_service = cart_service
+
+    reservation_expirer = ReservationExpirer(
+        async_session,
+        interval=settings.ORDER_EXPIRY_INTERVAL,
+        batch_size=settings.ORDER_EXPIRY_BATCH_SIZE,
+    )
+    if settings.ORDER_EXPIRY_ENABLED:
+        reservation_expirer.start()
+    app.state.reservation_expirer = reservation_expirer
+    app.state.order_service = order_service
+
+    await oauth_service.startup()
+    startup_timer.mark("workers")
+    app.state.startup = startup_timer
+    print(startup_timer.summary())
+
     yield
+    await oauth_service.shutdown()
+    await reservation_expirer.stop()
+    await cart_service.stop()
+    await read_router.stop()
+    await token_sweeper.stop()
+    await outbox_worker.stop()
+    await smtp_transport.close()
+    password_hasher.shutdown()
     print("server has been stopped")
+    access_listener.stop()
 
 
 version = "v1"
@@ -22,11 +100,19 @@ app = FastAPI(
     version=version,
     contact={"email": "cipherangelmadara@gmail.com"},
     openapi_url=f"{version_prefix}/openapi.json",
+    lifespan=life_span,
+    default_response_class=ORJSONResponse,
 )
 
 register_middleware(app)
 
 app.include_router(auth_router, prefix=f"{version_prefix}/auth", tags=["auth"])
+app.include_router(catalog_router, prefix=f"{version_prefix}/catalog", tags=["catalog"])
+app.include_router(cart_router, prefix=f"{version_prefix}/cart", tags=["cart"])
+app.include_router(orders_router, prefix=f"{version_prefix}/orders", tags=["orders"])
+app.include_router(internal_router, prefix=f"{version_prefix}/internal")
+app.include_router(metrics_router)
+app.include_router(jwks_router)
 
 
 @app.get("/")
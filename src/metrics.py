@@ -0,0 +1,76 @@
+import threading
+from bisect import bisect_left
+from collections import defaultdict
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _labels(**labels) -> str:
+    return ",".join(f'{key}="{_escape(str(value))}"' for key, value in labels.items())
+
+
+class RequestMetrics:
+    """Per-route latency histograms and status counters in Prometheus text format
+
+    Routes are labelled by their template (`/users/{uid}`), never by the raw
+    path, so label cardinality stays bounded.
+    """
+
+    def __init__(self, buckets: tuple[float, ...] = DEFAULT_BUCKETS):
+        self.buckets = buckets
+        self._lock = threading.Lock()
+        self._histograms = defaultdict(lambda: [0] * (len(buckets) + 1))
+        self._sums = defaultdict(float)
+        self._statuses = defaultdict(int)
+
+    def observe(self, method: str, route: str, status: int, seconds: float):
+        key = (method, route)
+        with self._lock:
+            self._histograms[key][bisect_left(self.buckets, seconds)] += 1
+            self._sums[key] += seconds
+            self._statuses[(method, route, status)] += 1
+
+    def render(self) -> str:
+        lines = [
+            "# HELP http_request_duration_seconds Request latency by route template",
+            "# TYPE http_request_duration_seconds histogram",
+        ]
+        with self._lock:
+            histograms = {key: list(counts) for key, counts in self._histograms.items()}
+            sums = dict(self._sums)
+            statuses = dict(self._statuses)
+
+        for (method, route), counts in sorted(histograms.items()):
+            cumulative = 0
+            for bound, count in zip(self.buckets, counts):
+                cumulative += count
+                labels = _labels(method=method, route=route, le=bound)
+                lines.append(
+                    f"http_request_duration_seconds_bucket{{{labels}}} {cumulative}"
+                )
+            cumulative += counts[-1]
+            labels = _labels(method=method, route=route)
+            lines.append(
+                f'http_request_duration_seconds_bucket{{{labels},le="+Inf"}} {cumulative}'
+            )
+            lines.append(
+                f"http_request_duration_seconds_sum{{{labels}}} {sums[(method, route)]}"
+            )
+            lines.append(
+                f"http_request_duration_seconds_count{{{labels}}} {cumulative}"
+            )
+
+        lines.append("# HELP http_requests_total Requests by route template and status")
+        lines.append("# TYPE http_requests_total counter")
+        for (method, route, status), count in sorted(statuses.items()):
+            labels = _labels(method=method, route=route, status=status)
+            lines.append(f"http_requests_total{{{labels}}} {count}")
+
+        return "\n".join(lines) + "\n"
+
+
+request_metrics = RequestMetrics()
@@ -1,23 +1,523 @@
 from fastapi import FastAPI
 from fastapi.requests import Request
+from fastapi.responses import JSONResponse
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.middleware.trustedhost import TrustedHostMiddleware
+from logging.handlers import QueueHandler, QueueListener
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from datetime import timedelta
+from sqlalchemy import delete, insert, update
+from sqlalchemy.exc import IntegrityError
+from sqlmodel import select
+from starlette.datastructures import Headers
+from src.auth.utils import decode_token_cached
+from src.config import settings
+from src.db.main import async_session
+from src.db.models import IdempotencyRecord, utc_now
+from src.errors import (
+    EcommerceException,
+    IdempotencyKeyInProgress,
+    IdempotencyKeyReused,
+    InvalidIdempotencyKey,
+)
+from src.metrics import request_metrics
+import asyncio
+import hashlib
+import json
 import logging
+import queue
+import sys
 import time
 
 logger = logging.getLogger("uvicorn.access")
 logger.disabled = True
 
 
+class DroppingQueueHandler(QueueHandler):
+    """QueueHandler that drops records instead of blocking when the queue is full"""
+
+    def __init__(self, log_queue: queue.Queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def enqueue(self, record: logging.LogRecord):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # Formatting happens on the listener thread, not the event loop
+        return record
+
+
+class JSONFormatter(logging.Formatter):
+    def format(self, record: logging.LogRecord) -> str:
+        return json.dumps(
+            {
+                "ts": round(record.created, 6),
+                "level": record.levelname,
+                "msg": record.getMessage(),
+                **getattr(record, "fields", {}),
+            }
+        )
+
+
+access_queue = queue.Queue(maxsize=10000)
+access_handler = DroppingQueueHandler(access_queue)
+access_logger = logging.getLogger("ecommerce.access")
+access_logger.addHandler(access_handler)
+access_logger.setLevel(logging.INFO)
+access_logger.propagate = False
+
+stdout_handler = logging.StreamHandler(sys.stdout)
+stdout_handler.setFormatter(JSONFormatter())
+access_listener = QueueListener(access_queue, stdout_handler)
+
+
+@dataclass
+class StoredResponse:
+    fingerprint: str
+    # None while the first request is still running
+    status_code: int | None = None
+    headers: list[tuple[str, str]] = field(default_factory=list)
+    body: bytes = b""
+
+
+class IdempotencyStore:
+    """Storage for first responses; subclasses decide where they live"""
+
+    replayed = 0
+    waited = 0
+
+    async def claim(
+        self, key: str, fingerprint: str, lease: float
+    ) -> StoredResponse | None:
+        """Claim `key` for a new request, or return what's stored for it
+
+        The claim only lasts `lease` seconds, so a request whose worker died
+        before completing it doesn't block its retries for the full TTL;
+        once the lease is up the key can be claimed again.
+        """
+        raise NotImplementedError("Override this method in a subclass.")
+
+    async def get(self, key: str) -> StoredResponse | None:
+        raise NotImplementedError("Override this method in a subclass.")
+
+    async def complete(self, key: str, response: StoredResponse, ttl: int):
+        raise NotImplementedError("Override this method in a subclass.")
+
+    async def release(self, key: str):
+        """Drop an unfinished claim so the request can be run again"""
+        raise NotImplementedError("Override this method in a subclass.")
+
+    async def reset(self):
+        raise NotImplementedError("Override this method in a subclass.")
+
+    def stats(self) -> dict:
+        return {"replayed": self.replayed, "waited": self.waited}
+
+
+class MemoryIdempotencyStore(IdempotencyStore):
+    """Per-process LRU bounded by `maxsize`; expired entries are dropped on read"""
+
+    def __init__(self, maxsize: int = 10000):
+        self.maxsize = maxsize
+        self._entries: OrderedDict[str, tuple[StoredResponse, float]] = OrderedDict()
+
+    async def get(self, key: str) -> StoredResponse | None:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        if entry[1] <= time.monotonic():
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return entry[0]
+
+    async def claim(
+        self, key: str, fingerprint: str, lease: float
+    ) -> StoredResponse | None:
+        existing = await self.get(key)
+        if existing is not None:
+            return existing
+        self._entries[key] = (StoredResponse(fingerprint), time.monotonic() + lease)
+        if len(self._entries) > self.maxsize:
+            self._evict()
+        return None
+
+    def _evict(self):
+        """Drop the least recently used finished entry
+
+        Claims still within their lease are skipped, since evicting one would
+        let a duplicate run alongside the original. If every entry is in
+        flight the store grows past `maxsize` until they complete.
+        """
+        now = time.monotonic()
+        for key, (response, deadline) in self._entries.items():
+            if response.status_code is not None or deadline <= now:
+                del self._entries[key]
+                return
+
+    async def complete(self, key: str, response: StoredResponse, ttl: int):
+        self._entries[key] = (response, time.monotonic() + ttl)
+
+    async def release(self, key: str):
+        entry = self._entries.get(key)
+        if entry is not None and entry[0].status_code is None:
+            del self._entries[key]
+
+    async def reset(self):
+        self._entries.clear()
+
+
+class DatabaseIdempotencyStore(IdempotencyStore):
+    """Store shared by every app instance through the `idempotency_keys` table
+
+    A claim is an INSERT, so the primary key decides which instance runs a
+    request. Expired rows are purged every `purge_every` claims.
+    """
+
+    def __init__(self, session_factory, purge_every: int = 100):
+        self.session_factory = session_factory
+        self.purge_every = purge_every
+        self._claims = 0
+
+    async def get(self, key: str) -> StoredResponse | None:
+        async with self.session_factory() as session:
+            result = await session.exec(
+                select(IdempotencyRecord).where(
+                    IdempotencyRecord.key == key,
+                    IdempotencyRecord.expires_at > utc_now(),
+                )
+            )
+            record = result.first()
+        if record is None:
+            return None
+        return StoredResponse(
+            record.fingerprint,
+            record.status_code,
+            [tuple(header) for header in record.headers],
+            record.body,
+        )
+
+    async def claim(
+        self, key: str, fingerprint: str, lease: float
+    ) -> StoredResponse | None:
+        now = utc_now()
+        self._claims += 1
+        async with self.session_factory() as session:
+            conn = await session.connection()
+            # Covers both stored responses past their TTL and unfinished
+            # claims past their lease
+            expired = IdempotencyRecord.expires_at <= now
+            if self._claims % self.purge_every == 0:
+                await conn.execute(delete(IdempotencyRecord).where(expired))
+            else:
+                await conn.execute(
+                    delete(IdempotencyRecord).where(
+                        IdempotencyRecord.key == key, expired
+                    )
+                )
+            try:
+                await conn.execute(
+                    insert(IdempotencyRecord),
+                    [
+                        {
+                            "key": key,
+                            "fingerprint": fingerprint,
+                            "headers": [],
+                            "body": b"",
+                            "expires_at": now + timedelta(seconds=lease),
+                        }
+                    ],
+                )
+                await session.commit()
+                return None
+            except IntegrityError:
+                await session.rollback()
+        return await self.get(key)
+
+    async def complete(self, key: str, response: StoredResponse, ttl: int):
+        async with self.session_factory() as session:
+            conn = await session.connection()
+            await conn.execute(
+                update(IdempotencyRecord)
+                .where(IdempotencyRecord.key == key)
+                .values(
+                    status_code=response.status_code,
+                    headers=[list(header) for header in response.headers],
+                    body=response.body,
+                    expires_at=utc_now() + timedelta(seconds=ttl),
+                )
+            )
+            await session.commit()
+
+    async def release(self, key: str):
+        async with self.session_factory() as session:
+            conn = await session.connection()
+            await conn.execute(
+                delete(IdempotencyRecord).where(
+                    IdempotencyRecord.key == key,
+                    IdempotencyRecord.status_code.is_(None),
+                )
+            )
+            await session.commit()
+
+    async def reset(self):
+        async with self.session_factory() as session:
+            conn = await session.connection()
+            await conn.execute(delete(IdempotencyRecord))
+            await session.commit()
+
+
+def digest(*parts: str | bytes) -> str:
+    hasher = hashlib.sha256()
+    for part in parts:
+        hasher.update(part.encode() if isinstance(part, str) else part)
+        hasher.update(b"\0")
+    return hasher.hexdigest()
+
+
+def principal(headers: Headers, host: str) -> str:
+    """Who a request is from, so a key survives the client refreshing its token
+
+    Anonymous requests are scoped to the client's IP, so one caller can't
+    replay another's response by guessing its key. Falls back to the raw
+    header for a token that doesn't verify; such a request is rejected by
+    the route anyway.
+    """
+    scheme, _, token = headers.get("authorization", "").partition(" ")
+    if scheme.lower() != "bearer" or not token:
+        return f"anon:{host}"
+    try:
+        return f"user:{decode_token_cached(token)['user']['user_uid']}"
+    except EcommerceException:
+        return f"token:{digest(token)}"
+
+
+class IdempotencyMiddleware:
+    """Replays the first response to a retried request with the same Idempotency-Key
+
+    Covers POST, PUT, PATCH and DELETE requests that send the header. Keys
+    are scoped to the method, path and authenticated user (or client IP for
+    anonymous requests), and reusing one with a different body is rejected.
+    A duplicate that arrives while the first request is still running waits
+    for its response instead of running twice. 5xx and 429 responses aren't
+    stored, so those retries run for real, and neither are
+    `Cache-Control: no-store` ones, which is how responses carrying
+    credentials (login) stay out of the store. Claims last `lock_timeout`
+    seconds until the response is stored, so a retry can take over from a
+    request whose worker died.
+    """
+
+    methods = {"POST", "PUT", "PATCH", "DELETE"}
+
+    def __init__(
+        self,
+        app,
+        store: IdempotencyStore,
+        ttl: int = 86400,
+        lock_timeout: float = 30.0,
+        wait_timeout: float = 10.0,
+        poll_interval: float = 0.05,
+        enabled: bool = True,
+    ):
+        self.app = app
+        self.store = store
+        self.ttl = ttl
+        self.lock_timeout = lock_timeout
+        self.wait_timeout = wait_timeout
+        self.poll_interval = poll_interval
+        self.enabled = enabled
+        # Same-process duplicates wait on these rather than polling the store
+        self._inflight: dict[str, asyncio.Event] = {}
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["method"] not in self.methods:
+            return await self.app(scope, receive, send)
+        headers = Headers(scope=scope)
+        client_key = headers.get("idempotency-key")
+        if client_key is None or not self.enabled:
+            return await self.app(scope, receive, send)
+
+        try:
+            if not 0 < len(client_key) <= 255:
+                raise InvalidIdempotencyKey()
+            body = await read_body(receive)
+            host = scope["client"][0] if scope.get("client") else "unknown"
+            key = digest(
+                scope["method"],
+                scope["path"],
+                principal(headers, host),
+                client_key,
+            )
+            fingerprint = digest(scope["query_string"], body)
+            stored = await self._claim(key, fingerprint)
+            if stored is not None and stored.fingerprint != fingerprint:
+                raise IdempotencyKeyReused()
+        except EcommerceException as exc:
+            response = JSONResponse(
+                {"detail": exc.detail}, status_code=exc.status_code, headers=exc.headers
+            )
+            return await response(scope, receive, send)
+
+        if stored is not None:
+            self.store.replayed += 1
+            await send(
+                {
+                    "type": "http.response.start",
+                    "status": stored.status_code,
+                    "headers": [
+                        (name.encode("latin-1"), value.encode("latin-1"))
+                        for name, value in stored.headers
+                    ]
+                    + [(b"idempotent-replayed", b"true")],
+                }
+            )
+            await send({"type": "http.response.body", "body": stored.body})
+            return
+
+        await self._run(key, fingerprint, body, scope, receive, send)
+
+    async def _claim(self, key: str, fingerprint: str) -> StoredResponse | None:
+        """Claim `key`, waiting out another request that holds it"""
+        deadline = time.monotonic() + self.wait_timeout
+        waited = False
+        while True:
+            stored = await self.store.claim(key, fingerprint, self.lock_timeout)
+            if (
+                stored is None
+                or stored.status_code is not None
+                or stored.fingerprint != fingerprint
+            ):
+                return stored
+
+            if not waited:
+                waited = True
+                self.store.waited += 1
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                raise IdempotencyKeyInProgress()
+            event = self._inflight.get(key)
+            if event is None:
+                # Held by another instance; only the store can tell when it's done
+                await asyncio.sleep(min(self.poll_interval, remaining))
+                continue
+            try:
+                await asyncio.wait_for(event.wait(), timeout=remaining)
+            except asyncio.TimeoutError:
+                pass
+
+    async def _run(self, key: str, fingerprint: str, body: bytes, scope, receive, send):
+        event = self._inflight[key] = asyncio.Event()
+        start, chunks = {}, []
+
+        async def capture(message):
+            if message["type"] == "http.response.start":
+                start.update(message)
+            elif message["type"] == "http.response.body":
+                chunks.append(message.get("body", b""))
+            await send(message)
+
+        try:
+            await self.app(scope, replay_body(body, receive), capture)
+            status = start.get("status", 500)
+            response_headers = [
+                (name.decode("latin-1"), value.decode("latin-1"))
+                for name, value in start.get("headers", [])
+            ]
+            no_store = any(
+                name.lower() == "cache-control" and "no-store" in value.lower()
+                for name, value in response_headers
+            )
+            if status >= 500 or status == 429 or no_store:
+                await self.store.release(key)
+            else:
+                response = StoredResponse(
+                    fingerprint, status, response_headers, b"".join(chunks)
+                )
+                await self.store.complete(key, response, self.ttl)
+        except BaseException:
+            await self.store.release(key)
+            raise
+        finally:
+            self._inflight.pop(key, None)
+            event.set()
+
+
+async def read_body(receive) -> bytes:
+    chunks = []
+    while True:
+        message = await receive()
+        if message["type"] != "http.request":
+            break
+        chunks.append(message.get("body", b""))
+        if not message.get("more_body", False):
+            break
+    return b"".join(chunks)
+
+
+def replay_body(body: bytes, receive):
+    """`receive` for the app, handing it the body that was already read"""
+    sent = False
+
+    async def wrapped():
+        nonlocal sent
+        if not sent:
+            sent = True
+            return {"type": "http.request", "body": body, "more_body": False}
+        return await receive()
+
+    return wrapped
+
+
+idempotency_store = (
+    DatabaseIdempotencyStore(async_session)
+    if settings.IDEMPOTENCY_STORE == "database"
+    else MemoryIdempotencyStore(maxsize=settings.IDEMPOTENCY_STORE_SIZE)
+)
+
+
 def register_middleware(app: FastAPI):
+    # Added first so it sits innermost: replays still go through the access
+    # log, metrics, CORS and host checks
+    app.add_middleware(
+        IdempotencyMiddleware,
+        store=idempotency_store,
+        ttl=settings.IDEMPOTENCY_TTL,
+        lock_timeout=settings.IDEMPOTENCY_LOCK_TIMEOUT,
+        wait_timeout=settings.IDEMPOTENCY_WAIT_TIMEOUT,
+        enabled=settings.IDEMPOTENCY_ENABLED,
+    )
+
     @app.middleware("http")
     async def custom_logging(request: Request, call_next):
-        start_time = time.time()
+        start_time = time.perf_counter_ns()
         response = await call_next(request)
-        processing_time = time.time() - start_time
+        processing_time = (time.perf_counter_ns() - start_time) / 1e9
+
+        route = request.scope.get("route")
+        route_path = route.path if route is not None else "<unmatched>"
+        request_metrics.observe(
+            request.method, route_path, response.status_code, processing_time
+        )
 
-        message = f"{request.client.host}:{request.client.port} - {request.method} - {request.url.path} - {response.status_code} completed after {processing_time}s"
-        print(message)
+        client = request.client
+        access_logger.info(
+            "request completed",
+            extra={
+                "fields": {
+                    "client": f"{client.host}:{client.port}" if client else None,
+                    "method": request.method,
+                    "path": request.url.path,
+                    "route": route_path,
+                    "status": response.status_code,
+                    "duration_ms": round(processing_time * 1000, 3),
+                }
+            },
+        )
         return response
 
     app.add_middleware(
@@ -0,0 +1,79 @@
+import asyncio
+import logging
+from datetime import datetime, timezone
+
+from sqlalchemy import update
+from sqlmodel import select
+
+from src.db.models import Order
+from .service import release_orders
+
+
+class ReservationExpirer:
+    """Expires reserved orders past `expires_at` and returns their stock
+
+    Batches are claimed with FOR UPDATE SKIP LOCKED, so several app
+    instances can run this side by side, and an order being confirmed or
+    cancelled right now is skipped instead of waited on.
+    """
+
+    def __init__(self, session_factory, interval: float = 5.0, batch_size: int = 100):
+        self.session_factory = session_factory
+        self.interval = interval
+        self.batch_size = batch_size
+        self.expired = 0
+        self._task: asyncio.Task | None = None
+        self._stopping = asyncio.Event()
+
+    async def run_once(self) -> int:
+        """Expire one batch, returning how many orders it held"""
+        async with self.session_factory() as session:
+            now = datetime.now(timezone.utc)
+            result = await session.exec(
+                select(Order.id)
+                .where(Order.status == "reserved", Order.expires_at <= now)
+                .order_by(Order.expires_at)
+                .limit(self.batch_size)
+                .with_for_update(skip_locked=True)
+            )
+            order_ids = result.all()
+            if not order_ids:
+                return 0
+
+            conn = await session.connection()
+            await conn.execute(
+                update(Order).where(Order.id.in_(order_ids)).values(status="expired")
+            )
+            await release_orders(conn, order_ids)
+            await session.commit()
+
+            self.expired += len(order_ids)
+            return len(order_ids)
+
+    async def run(self):
+        while not self._stopping.is_set():
+            try:
+                expired = await self.run_once()
+            except Exception:
+                logging.exception("Reservation expiry batch failed")
+                expired = 0
+
+            if expired < self.batch_size:
+                try:
+                    await asyncio.wait_for(self._stopping.wait(), timeout=self.interval)
+                except asyncio.TimeoutError:
+                    pass
+
+    def start(self):
+        self._stopping = asyncio.Event()
+        self._task = asyncio.create_task(self.run())
+
+    async def stop(self):
+        if self._task is None:
+            return
+        self._stopping.set()
+        await self._task
+        self._task = None
+
+    def stats(self) -> dict:
+        return {"expired": self.expired}
@@ -0,0 +1,95 @@
+import uuid
+
+from fastapi import APIRouter, Depends, status
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from src.auth.dependencies import RoleChecker, get_current_user
+from src.cart.routes import cart_service
+from src.config import settings
+from src.db.main import get_session
+from src.errors import EmptyCart
+from .schemas import InventoryModel, OrderModel, ShardsUpdateModel, StockUpdateModel
+from .service import OrderService
+
+orders_router = APIRouter()
+order_service = OrderService(reservation_ttl=settings.ORDER_RESERVATION_TTL)
+admin_role_checker = RoleChecker(["admin"])
+
+
+@orders_router.post(
+    "/checkout", status_code=status.HTTP_201_CREATED, response_model=OrderModel
+)
+async def checkout(
+    user=Depends(get_current_user), session: AsyncSession = Depends(get_session)
+):
+    lines = dict(await cart_service.get_cart(user.uid, session))
+    if not lines:
+        raise EmptyCart()
+
+    order = await order_service.place_order(user.uid, lines, session)
+    await cart_service.clear(user.uid)
+    return order
+
+
+@orders_router.get("/{order_id}", response_model=OrderModel)
+async def get_order(
+    order_id: uuid.UUID,
+    user=Depends(get_current_user),
+    session: AsyncSession = Depends(get_session),
+):
+    return await order_service.get_order(order_id, user.uid, session)
+
+
+@orders_router.post("/{order_id}/confirm", response_model=OrderModel)
+async def confirm_order(
+    order_id: uuid.UUID,
+    user=Depends(get_current_user),
+    session: AsyncSession = Depends(get_session),
+):
+    return await order_service.confirm_order(order_id, user.uid, session)
+
+
+@orders_router.post("/{order_id}/cancel", response_model=OrderModel)
+async def cancel_order(
+    order_id: uuid.UUID,
+    user=Depends(get_current_user),
+    session: AsyncSession = Depends(get_session),
+):
+    return await order_service.cancel_order(order_id, user.uid, session)
+
+
+@orders_router.get(
+    "/inventory/{product_id}",
+    response_model=InventoryModel,
+    dependencies=[Depends(admin_role_checker)],
+)
+async def get_stock(
+    product_id: uuid.UUID, session: AsyncSession = Depends(get_session)
+):
+    return await order_service.get_stock(product_id, session)
+
+
+@orders_router.put(
+    "/inventory/{product_id}",
+    response_model=InventoryModel,
+    dependencies=[Depends(admin_role_checker)],
+)
+async def set_stock(
+    product_id: uuid.UUID,
+    data: StockUpdateModel,
+    session: AsyncSession = Depends(get_session),
+):
+    return await order_service.set_stock(product_id, data.available, session)
+
+
+@orders_router.put(
+    "/inventory/{product_id}/shards",
+    response_model=InventoryModel,
+    dependencies=[Depends(admin_role_checker)],
+)
+async def set_shards(
+    product_id: uuid.UUID,
+    data: ShardsUpdateModel,
+    session: AsyncSession = Depends(get_session),
+):
+    return await order_service.set_shards(product_id, data.shards, session)
@@ -0,0 +1,33 @@
+from pydantic import BaseModel, Field
+from typing import List
+import uuid
+from datetime import datetime
+
+
+class OrderLine(BaseModel):
+    product_id: uuid.UUID
+    quantity: int
+    unit_price_cents: int
+
+
+class OrderModel(BaseModel):
+    id: uuid.UUID
+    status: str
+    total_cents: int
+    expires_at: datetime
+    created_at: datetime
+    items: List[OrderLine]
+
+
+class StockUpdateModel(BaseModel):
+    available: int = Field(ge=0)
+
+
+class ShardsUpdateModel(BaseModel):
+    shards: int = Field(ge=1, le=64)
+
+
+class InventoryModel(BaseModel):
+    product_id: uuid.UUID
+    available: int
+    shards: int
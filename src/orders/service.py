@@ -0,0 +1,441 @@
+import logging
+import random
+import uuid
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy import Integer, Uuid, bindparam, delete, func, insert, literal
+from sqlalchemy import union_all, update
+from sqlalchemy.dialects.postgresql import insert as postgres_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.exc import DBAPIError
+from sqlalchemy.ext.asyncio import AsyncConnection
+from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from src.db.models import Inventory, Order, OrderItem, Product
+from src.errors import OrderNotFound, OrderNotReserved, OutOfStock, ProductNotFound
+
+
+def lines_cte(lines: list[tuple[str, int, int]]):
+    """(product_id, shard, quantity) rows as a CTE, to join one UPDATE against
+
+    Built from SELECTs rather than VALUES because SQLite can't name the
+    columns of a VALUES alias. Sorted so concurrent checkouts touch shared
+    rows in the same order.
+    """
+    rows = [
+        select(
+            literal(uuid.UUID(product_id), Uuid).label("product_id"),
+            literal(shard, Integer).label("shard"),
+            literal(quantity, Integer).label("quantity"),
+        )
+        for product_id, shard, quantity in sorted(lines)
+    ]
+    return (union_all(*rows) if len(rows) > 1 else rows[0]).cte("lines")
+
+
+def reserve_statement(lines: list[tuple[str, int, int]]):
+    """Take stock for every line from its shard in one statement, skipping short lines
+
+    `available >= quantity` is checked by the UPDATE itself, so there's no
+    read-modify-write window; the caller compares the returned rows with
+    the lines and deals with any that were short.
+    """
+    cte = lines_cte(lines)
+    return (
+        update(Inventory)
+        .where(
+            Inventory.product_id == cte.c.product_id,
+            Inventory.shard == cte.c.shard,
+            Inventory.available >= cte.c.quantity,
+        )
+        .values(available=Inventory.available - cte.c.quantity)
+        .returning(Inventory.product_id, Inventory.available)
+    )
+
+
+def release_statement(lines: list[tuple[str, int, int]]):
+    cte = lines_cte(lines)
+    return (
+        update(Inventory)
+        .where(
+            Inventory.product_id == cte.c.product_id,
+            Inventory.shard == cte.c.shard,
+        )
+        .values(available=Inventory.available + cte.c.quantity)
+        .returning(Inventory.product_id)
+    )
+
+
+# Postgres deadlock_detected and serialization_failure: the transaction was
+# rolled back only because of a collision, so running it again is safe
+RETRYABLE_SQLSTATES = {"40P01", "40001"}
+
+
+def is_retryable(err: DBAPIError) -> bool:
+    code = getattr(err.orig, "sqlstate", None) or getattr(err.orig, "pgcode", None)
+    return code in RETRYABLE_SQLSTATES
+
+
+def adjust_statement(product_id: uuid.UUID):
+    """Add `delta` to shard `s` of a product; executed with one row per shard"""
+    return (
+        update(Inventory)
+        .where(Inventory.product_id == product_id, Inventory.shard == bindparam("s"))
+        .values(available=Inventory.available + bindparam("delta"))
+    )
+
+
+def spread(total: int, shards: int) -> list[int]:
+    """`total` split as evenly as possible over `shards` counters"""
+    share, extra = divmod(total, shards)
+    return [share + (shard < extra) for shard in range(shards)]
+
+
+async def shard_counts(conn: AsyncConnection, product_ids) -> dict[str, int]:
+    result = await conn.execute(
+        select(Inventory.product_id, func.count())
+        .where(Inventory.product_id.in_(product_ids))
+        .group_by(Inventory.product_id)
+    )
+    return {str(product_id): count for product_id, count in result}
+
+
+async def release_orders(conn: AsyncConnection, order_ids: list[uuid.UUID]):
+    """Give back the stock held by `order_ids`, one UPDATE for all of them
+
+    Each product's units go back to a random shard; shard 0 always exists,
+    so a line whose shard was dropped by a concurrent resharding is retried
+    there.
+    """
+    result = await conn.execute(
+        select(OrderItem.product_id, func.sum(OrderItem.quantity))
+        .where(OrderItem.order_id.in_(order_ids))
+        .group_by(OrderItem.product_id)
+    )
+    lines = {str(product_id): int(quantity) for product_id, quantity in result}
+    if not lines:
+        return
+
+    counts = await shard_counts(conn, [uuid.UUID(p) for p in lines])
+    rows = [(p, random.randrange(counts.get(p, 1)), q) for p, q in lines.items()]
+    released = await conn.execute(release_statement(rows))
+    missed = set(lines) - {str(product_id) for product_id, in released}
+    retry = [(p, 0, q) for p, shard, q in rows if p in missed and shard]
+    if retry:
+        await conn.execute(release_statement(retry))
+
+
+async def write_shards(conn: AsyncConnection, product_id: uuid.UUID, amounts):
+    """Set each shard's stock from `{shard: available}`, creating missing shards"""
+    insert_ = postgres_insert if conn.dialect.name == "postgresql" else sqlite_insert
+    statement = insert_(Inventory)
+    statement = statement.on_conflict_do_update(
+        index_elements=[Inventory.product_id, Inventory.shard],
+        set_={
+            "available": statement.excluded.available,
+            "updated_at": statement.excluded.updated_at,
+        },
+    )
+    now = datetime.now(timezone.utc)
+    await conn.execute(
+        statement,
+        [
+            {
+                "product_id": product_id,
+                "shard": shard,
+                "available": available,
+                "updated_at": now,
+            }
+            for shard, available in sorted(amounts.items())
+        ],
+    )
+
+
+class OrderService:
+    def __init__(self, reservation_ttl: int = 900, deadlock_retries: int = 2):
+        self.reservation_ttl = reservation_ttl
+        self.deadlock_retries = deadlock_retries
+        self.deadlocks = 0
+        self.slow_path = 0
+        self.rebalanced = 0
+
+    async def place_order(
+        self, user_uid: uuid.UUID, lines: dict[str, int], session: AsyncSession
+    ) -> dict:
+        """Reserve stock for `lines` and record a reserved order, atomically
+
+        The order rows go in first and the stock UPDATE last, so a hot SKU's
+        inventory rows are only locked from that UPDATE to the COMMIT. Each
+        line decrements one random shard of its product; a line whose shard
+        is short falls back to taking from all of the product's shards. A
+        deadlock with another checkout is retried `deadlock_retries` times,
+        then reported as OutOfStock.
+        """
+        shards = (
+            select(func.count())
+            .where(Inventory.product_id == Product.id)
+            .scalar_subquery()
+        )
+        result = await session.exec(
+            select(Product.id, Product.price_cents, shards).where(
+                Product.id.in_([uuid.UUID(product_id) for product_id in lines]),
+                Product.is_active,
+            )
+        )
+        prices, counts = {}, {}
+        for product_id, price, count in result:
+            prices[str(product_id)] = price
+            counts[str(product_id)] = count
+        if len(prices) < len(lines):
+            raise ProductNotFound()
+
+        now = datetime.now(timezone.utc)
+        order = {
+            "id": uuid.uuid4(),
+            "user_uid": user_uid,
+            "status": "reserved",
+            "total_cents": sum(prices[p] * q for p, q in lines.items()),
+            "expires_at": now + timedelta(seconds=self.reservation_ttl),
+            "created_at": now,
+            "updated_at": now,
+        }
+        items = [
+            {
+                "order_id": order["id"],
+                "product_id": uuid.UUID(product_id),
+                "quantity": quantity,
+                "unit_price_cents": prices[product_id],
+            }
+            for product_id, quantity in lines.items()
+        ]
+        for attempt in range(self.deadlock_retries + 1):
+            try:
+                dry = await self._reserve(order, items, lines, counts, session)
+                break
+            except DBAPIError as err:
+                await session.rollback()
+                if not is_retryable(err):
+                    raise
+                self.deadlocks += 1
+                logging.warning("Checkout deadlocked, attempt %d: %s", attempt + 1, err)
+        else:
+            # Still colliding with other checkouts of the same stock
+            raise OutOfStock()
+
+        for product_id in sorted(p for p in dry if counts[p] > 1):
+            try:
+                await self.rebalance(uuid.UUID(product_id), session)
+            except Exception:
+                logging.exception("Inventory rebalance failed for %s", product_id)
+                await session.rollback()
+
+        return {**order, "items": items}
+
+    async def _reserve(
+        self,
+        order: dict,
+        items: list[dict],
+        lines: dict[str, int],
+        counts: dict[str, int],
+        session: AsyncSession,
+    ) -> set[str]:
+        """One attempt at the checkout transaction; returns products that ran dry"""
+        rows = [(p, random.randrange(max(counts[p], 1)), q) for p, q in lines.items()]
+
+        conn = await session.connection()
+        await conn.execute(insert(Order), [order])
+        await conn.execute(insert(OrderItem), items)
+        reserved = (await conn.execute(reserve_statement(rows))).all()
+        # Shards that just ran dry get their product rebalanced after commit
+        dry = {str(product_id) for product_id, available in reserved if not available}
+        # In product order, like the fast path, so slow paths lock alike
+        short = sorted(lines.keys() - {str(product_id) for product_id, _ in reserved})
+        for product_id in short:
+            if not await self._take_from_shards(conn, product_id, lines[product_id]):
+                await session.rollback()
+                raise OutOfStock()
+            dry.add(product_id)
+        await session.commit()
+        return dry
+
+    async def _take_from_shards(
+        self, conn: AsyncConnection, product_id: str, quantity: int
+    ) -> bool:
+        """Take `quantity` from whichever shards have it, or nothing
+
+        Locks the product's non-empty shards in shard order, so two slow-path
+        checkouts of the same product queue instead of deadlocking.
+        """
+        result = await conn.execute(
+            select(Inventory.shard, Inventory.available)
+            .where(
+                Inventory.product_id == uuid.UUID(product_id),
+                Inventory.available > 0,
+            )
+            .order_by(Inventory.shard)
+            .with_for_update()
+        )
+        takes, left = [], quantity
+        for shard, available in result:
+            take = min(available, left)
+            takes.append({"s": shard, "delta": -take})
+            left -= take
+            if not left:
+                break
+        if left:
+            return False
+
+        await conn.execute(adjust_statement(uuid.UUID(product_id)), takes)
+        self.slow_path += 1
+        return True
+
+    async def rebalance(self, product_id: uuid.UUID, session: AsyncSession):
+        """Even out a product's stock over the shards no checkout holds right now
+
+        Shards locked by in-flight checkouts are skipped rather than waited
+        on; their stock is picked up by a later rebalance.
+        """
+        result = await session.exec(
+            select(Inventory.shard, Inventory.available)
+            .where(Inventory.product_id == product_id)
+            .with_for_update(skip_locked=True)
+        )
+        locked = dict(result.all())
+        if len(locked) > 1:
+            amounts = spread(sum(locked.values()), len(locked))
+            # Deltas rather than new totals: they sum to zero, so the stock is
+            # kept even where FOR UPDATE is a no-op (SQLite) and a checkout
+            # commits between the read and this write
+            deltas = [
+                {"s": shard, "delta": amount - locked[shard]}
+                for shard, amount in zip(sorted(locked), amounts)
+                if amount != locked[shard]
+            ]
+            if deltas:
+                conn = await session.connection()
+                await conn.execute(adjust_statement(product_id), deltas)
+                self.rebalanced += 1
+        await session.commit()
+
+    async def get_order(
+        self, order_id: uuid.UUID, user_uid: uuid.UUID, session: AsyncSession
+    ) -> dict:
+        order = await session.get(Order, order_id)
+        if order is None or order.user_uid != user_uid:
+            raise OrderNotFound()
+        result = await session.exec(
+            select(OrderItem).where(OrderItem.order_id == order_id)
+        )
+        return {**order.model_dump(), "items": result.all()}
+
+    async def _transition(
+        self,
+        order_id: uuid.UUID,
+        user_uid: uuid.UUID,
+        status: str,
+        session: AsyncSession,
+    ):
+        """Move a reserved, unexpired order to `status`, or raise
+
+        A conditional UPDATE, so it can't race the expiry worker: whichever
+        commits first wins and the other matches no row.
+        """
+        conn = await session.connection()
+        result = await conn.execute(
+            update(Order)
+            .where(
+                Order.id == order_id,
+                Order.user_uid == user_uid,
+                Order.status == "reserved",
+                Order.expires_at > datetime.now(timezone.utc),
+            )
+            .values(status=status)
+            .returning(Order.id)
+        )
+        if result.first() is None:
+            await session.rollback()
+            await self.get_order(order_id, user_uid, session)
+            raise OrderNotReserved()
+        return conn
+
+    async def confirm_order(
+        self, order_id: uuid.UUID, user_uid: uuid.UUID, session: AsyncSession
+    ) -> dict:
+        await self._transition(order_id, user_uid, "confirmed", session)
+        await session.commit()
+        return await self.get_order(order_id, user_uid, session)
+
+    async def cancel_order(
+        self, order_id: uuid.UUID, user_uid: uuid.UUID, session: AsyncSession
+    ) -> dict:
+        conn = await self._transition(order_id, user_uid, "cancelled", session)
+        await release_orders(conn, [order_id])
+        await session.commit()
+        return await self.get_order(order_id, user_uid, session)
+
+    async def get_stock(self, product_id: uuid.UUID, session: AsyncSession) -> dict:
+        result = await session.exec(
+            select(func.coalesce(func.sum(Inventory.available), 0), func.count()).where(
+                Inventory.product_id == product_id
+            )
+        )
+        available, shards = result.one()
+        if not shards and await session.get(Product, product_id) is None:
+            raise ProductNotFound()
+        return {"product_id": product_id, "available": available, "shards": shards or 1}
+
+    async def _lock_shards(
+        self, product_id: uuid.UUID, session: AsyncSession
+    ) -> dict[int, int]:
+        if await session.get(Product, product_id) is None:
+            raise ProductNotFound()
+        result = await session.exec(
+            select(Inventory.shard, Inventory.available)
+            .where(Inventory.product_id == product_id)
+            .with_for_update()
+        )
+        return dict(result.all())
+
+    async def _write_stock(
+        self, product_id: uuid.UUID, total: int, shards: int, session: AsyncSession
+    ) -> dict:
+        conn = await session.connection()
+        await write_shards(conn, product_id, dict(enumerate(spread(total, shards))))
+        await conn.execute(
+            delete(Inventory).where(
+                Inventory.product_id == product_id, Inventory.shard >= shards
+            )
+        )
+        await session.commit()
+        return await self.get_stock(product_id, session)
+
+    async def set_stock(
+        self, product_id: uuid.UUID, available: int, session: AsyncSession
+    ) -> dict:
+        """Set a product's stock, spread over however many shards it has"""
+        current = await self._lock_shards(product_id, session)
+        return await self._write_stock(
+            product_id, available, max(len(current), 1), session
+        )
+
+    async def set_shards(
+        self, product_id: uuid.UUID, shards: int, session: AsyncSession
+    ) -> dict:
+        """Move a product between one row (`shards=1`) and N shards, keeping its stock
+
+        Safe online on Postgres: the product's shards are locked for the
+        rewrite, so its checkouts wait for it, and one that picked a shard that no longer
+        exists takes the slow path.
+        """
+        current = await self._lock_shards(product_id, session)
+        return await self._write_stock(
+            product_id, sum(current.values()), shards, session
+        )
+
+    def stats(self) -> dict:
+        return {
+            "slow_path": self.slow_path,
+            "rebalanced": self.rebalanced,
+            "deadlocks": self.deadlocks,
+        }
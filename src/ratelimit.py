@@ -0,0 +1,171 @@
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+
+from fastapi import Request
+from src.config import settings
+from src.errors import RateLimitExceeded
+
+
+@dataclass(frozen=True)
+class RateLimitRule:
+    capacity: float
+    refill_rate: float  # tokens per second
+
+    @classmethod
+    def per_minute(cls, count: int) -> "RateLimitRule":
+        return cls(capacity=count, refill_rate=count / 60)
+
+    @classmethod
+    def per_second(cls, count: int) -> "RateLimitRule":
+        return cls(capacity=count, refill_rate=count)
+
+
+class BucketStore:
+    """Storage for token buckets; subclasses decide where bucket state lives"""
+
+    async def take(self, key: str, rule: RateLimitRule, cost: float = 1.0) -> float:
+        """Consume `cost` tokens, returning 0 on success or seconds until allowed"""
+        raise NotImplementedError("Override this method in a subclass.")
+
+    async def reset(self):
+        raise NotImplementedError("Override this method in a subclass.")
+
+
+class MemoryBucketStore(BucketStore):
+    """Per-process bucket store, O(1) per request
+
+    Nothing is swept on a timer: a stale bucket is refilled lazily when its
+    key is seen again, and idle keys fall off the end of an LRU bounded by
+    `maxsize` (an evicted bucket would have been full by then anyway).
+    """
+
+    def __init__(self, maxsize: int = 100000):
+        self.maxsize = maxsize
+        self._buckets: OrderedDict[str, tuple[float, float]] = OrderedDict()
+
+    async def take(self, key: str, rule: RateLimitRule, cost: float = 1.0) -> float:
+        now = time.monotonic()
+        tokens, updated = self._buckets.pop(key, (rule.capacity, now))
+        tokens = min(rule.capacity, tokens + (now - updated) * rule.refill_rate)
+
+        if tokens >= cost:
+            tokens -= cost
+            retry_after = 0.0
+        else:
+            retry_after = (cost - tokens) / rule.refill_rate
+
+        self._buckets[key] = (tokens, now)
+        if len(self._buckets) > self.maxsize:
+            self._buckets.popitem(last=False)
+
+        return retry_after
+
+    async def reset(self):
+        self._buckets.clear()
+
+
+class RedisBucketStore(BucketStore):
+    """Bucket store shared by every worker through Redis
+
+    The refill-and-take runs as one Lua script so concurrent workers can't
+    double-spend a bucket. Requires the optional `redis` package.
+    """
+
+    script = """
+    local capacity = tonumber(ARGV[1])
+    local rate = tonumber(ARGV[2])
+    local cost = tonumber(ARGV[3])
+    local now = redis.call('TIME')
+    now = tonumber(now[1]) + tonumber(now[2]) / 1000000
+
+    local state = redis.call('HMGET', KEYS[1], 'tokens', 'updated')
+    local tokens = tonumber(state[1]) or capacity
+    local updated = tonumber(state[2]) or now
+    tokens = math.min(capacity, tokens + (now - updated) * rate)
+
+    local retry_after = 0
+    if tokens >= cost then
+        tokens = tokens - cost
+    else
+        retry_after = (cost - tokens) / rate
+    end
+
+    redis.call('HSET', KEYS[1], 'tokens', tokens, 'updated', now)
+    redis.call('EXPIRE', KEYS[1], math.ceil(capacity / rate) + 1)
+    return tostring(retry_after)
+    """
+
+    def __init__(self, url: str, prefix: str = "ratelimit:"):
+        try:
+            from redis import asyncio as redis
+        except ImportError as err:
+            raise RuntimeError(
+                "RATE_LIMIT_REDIS_URL is set but the redis package is not installed"
+            ) from err
+
+        self.prefix = prefix
+        self.client = redis.from_url(url)
+        self._take = self.client.register_script(self.script)
+
+    async def take(self, key: str, rule: RateLimitRule, cost: float = 1.0) -> float:
+        retry_after = await self._take(
+            keys=[self.prefix + key], args=[rule.capacity, rule.refill_rate, cost]
+        )
+        return float(retry_after)
+
+    async def reset(self):
+        async for key in self.client.scan_iter(match=self.prefix + "*"):
+            await self.client.delete(key)
+
+
+class RateLimiter:
+    """Token-bucket limits per client IP, per email and for the whole service
+
+    Buckets are checked cheapest-scope first, so a client that is already
+    over its own limit does not eat into the global budget.
+    """
+
+    def __init__(
+        self,
+        store: BucketStore,
+        per_ip: RateLimitRule,
+        per_email: RateLimitRule,
+        global_budget: RateLimitRule,
+        enabled: bool = True,
+    ):
+        self.store = store
+        self.per_ip = per_ip
+        self.per_email = per_email
+        self.global_budget = global_budget
+        self.enabled = enabled
+        self.rejected = 0
+
+    async def hit(self, scope: str, request: Request, email: str | None = None):
+        if not self.enabled:
+            return
+
+        host = request.client.host if request.client else "unknown"
+        checks = [(f"{scope}:ip:{host}", self.per_ip)]
+        if email:
+            checks.append((f"{scope}:email:{email.lower()}", self.per_email))
+        checks.append(("global", self.global_budget))
+
+        for key, rule in checks:
+            retry_after = await self.store.take(key, rule)
+            if retry_after:
+                self.rejected += 1
+                raise RateLimitExceeded(retry_after)
+
+
+rate_limiter = RateLimiter(
+    store=(
+        RedisBucketStore(settings.RATE_LIMIT_REDIS_URL)
+        if settings.RATE_LIMIT_REDIS_URL
+        else MemoryBucketStore(maxsize=settings.RATE_LIMIT_STORE_SIZE)
+    ),
+    per_ip=RateLimitRule.per_minute(settings.RATE_LIMIT_IP_PER_MINUTE),
+    per_email=RateLimitRule.per_minute(settings.RATE_LIMIT_EMAIL_PER_MINUTE),
+    global_budget=RateLimitRule.per_second(settings.RATE_LIMIT_GLOBAL_PER_SECOND),
+    enabled=settings.RATE_LIMIT_ENABLED,
+)
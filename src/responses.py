@@ -0,0 +1,64 @@
+import hashlib
+from datetime import datetime, timezone
+
+from fastapi import Request
+from fastapi.responses import Response
+
+# Responses carrying credentials (RFC 6749 5.1); also keeps them out of the
+# idempotency store
+NO_STORE = "no-store"
+# Per-user data: browsers may keep it but must revalidate, CDNs must not store it
+PRIVATE_REVALIDATE = "private, no-cache"
+
+
+def public_max_age(seconds: int) -> str:
+    """Shared caches may serve it for `seconds`, then revalidate with the ETag"""
+    return f"public, max-age={seconds}, stale-while-revalidate={seconds}"
+
+
+class RawJSONResponse(Response):
+    """Response for a body that has already been serialized to JSON bytes"""
+
+    media_type = "application/json"
+
+
+def weak_etag(*parts) -> str:
+    """Weak validator from a resource's version, e.g. its id and `updated_at`"""
+    hasher = hashlib.blake2b(digest_size=12)
+    for part in parts:
+        if isinstance(part, datetime):
+            # SQLite hands back naive UTC, Postgres aware; both must agree
+            part = part.replace(tzinfo=timezone.utc) if part.tzinfo is None else part
+            part = part.astimezone(timezone.utc).isoformat()
+        hasher.update(part if isinstance(part, bytes) else str(part).encode())
+        hasher.update(b"\0")
+    return f'W/"{hasher.hexdigest()}"'
+
+
+def etag_matches(request: Request, etag: str) -> bool:
+    """Weak comparison against If-None-Match, as RFC 9110 asks for GETs"""
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    if header.strip() == "*":
+        return True
+    opaque = etag.removeprefix("W/")
+    return any(tag.strip().removeprefix("W/") == opaque for tag in header.split(","))
+
+
+def not_modified(etag: str, cache_control: str) -> Response:
+    return Response(
+        status_code=304, headers={"ETag": etag, "Cache-Control": cache_control}
+    )
+
+
+def conditional_json(request: Request, body: bytes, cache_control: str) -> Response:
+    """RawJSONResponse tagged with a hash of its body, or 304 if the client has it
+
+    For reads like listings that have no single version column; the query
+    still runs, but an unchanged page costs no transfer.
+    """
+    etag = weak_etag(body)
+    if etag_matches(request, etag):
+        return not_modified(etag, cache_control)
+    return RawJSONResponse(body, headers={"ETag": etag, "Cache-Control": cache_control})
@@ -0,0 +1,42 @@
+import time
+from contextlib import contextmanager
+
+
+class StartupTimer:
+    """Wall-clock breakdown of where boot time goes"""
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.phases: dict[str, float] = {}
+        self._last = self.started
+
+    def mark(self, name: str):
+        """Record the time since the previous mark (or since creation) as `name`"""
+        now = time.perf_counter()
+        self.phases[name] = now - self._last
+        self._last = now
+
+    @contextmanager
+    def phase(self, name: str):
+        self._last = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.mark(name)
+
+    def total(self) -> float:
+        return self._last - self.started
+
+    def stats(self) -> dict:
+        return {
+            "total_ms": round(self.total() * 1000, 1),
+            "phases_ms": {
+                name: round(seconds * 1000, 1) for name, seconds in self.phases.items()
+            },
+        }
+
+    def summary(self) -> str:
+        phases = ", ".join(
+            f"{name} {seconds * 1000:.0f}ms" for name, seconds in self.phases.items()
+        )
+        return f"startup took {self.total() * 1000:.0f}ms ({phases})"
@@ -1,9 +1,23 @@
+import asyncio
 import pytest
+import pytest_asyncio
 from fastapi.testclient import TestClient
-from unittest.mock import Mock
+from httpx import AsyncClient, ASGITransport
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.orm import sessionmaker
+from sqlmodel import SQLModel
+from sqlmodel.ext.asyncio.session import AsyncSession
+from unittest.mock import AsyncMock, Mock
 from src.auth.dependencies import AccessTokenBearer, RefreshTokenBearer
+from src.auth.utils import token_cache, user_cache
+from src.cart.routes import cart_service
+from src.db.models import Product
+from src.mail import smtp_transport
 from src.main import app
-from src.db.main import get_session
+from src.middleware import idempotency_store
+from src.ratelimit import rate_limiter
+from src.db.main import get_read_session, get_session
 
 mock_session = Mock()
 mock_user_service = Mock()
@@ -17,6 +31,7 @@ access_token_bearer = AccessTokenBearer()
 refresh_token_bearer = RefreshTokenBearer()
 
 app.dependency_overrides[get_session] = get_mock_session
+app.dependency_overrides[get_read_session] = get_mock_session
 app.dependency_overrides[refresh_token_bearer] = Mock()
 
 
@@ -33,3 +48,160 @@ def fake_user_service():
 @pytest.fixture
 def test_client():
     return TestClient(app)
+
+
+class StatementRecorder:
+    def __init__(self):
+        self.statements = []
+
+    def __call__(self, conn, cursor, statement, parameters, context, executemany):
+        self.statements.append(statement)
+
+    def clear(self):
+        self.statements.clear()
+
+
+@pytest_asyncio.fixture
+async def db_client(tmp_path, monkeypatch):
+    """An AsyncClient backed by a real SQLite database, recording every SQL statement"""
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'test.db'}")
+    Session = sessionmaker(bind=engine, class_=AsyncSession, expire_on_commit=False)
+    recorder = StatementRecorder()
+
+    async def get_test_session():
+        async with Session() as session:
+            yield session
+
+    async with engine.begin() as conn:
+        await conn.run_sync(SQLModel.metadata.create_all)
+
+    event.listen(engine.sync_engine, "before_cursor_execute", recorder)
+    monkeypatch.setattr(smtp_transport, "send_email", AsyncMock())
+    app.dependency_overrides[get_session] = get_test_session
+    app.dependency_overrides[get_read_session] = get_test_session
+    token_cache.clear()
+    user_cache.clear()
+    await rate_limiter.store.reset()
+    await idempotency_store.reset()
+
+    transport = ASGITransport(app=app)
+    async with AsyncClient(transport=transport, base_url="http://localhost") as client:
+        client.sql = recorder
+        client.session_factory = Session
+        yield client
+
+    app.dependency_overrides[get_session] = get_mock_session
+    app.dependency_overrides[get_read_session] = get_mock_session
+    await engine.dispose()
+
+
+@pytest_asyncio.fixture
+async def session_factory(tmp_path):
+    """A session factory bound to a fresh SQLite database"""
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'factory.db'}")
+    async with engine.begin() as conn:
+        await conn.run_sync(SQLModel.metadata.create_all)
+    yield async_sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+    await engine.dispose()
+
+
+class SMTPStub:
+    """Minimal plaintext SMTP server that records delivered messages"""
+
+    def __init__(self):
+        self.messages = []
+        self.connections = 0
+        self.writers = []
+        self.server = None
+        self.port = None
+
+    async def handle(self, reader, writer):
+        self.connections += 1
+        self.writers.append(writer)
+        writer.write(b"220 localhost ESMTP stub\r\n")
+        mail_from, rcpt_to = None, []
+
+        while line := await reader.readline():
+            command = line.decode().strip()
+            verb = command.split(" ", 1)[0].upper()
+
+            if verb in ("EHLO", "HELO"):
+                writer.write(b"250-localhost\r\n250 PIPELINING\r\n")
+            elif verb == "MAIL":
+                mail_from, rcpt_to = command, []
+                writer.write(b"250 OK\r\n")
+            elif verb == "RCPT":
+                rcpt_to.append(command.split(":", 1)[1].strip(" <>"))
+                writer.write(b"250 OK\r\n")
+            elif verb == "DATA":
+                writer.write(b"354 End data with <CR><LF>.<CR><LF>\r\n")
+                await writer.drain()
+                data = await reader.readuntil(b"\r\n.\r\n")
+                self.messages.append({"to": rcpt_to, "data": data.decode()})
+                writer.write(b"250 OK\r\n")
+            elif verb == "QUIT":
+                writer.write(b"221 Bye\r\n")
+                await writer.drain()
+                break
+            else:
+                writer.write(b"250 OK\r\n")
+            await writer.drain()
+
+        writer.close()
+
+    def drop_connections(self):
+        """Simulate the server closing idle client connections"""
+        for writer in self.writers:
+            writer.close()
+        self.writers.clear()
+
+    async def start(self):
+        self.server = await asyncio.start_server(self.handle, "127.0.0.1", 0)
+        self.port = self.server.sockets[0].getsockname()[1]
+
+    async def stop(self):
+        self.server.close()
+        await self.server.wait_closed()
+
+
+@pytest_asyncio.fixture
+async def smtp_server():
+    stub = SMTPStub()
+    await stub.start()
+    yield stub
+    await stub.stop()
+
+
+@pytest_asyncio.fixture
+async def shopper(db_client, monkeypatch):
+    """Logged-in client with two products, and cart_service on the test DB"""
+    monkeypatch.setattr(cart_service, "session_factory", db_client.session_factory)
+    monkeypatch.setattr(cart_service, "_pending", {})
+    monkeypatch.setattr(cart_service, "_products", {})
+    await cart_service.store.reset()
+
+    user = {
+        "first_name": "Cart",
+        "last_name": "User",
+        "username": "cart",
+        "email": "cart@example.com",
+        "password": "secret123",
+    }
+    await db_client.post("/api/v1/auth/signup", json=user)
+    res = await db_client.post(
+        "/api/v1/auth/login",
+        json={"email": user["email"], "password": user["password"]},
+    )
+    db_client.headers["Authorization"] = f"Bearer {res.json()['access_token']}"
+
+    async with db_client.session_factory() as session:
+        products = [
+            Product(sku=f"CART-{i}", name=f"Thing {i}", category="x", price_cents=100)
+            for i in range(2)
+        ]
+        session.add_all(products)
+        await session.commit()
+        db_client.product_ids = [str(product.id) for product in products]
+
+    yield db_client
+    await cart_service.store.reset()
@@ -1,4 +1,11 @@
+import pytest
+import uuid
+from unittest.mock import patch
+from sqlmodel import update
+from datetime import datetime, timezone
 from src.auth.schemas import SignupModel
+from src.auth.utils import create_access_token, user_cache
+from src.db.models import User
 
 auth_prefix = "/api/v1/auth"
 
@@ -23,3 +30,137 @@ def test_user_creation(fake_session, fake_user_service, test_client):
     )
     assert fake_user_service.create_user_called_once()
     assert fake_user_service.create_user_called_once_with(user_data, fake_session)
+
+
+def test_me_served_from_user_cache(fake_session, test_client):
+    user = User(
+        uid=uuid.uuid4(),
+        username="cached",
+        email="cached@example.com",
+        first_name="Cached",
+        last_name="User",
+        role="user",
+        is_verified=True,
+        password_hash="not-a-real-hash",
+        created_at=datetime.now(timezone.utc),
+        updated_at=datetime.now(timezone.utc),
+    )
+    user_cache.set(user.uid, user)
+    token = create_access_token(
+        {"email": user.email, "user_uid": str(user.uid), "role": user.role}
+    )
+    fake_session.reset_mock()
+
+    res = test_client.get(
+        f"{auth_prefix}/me",
+        headers={"Authorization": f"Bearer {token}", "Host": "localhost"},
+    )
+
+    assert res.status_code == 200
+    assert res.json()["uid"] == str(user.uid)
+    assert fake_session.method_calls == []
+
+    user_cache.invalidate(user.uid)
+    assert user_cache.get(user.uid) is None
+
+
+@pytest.mark.asyncio
+async def test_admin_revokes_sessions_issued_before(db_client):
+    tokens = {}
+    for name in ("admin", "member"):
+        await db_client.post(
+            f"{auth_prefix}/signup",
+            json={
+                "username": name,
+                "email": f"{name}@example.com",
+                "first_name": name.title(),
+                "last_name": "User",
+                "password": "Test123",
+            },
+        )
+        res = await db_client.post(
+            f"{auth_prefix}/login",
+            json={"email": f"{name}@example.com", "password": "Test123"},
+        )
+        tokens[name] = res.json()
+
+    async with db_client.session_factory() as session:
+        await session.exec(
+            update(User).where(User.username == "admin").values(role="admin")
+        )
+        await session.commit()
+
+    def auth(name, kind="access_token"):
+        return {"Authorization": f"Bearer {tokens[name][kind]}"}
+
+    res = await db_client.post(
+        f"{auth_prefix}/admin/revoke-sessions",
+        json={"issued_before": datetime.now(timezone.utc).isoformat()},
+        headers=auth("member"),
+    )
+    assert res.status_code == 403
+
+    res = await db_client.post(
+        f"{auth_prefix}/admin/revoke-sessions",
+        json={"issued_before": datetime.now(timezone.utc).isoformat()},
+        headers=auth("admin"),
+    )
+    assert res.status_code == 200
+    assert res.json()["revoked"] == 2
+
+    res = await db_client.get(
+        f"{auth_prefix}/refresh_token", headers=auth("member", "refresh_token")
+    )
+    assert res.status_code == 403
+
+
+@pytest.mark.asyncio
+async def test_signup_conflicts_report_field(db_client):
+    data = {
+        "username": "taken",
+        "email": "taken@example.com",
+        "first_name": "Taken",
+        "last_name": "User",
+        "password": "Test123",
+    }
+    res = await db_client.post(f"{auth_prefix}/signup", json=data)
+    assert res.status_code == 201
+    assert res.json()["user"]["email"] == data["email"]
+    assert "password_hash" not in res.json()["user"]
+
+    # Clashes are caught before the password is hashed
+    with patch("src.auth.service.generate_password_hash_async") as hasher:
+        res = await db_client.post(
+            f"{auth_prefix}/signup", json={**data, "username": "other"}
+        )
+        assert res.status_code == 403
+        assert res.json()["detail"]["message"] == "User with email already exists"
+
+        res = await db_client.post(
+            f"{auth_prefix}/signup", json={**data, "email": "other@example.com"}
+        )
+        assert res.status_code == 403
+        assert res.json()["detail"]["message"] == "User with username already exists"
+    hasher.assert_not_called()
+
+
+@pytest.mark.asyncio
+async def test_me_revalidates_with_etag(shopper):
+    res = await shopper.get(f"{auth_prefix}/me")
+    assert res.headers["cache-control"] == "private, no-cache"
+    etag = res.headers["etag"]
+    assert etag.startswith('W/"')
+
+    res = await shopper.get(f"{auth_prefix}/me", headers={"If-None-Match": etag})
+    assert res.status_code == 304
+    assert res.content == b""
+
+    async with shopper.session_factory() as session:
+        await session.exec(update(User).values(first_name="Renamed"))
+        await session.commit()
+    user_cache.clear()
+
+    res = await shopper.get(f"{auth_prefix}/me", headers={"If-None-Match": etag})
+    assert res.status_code == 200
+    assert res.json()["first_name"] == "Renamed"
+    assert res.headers["etag"] != etag
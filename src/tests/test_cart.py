@@ -0,0 +1,88 @@
+import asyncio
+
+import pytest
+from sqlmodel import select
+from src.cart.routes import cart_service
+from src.db.models import CartItem
+
+cart_prefix = "/api/v1/cart"
+
+
+async def stored_items(client) -> dict[str, int]:
+    async with client.session_factory() as session:
+        result = await session.exec(select(CartItem))
+        return {str(item.product_id): item.quantity for item in result}
+
+
+@pytest.mark.asyncio
+async def test_mutations_are_coalesced_into_one_write(shopper):
+    first, second = shopper.product_ids
+    for _ in range(3):
+        res = await shopper.post(f"{cart_prefix}/items", json={"product_id": first})
+        assert res.status_code == 200
+    await shopper.post(
+        f"{cart_prefix}/items", json={"product_id": second, "quantity": 4}
+    )
+    res = await shopper.put(f"{cart_prefix}/items/{second}", json={"quantity": 2})
+    assert res.json()["total_quantity"] == 5
+
+    # One read when the cold cart was first loaded, and no writes yet
+    reads = [s for s in shopper.sql.statements if "cart_items" in s]
+    assert len(reads) == 1 and reads[0].startswith("SELECT"), reads
+    assert await stored_items(shopper) == {}
+
+    shopper.sql.clear()
+    assert await cart_service.flush() == 1
+    writes = [s for s in shopper.sql.statements if "cart_items" in s]
+    assert len(writes) == 2, writes  # one DELETE, one multi-row INSERT
+    assert await stored_items(shopper) == {first: 3, second: 2}
+
+    await shopper.delete(f"{cart_prefix}/items/{first}")
+    await cart_service.flush()
+    assert await stored_items(shopper) == {second: 2}
+
+
+@pytest.mark.asyncio
+async def test_cold_cart_reloads_from_database(shopper):
+    first, _ = shopper.product_ids
+    await shopper.post(f"{cart_prefix}/items", json={"product_id": first})
+
+    # Evicted before its flush: the pending copy still serves reads
+    await cart_service.store.reset()
+    res = await shopper.get(cart_prefix)
+    assert res.json()["items"] == [{"product_id": first, "quantity": 1}]
+
+    await cart_service.flush()
+    await cart_service.store.reset()
+    res = await shopper.get(cart_prefix)
+    assert res.json()["items"] == [{"product_id": first, "quantity": 1}]
+
+
+@pytest.mark.asyncio
+async def test_rejects_unknown_products_and_excess_quantity(shopper):
+    first, _ = shopper.product_ids
+    res = await shopper.post(
+        f"{cart_prefix}/items",
+        json={"product_id": "00000000-0000-0000-0000-000000000000"},
+    )
+    assert res.status_code == 404
+
+    res = await shopper.post(
+        f"{cart_prefix}/items",
+        json={"product_id": first, "quantity": cart_service.max_quantity + 1},
+    )
+    assert res.status_code == 400
+    assert res.json()["detail"]["error_code"] == "CartQuantityExceeded"
+
+
+@pytest.mark.asyncio
+async def test_background_flush_meets_durability_bound(shopper, monkeypatch):
+    monkeypatch.setattr(cart_service, "flush_interval", 0.05)
+    cart_service.start()
+    try:
+        first, _ = shopper.product_ids
+        await shopper.post(f"{cart_prefix}/items", json={"product_id": first})
+        await asyncio.sleep(0.2)
+        assert await stored_items(shopper) == {first: 1}
+    finally:
+        await cart_service.stop()
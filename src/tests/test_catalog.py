@@ -0,0 +1,227 @@
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from sqlalchemy import event
+from src.db.models import Product
+
+catalog_prefix = "/api/v1/catalog"
+
+
+async def seed_products(session_factory, count: int = 25):
+    start = datetime(2026, 1, 1, tzinfo=timezone.utc)
+    async with session_factory() as session:
+        for i in range(count):
+            session.add(
+                Product(
+                    sku=f"SKU-{i:03}",
+                    name=f"Product {i}",
+                    category="shoes" if i % 2 else "hats",
+                    # Plenty of ties so the id tie-breaker matters
+                    price_cents=(i % 4) * 500,
+                    created_at=start + timedelta(minutes=i // 3),
+                    is_active=i != 7,
+                )
+            )
+        await session.commit()
+
+
+async def walk(client, **params) -> list[dict]:
+    items, cursor = [], None
+    while True:
+        query = {**params, "limit": 4, **({"cursor": cursor} if cursor else {})}
+        res = await client.get(f"{catalog_prefix}/products", params=query)
+        assert res.status_code == 200
+        page = res.json()
+        items.extend(page["items"])
+        cursor = page["next_cursor"]
+        if cursor is None:
+            return items
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize(
+    "sort, key, reverse",
+    [
+        ("price", lambda p: (p["price_cents"], p["id"]), False),
+        ("-price", lambda p: (p["price_cents"], p["id"]), True),
+        ("newest", lambda p: (p["created_at"], p["id"]), True),
+    ],
+)
+async def test_keyset_pages_cover_listing_exactly_once(db_client, sort, key, reverse):
+    await seed_products(db_client.session_factory)
+
+    items = await walk(db_client, sort=sort)
+    assert len(items) == 24
+    assert items == sorted(items, key=key, reverse=reverse)
+
+    shoes = await walk(db_client, sort=sort, category="shoes")
+    assert [p["sku"] for p in shoes] == [
+        p["sku"] for p in items if p["category"] == "shoes"
+    ]
+
+
+@pytest.mark.asyncio
+async def test_tampered_or_mismatched_cursor_rejected(db_client):
+    await seed_products(db_client.session_factory)
+    res = await db_client.get(f"{catalog_prefix}/products", params={"limit": 2})
+    cursor = res.json()["next_cursor"]
+
+    for params in (
+        {"cursor": cursor[:-2] + "xx"},
+        {"cursor": cursor, "sort": "price"},
+    ):
+        res = await db_client.get(f"{catalog_prefix}/products", params=params)
+        assert res.status_code == 400
+        assert res.json()["detail"]["error_code"] == "InvalidCursor"
+
+
+@pytest.mark.asyncio
+async def test_listing_seeks_on_partial_index_without_sorting(db_client):
+    await seed_products(db_client.session_factory)
+    res = await db_client.get(
+        f"{catalog_prefix}/products", params={"category": "shoes", "limit": 2}
+    )
+    cursor = res.json()["next_cursor"]
+
+    engine = db_client.session_factory.kw["bind"]
+    captured = []
+
+    def capture(conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().upper().startswith("SELECT"):
+            captured.append((statement, parameters))
+
+    event.listen(engine.sync_engine, "before_cursor_execute", capture)
+    await db_client.get(
+        f"{catalog_prefix}/products",
+        params={"category": "shoes", "limit": 2, "cursor": cursor},
+    )
+    event.remove(engine.sync_engine, "before_cursor_execute", capture)
+
+    statement, parameters = captured[-1]
+    async with engine.connect() as conn:
+        result = await conn.exec_driver_sql(
+            f"EXPLAIN QUERY PLAN {statement}", parameters
+        )
+        plan = " ".join(row[-1] for row in result)
+
+    assert "ix_products_active_category_created" in plan
+    assert "TEMP B-TREE" not in plan
+
+
+async def seed_searchable(session_factory) -> dict[str, Product]:
+    products = {
+        "boots": Product(
+            sku="TRAIL-1",
+            name="Trail running boots",
+            description="Waterproof leather",
+            category="shoes",
+            price_cents=9000,
+        ),
+        "shoes": Product(
+            sku="ROAD-1",
+            name="Road running shoes",
+            description="Light mesh upper",
+            category="shoes",
+            price_cents=7000,
+        ),
+        "socks": Product(
+            sku="SOCK-1",
+            name="Wool socks",
+            description="Cushioned for running in boots",
+            category="socks",
+            price_cents=1500,
+        ),
+        "hidden": Product(
+            sku="ROAD-0",
+            name="Road running shoes (discontinued)",
+            category="shoes",
+            price_cents=5000,
+            is_active=False,
+        ),
+    }
+    async with session_factory() as session:
+        session.add_all(products.values())
+        await session.commit()
+        for product in products.values():
+            await session.refresh(product)
+    return products
+
+
+async def search(client, **params) -> dict:
+    res = await client.get(f"{catalog_prefix}/search", params=params)
+    assert res.status_code == 200
+    return res.json()
+
+
+@pytest.mark.asyncio
+async def test_search_ranks_name_matches_above_description(db_client):
+    await seed_searchable(db_client.session_factory)
+
+    results = await search(db_client, q="boots")
+    assert not results["fuzzy"]
+    assert [p["sku"] for p in results["items"]] == ["TRAIL-1", "SOCK-1"]
+
+    # All terms required, the last as a prefix; inactive products never show up
+    results = await search(db_client, q="run sho")
+    assert [p["sku"] for p in results["items"]] == ["ROAD-1"]
+
+    results = await search(db_client, q="running", category="socks")
+    assert [p["sku"] for p in results["items"]] == ["SOCK-1"]
+
+
+@pytest.mark.asyncio
+async def test_search_falls_back_to_fuzzy_matches(db_client):
+    await seed_searchable(db_client.session_factory)
+
+    results = await search(db_client, q="wooll sockz")
+    assert results["fuzzy"]
+    assert [p["sku"] for p in results["items"]] == ["SOCK-1"]
+
+    assert await search(db_client, q="umbrella") == {"items": [], "fuzzy": False}
+    assert await search(db_client, q="!!") == {"items": [], "fuzzy": False}
+
+
+@pytest.mark.asyncio
+async def test_search_index_follows_writes(db_client):
+    products = await seed_searchable(db_client.session_factory)
+
+    async with db_client.session_factory() as session:
+        socks = await session.get(Product, products["socks"].id)
+        socks.name = "Merino hiking socks"
+        await session.commit()
+        await session.delete(await session.get(Product, products["shoes"].id))
+        await session.commit()
+
+    assert [p["sku"] for p in (await search(db_client, q="merino"))["items"]] == [
+        "SOCK-1"
+    ]
+    assert (await search(db_client, q="wool"))["items"] == []
+    results = await search(db_client, q="mesh")
+    assert "ROAD-1" not in [p["sku"] for p in results["items"]]
+
+
+@pytest.mark.asyncio
+async def test_product_reads_revalidate_with_etag(db_client):
+    await seed_products(db_client.session_factory, count=3)
+    page = await db_client.get(f"{catalog_prefix}/products")
+    assert page.headers["cache-control"].startswith("public, max-age=")
+    res = await db_client.get(
+        f"{catalog_prefix}/products", headers={"If-None-Match": page.headers["etag"]}
+    )
+    assert res.status_code == 304
+
+    product_id = page.json()["items"][0]["id"]
+    url = f"{catalog_prefix}/products/{product_id}"
+    etag = (await db_client.get(url)).headers["etag"]
+
+    # A revalidation only looks up updated_at; the row itself is never loaded
+    db_client.sql.clear()
+    res = await db_client.get(url, headers={"If-None-Match": f'"other", {etag}'})
+    assert res.status_code == 304
+    assert res.headers["etag"] == etag
+    (statement,) = db_client.sql.statements
+    assert "description" not in statement
+
+    res = await db_client.get(url, headers={"If-None-Match": '"stale"'})
+    assert res.status_code == 200
+    assert res.headers["etag"] == etag
@@ -0,0 +1,113 @@
+import asyncio
+import time
+import httpx
+import pytest
+import rsa
+from google.auth import crypt, jwt as google_jwt
+from src.auth.google import GoogleCertsCache, cache_lifetime
+from src.auth.service import GoogleAuthService
+from src.config import settings
+from src.errors import FailedOauth
+
+public_key, private_key = rsa.newkeys(1024)
+signer = crypt.RSASigner.from_string(private_key.save_pkcs1().decode(), key_id="k1")
+certs = {"k1": public_key.save_pkcs1().decode()}
+
+
+def make_id_token(**claims) -> str:
+    now = int(time.time())
+    payload = {
+        "iss": "https://accounts.google.com",
+        "aud": settings.CLIENT_ID,
+        "sub": "google123",
+        "email": "googleuser@example.com",
+        "given_name": "Google",
+        "family_name": "User",
+        "iat": now,
+        "exp": now + 300,
+        **claims,
+    }
+    return google_jwt.encode(signer, payload).decode()
+
+
+class FakeGoogle:
+    """Stand-in for Google's token and certs endpoints"""
+
+    def __init__(self, id_token: str):
+        self.id_token = id_token
+        self.calls = {"token": 0, "certs": 0}
+
+    def __call__(self, request: httpx.Request) -> httpx.Response:
+        if request.url == settings.GOOGLE_CERTS_URL:
+            self.calls["certs"] += 1
+            return httpx.Response(
+                200, json=certs, headers={"Cache-Control": "public, max-age=3600"}
+            )
+        self.calls["token"] += 1
+        return httpx.Response(200, json={"id_token": self.id_token})
+
+
+@pytest.mark.asyncio
+async def test_google_callback_creates_user(db_client):
+    fake = FakeGoogle(make_id_token())
+    service = GoogleAuthService(transport=httpx.MockTransport(fake))
+
+    async with db_client.session_factory() as session:
+        first = await service.google_callback("fake_code", session)
+        second = await service.google_callback("fake_code", session)
+
+    assert "access_token" in first
+    assert first["user"]["email"] == "googleuser@example.com"
+    assert second["user"]["uid"] == first["user"]["uid"]
+    # Certs were fetched once and served from cache for the second callback
+    assert fake.calls == {"token": 2, "certs": 1}
+    await service.shutdown()
+
+
+@pytest.mark.asyncio
+async def test_google_callback_rejects_wrong_audience(db_client):
+    fake = FakeGoogle(make_id_token(aud="someone-else"))
+    service = GoogleAuthService(transport=httpx.MockTransport(fake))
+
+    async with db_client.session_factory() as session:
+        with pytest.raises(FailedOauth):
+            await service.google_callback("fake_code", session)
+    await service.shutdown()
+
+
+@pytest.mark.asyncio
+async def test_certs_cache_respects_max_age():
+    response = httpx.Response(
+        200, headers={"Cache-Control": "max-age=100", "Age": "40"}
+    )
+    assert cache_lifetime(response, default=5) == 60
+    assert cache_lifetime(httpx.Response(200), default=5) == 5
+
+    fake = FakeGoogle("")
+    cache = GoogleCertsCache(settings.GOOGLE_CERTS_URL)
+    async with httpx.AsyncClient(transport=httpx.MockTransport(fake)) as client:
+        assert await cache.get(client) == certs
+        assert await cache.get(client) == certs
+    assert cache.fetches == 1
+
+
+@pytest.mark.asyncio
+async def test_certs_refresh_loop_waits_on_short_max_age():
+    fetches = 0
+
+    def handler(request):
+        nonlocal fetches
+        fetches += 1
+        return httpx.Response(
+            200, json=certs, headers={"Cache-Control": "public, max-age=30"}
+        )
+
+    # 30s of lifetime is inside the 60s refresh margin
+    cache = GoogleCertsCache(settings.GOOGLE_CERTS_URL, retry_interval=0.05)
+    async with httpx.AsyncClient(transport=httpx.MockTransport(handler)) as client:
+        cache.start(client)
+        await asyncio.sleep(0.12)
+        await cache.stop()
+
+    assert cache.certs == certs
+    assert 2 <= fetches <= 4
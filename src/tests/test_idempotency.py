@@ -0,0 +1,186 @@
+import asyncio
+from datetime import timedelta, timezone
+
+import pytest
+from httpx import ASGITransport, AsyncClient
+from sqlalchemy import func
+from sqlmodel import select
+from src.auth.utils import create_access_token
+from src.db.models import EmailOutbox, IdempotencyRecord, User, utc_now
+from src.main import app
+from src.middleware import (
+    DatabaseIdempotencyStore,
+    MemoryIdempotencyStore,
+    StoredResponse,
+    idempotency_store,
+)
+
+auth_prefix = "/api/v1/auth"
+
+signup = {
+    "first_name": "Retry",
+    "last_name": "User",
+    "username": "retry",
+    "email": "retry@example.com",
+    "password": "secret123",
+}
+
+
+async def count(client, model) -> int:
+    async with client.session_factory() as session:
+        return (await session.exec(select(func.count()).select_from(model))).one()
+
+
+@pytest.mark.asyncio
+async def test_retried_signup_is_replayed_not_rerun(db_client):
+    headers = {"Idempotency-Key": "signup-1"}
+    first = await db_client.post(f"{auth_prefix}/signup", json=signup, headers=headers)
+    retry = await db_client.post(f"{auth_prefix}/signup", json=signup, headers=headers)
+
+    assert first.status_code == retry.status_code == 201
+    assert retry.content == first.content
+    assert retry.headers["idempotent-replayed"] == "true"
+    assert "idempotent-replayed" not in first.headers
+    assert await count(db_client, User) == 1
+    assert await count(db_client, EmailOutbox) == 1
+
+    res = await db_client.post(
+        f"{auth_prefix}/signup", json={**signup, "username": "other"}, headers=headers
+    )
+    assert res.status_code == 422
+    assert res.json()["detail"]["error_code"] == "IdempotencyKeyReused"
+
+
+@pytest.mark.asyncio
+async def test_concurrent_duplicates_wait_for_the_first(db_client):
+    headers = {"Idempotency-Key": "signup-2"}
+    responses = await asyncio.gather(
+        *(
+            db_client.post(f"{auth_prefix}/signup", json=signup, headers=headers)
+            for _ in range(5)
+        )
+    )
+
+    assert {res.status_code for res in responses} == {201}
+    assert len({res.content for res in responses}) == 1
+    assert await count(db_client, User) == 1
+    assert idempotency_store.stats()["waited"] >= 1
+
+
+@pytest.mark.asyncio
+async def test_database_store_claims_once(session_factory):
+    store = DatabaseIdempotencyStore(session_factory)
+
+    assert await store.claim("k", "fp", lease=60) is None
+    pending = await store.claim("k", "fp", lease=60)
+    assert pending.status_code is None
+
+    # A released claim can be taken again; a completed one is replayed
+    await store.release("k")
+    assert await store.claim("k", "fp", lease=60) is None
+    response = StoredResponse("fp", 201, [("content-type", "application/json")], b"{}")
+    await store.complete("k", response, ttl=60)
+    assert await store.claim("k", "fp", lease=60) == response
+
+    # Expired entries are claimable again
+    await store.complete("k", response, ttl=-1)
+    assert await store.claim("k", "fp", lease=60) is None
+
+
+@pytest.mark.asyncio
+async def test_memory_store_never_evicts_claims_in_flight():
+    store = MemoryIdempotencyStore(maxsize=2)
+    assert await store.claim("a", "fp", lease=60) is None
+    assert await store.claim("b", "fp", lease=60) is None
+    await store.complete("b", StoredResponse("fp", 201), ttl=60)
+
+    # Over capacity: the finished "b" goes, though "a" is older
+    assert await store.claim("c", "fp", lease=60) is None
+    assert (await store.claim("a", "fp", lease=60)).status_code is None
+    assert await store.get("b") is None
+
+    # With nothing finished to evict the store grows instead
+    assert await store.claim("d", "fp", lease=60) is None
+    assert list(store._entries) == ["c", "a", "d"]
+
+
+@pytest.mark.asyncio
+async def test_database_store_takes_over_stale_claims(session_factory):
+    """A claim left behind by a worker that died mid-request lapses with its lease"""
+    store = DatabaseIdempotencyStore(session_factory)
+    async with session_factory() as session:
+        session.add(
+            IdempotencyRecord(
+                key="k",
+                fingerprint="fp",
+                status_code=None,
+                headers=[],
+                body=b"",
+                expires_at=utc_now() - timedelta(seconds=1),
+            )
+        )
+        await session.commit()
+
+    assert await store.get("k") is None
+    assert await store.claim("k", "fp", lease=60) is None
+
+    # The fresh claim blocks others until it's completed, which keeps it for the TTL
+    assert (await store.claim("k", "fp", lease=60)).status_code is None
+    response = StoredResponse("fp", 201, [], b"{}")
+    await store.complete("k", response, ttl=3600)
+    async with session_factory() as session:
+        record = await session.get(IdempotencyRecord, "k")
+    expires_at = record.expires_at.replace(tzinfo=timezone.utc)
+    assert expires_at > utc_now() + timedelta(minutes=50)
+
+
+@pytest.mark.asyncio
+async def test_login_tokens_are_never_stored(db_client):
+    await db_client.post(f"{auth_prefix}/signup", json=signup)
+    login = {"email": signup["email"], "password": signup["password"]}
+    headers = {"Idempotency-Key": "login-1"}
+
+    for _ in range(2):
+        res = await db_client.post(f"{auth_prefix}/login", json=login, headers=headers)
+        assert res.status_code == 200
+        assert res.headers["cache-control"] == "no-store"
+        assert "idempotent-replayed" not in res.headers
+    assert not idempotency_store._entries
+
+
+@pytest.mark.asyncio
+async def test_keys_are_scoped_to_the_user_not_the_token(shopper):
+    me = (await shopper.get(f"{auth_prefix}/me")).json()
+    product_id, _ = shopper.product_ids
+    headers = {"Idempotency-Key": "add-1"}
+    first = await shopper.post(
+        "/api/v1/cart/items", json={"product_id": product_id}, headers=headers
+    )
+
+    # Same user after a token refresh: still the same request
+    token = create_access_token(user_data={"email": me["email"], "user_uid": me["uid"]})
+    retry = await shopper.post(
+        "/api/v1/cart/items",
+        json={"product_id": product_id},
+        headers={**headers, "Authorization": f"Bearer {token}"},
+    )
+    assert retry.headers["idempotent-replayed"] == "true"
+    assert retry.content == first.content
+    cart = (await shopper.get("/api/v1/cart")).json()
+    assert [line["quantity"] for line in cart["items"]] == [1]
+
+
+@pytest.mark.asyncio
+async def test_anonymous_keys_are_scoped_to_the_client(db_client):
+    headers = {"Idempotency-Key": "signup-3"}
+    first = await db_client.post(f"{auth_prefix}/signup", json=signup, headers=headers)
+
+    other = {**signup, "username": "other", "email": "other@example.com"}
+    transport = ASGITransport(app=app, client=("10.0.0.2", 4000))
+    async with AsyncClient(transport=transport, base_url="http://localhost") as client:
+        res = await client.post(f"{auth_prefix}/signup", json=other, headers=headers)
+
+    assert first.status_code == res.status_code == 201
+    assert "idempotent-replayed" not in res.headers
+    assert res.content != first.content
+    assert await count(db_client, User) == 2
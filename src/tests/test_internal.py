@@ -0,0 +1,62 @@
+import pytest
+from sqlmodel import update
+from src.auth.utils import user_cache
+from src.db.models import User
+from src.metrics import RequestMetrics
+
+
+@pytest.mark.asyncio
+async def test_internal_stats_admin_only(shopper):
+    url = "/api/v1/internal/stats"
+    res = await shopper.get(url, headers={"Authorization": ""})
+    assert res.status_code in (401, 403)
+    res = await shopper.get(url)
+    assert res.status_code == 403
+
+    async with shopper.session_factory() as session:
+        await session.exec(update(User).values(role="admin"))
+        await session.commit()
+    user_cache.clear()
+
+    res = await shopper.get(url)
+    assert res.status_code == 200
+    data = res.json()
+    assert "pool" in data["db"]
+    assert {"hits", "misses"} <= data["token_cache"].keys()
+
+
+def test_metrics_labelled_by_route_template(test_client):
+    test_client.get("/api/v1/auth/verify/not-a-token", headers={"Host": "localhost"})
+    res = test_client.get("/metrics", headers={"Host": "localhost"})
+
+    assert res.status_code == 200
+    assert res.headers["content-type"].startswith("text/plain")
+    body = res.text
+    assert 'route="/api/v1/auth/verify/{token}"' in body
+    assert "not-a-token" not in body
+    assert (
+        'http_requests_total{method="GET",route="/api/v1/auth/verify/{token}",status="400"} 1'
+        in body
+    )
+
+
+def test_request_metrics_histogram_buckets():
+    metrics = RequestMetrics(buckets=(0.1, 1.0))
+    metrics.observe("GET", "/x", 200, 0.05)
+    metrics.observe("GET", "/x", 200, 0.5)
+    metrics.observe("GET", "/x", 500, 5.0)
+    body = metrics.render()
+
+    assert (
+        'http_request_duration_seconds_bucket{method="GET",route="/x",le="0.1"} 1'
+        in body
+    )
+    assert (
+        'http_request_duration_seconds_bucket{method="GET",route="/x",le="1.0"} 2'
+        in body
+    )
+    assert (
+        'http_request_duration_seconds_bucket{method="GET",route="/x",le="+Inf"} 3'
+        in body
+    )
+    assert 'http_requests_total{method="GET",route="/x",status="500"} 1' in body
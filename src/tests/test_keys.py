@@ -0,0 +1,99 @@
+import json
+from datetime import datetime, timedelta, timezone
+from unittest.mock import patch
+
+import jwt
+import pytest
+
+from src.auth import routes
+from src.auth.keys import KeyRing, rotate
+
+
+def iso(delta: timedelta) -> str:
+    return (datetime.now(timezone.utc) + delta).isoformat()
+
+
+@pytest.fixture
+def keys_file(tmp_path):
+    path = str(tmp_path / "keys.json")
+    rotate(path, "RS256", "old", None, None)
+    rotate(path, "EdDSA", "current", iso(timedelta(hours=-1)), iso(timedelta(days=7)))
+    rotate(path, "RS256", "next", iso(timedelta(days=1)), None)
+    return path
+
+
+def test_signs_with_newest_started_key(keys_file):
+    ring = KeyRing.from_file(keys_file, secret="secret")
+    token = ring.encode(
+        {"sub": "1", "exp": datetime.now(timezone.utc) + timedelta(minutes=5)}
+    )
+
+    header = jwt.get_unverified_header(token)
+    assert header["kid"] == "current"
+    assert header["alg"] == "EdDSA"
+    assert ring.decode(token)["sub"] == "1"
+
+
+def test_retired_and_unknown_keys_are_rejected(keys_file):
+    ring = KeyRing.from_file(keys_file, secret="secret")
+    payload = {"exp": datetime.now(timezone.utc) + timedelta(minutes=5)}
+    old = jwt.encode(
+        payload, ring.keys["old"].private_key, "RS256", headers={"kid": "old"}
+    )
+    assert ring.decode(old)
+
+    ring.keys["old"].not_after = datetime.now(timezone.utc) - timedelta(seconds=1)
+    with pytest.raises(jwt.InvalidTokenError):
+        ring.decode(old)
+    with pytest.raises(jwt.InvalidTokenError):
+        ring.decode(jwt.encode(payload, "secret", "HS256"))
+
+
+def test_hmac_tokens_accepted_only_during_migration(keys_file):
+    until = datetime.now(timezone.utc) + timedelta(hours=1)
+    ring = KeyRing.from_file(keys_file, secret="secret", accept_hmac_until=until)
+    legacy = jwt.encode({"sub": "1"}, "secret", "HS256")
+
+    assert ring.decode(legacy) == {"sub": "1"}
+
+    ring.accept_hmac_until = datetime.now(timezone.utc) - timedelta(seconds=1)
+    with pytest.raises(jwt.InvalidTokenError):
+        ring.decode(legacy)
+
+
+def test_accepted_until_follows_the_verifying_key(keys_file):
+    until = datetime.now(timezone.utc) + timedelta(hours=1)
+    ring = KeyRing.from_file(keys_file, secret="secret", accept_hmac_until=until)
+    token = ring.encode({"sub": "1"})
+
+    legacy = jwt.encode({"sub": "1"}, "secret", "HS256")
+
+    assert ring.accepted_until(token) == ring.keys["current"].not_after
+    assert ring.accepted_until(legacy) == until
+    # Without asymmetric keys the HMAC secret never retires
+    assert KeyRing([], secret="secret").accepted_until(legacy) is None
+
+
+def test_jwks_endpoint_publishes_public_keys(keys_file, test_client):
+    ring = KeyRing.from_file(keys_file, secret="secret")
+    with patch.object(routes, "key_ring", ring):
+        res = test_client.get("/.well-known/jwks.json", headers={"Host": "localhost"})
+
+    assert res.status_code == 200
+    assert "max-age" in res.headers["cache-control"]
+    keys = {key["kid"]: key for key in res.json()["keys"]}
+    assert set(keys) == {"old", "current", "next"}
+    assert all("d" not in key for key in keys.values())
+
+    # Downstream services verify with nothing but the published JWK
+    token = ring.encode({"sub": "1"})
+    public = jwt.PyJWK(keys["current"]).key
+    assert jwt.decode(token, public, algorithms=["EdDSA"]) == {"sub": "1"}
+
+
+def test_rotate_retires_existing_keys(keys_file):
+    with open(keys_file) as f:
+        entries = {entry["kid"]: entry for entry in json.load(f)["keys"]}
+
+    assert entries["old"]["not_after"] is not None
+    assert entries["next"]["not_after"] is None
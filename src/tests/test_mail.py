@@ -0,0 +1,99 @@
+import pytest
+from datetime import datetime, timedelta, timezone
+from fastapi_mail import ConnectionConfig
+from sqlmodel import select
+from src.db.models import EmailOutbox
+from src.mail import OutboxWorker, SMTPTransport, queue_email
+
+
+def stub_config(port: int) -> ConnectionConfig:
+    return ConnectionConfig(
+        MAIL_USERNAME="",
+        MAIL_PASSWORD="",
+        MAIL_FROM="noreply@example.com",
+        MAIL_PORT=port,
+        MAIL_SERVER="127.0.0.1",
+        MAIL_STARTTLS=False,
+        MAIL_SSL_TLS=False,
+        USE_CREDENTIALS=False,
+        VALIDATE_CERTS=False,
+    )
+
+
+async def queue(session_factory, count: int):
+    async with session_factory() as session:
+        for i in range(count):
+            queue_email(session, [f"user{i}@example.com"], "Hello", "<p>Hi</p>")
+        await session.commit()
+
+
+async def outbox_rows(session_factory):
+    async with session_factory() as session:
+        return (await session.exec(select(EmailOutbox))).all()
+
+
+@pytest.mark.asyncio
+async def test_outbox_worker_delivers_in_batches(session_factory, smtp_server):
+    await queue(session_factory, 3)
+    transport = SMTPTransport(stub_config(smtp_server.port), size=1)
+    worker = OutboxWorker(session_factory, transport, batch_size=2)
+
+    assert await worker.run_once() == 2
+    assert await worker.run_once() == 1
+    assert await worker.run_once() == 0
+
+    assert len(smtp_server.messages) == 3
+    assert {row.status for row in await outbox_rows(session_factory)} == {"sent"}
+    assert transport.stats()["connections_opened"] == 1
+    await transport.close()
+
+
+@pytest.mark.asyncio
+async def test_outbox_worker_backs_off_and_gives_up(session_factory, smtp_server):
+    await queue(session_factory, 1)
+    port = smtp_server.port
+    await smtp_server.stop()
+    transport = SMTPTransport(stub_config(port))
+    worker = OutboxWorker(session_factory, transport, max_attempts=2)
+
+    assert await worker.run_once() == 1
+    [row] = await outbox_rows(session_factory)
+    assert row.status == "pending"
+    assert row.attempts == 1
+    assert row.last_error
+
+    # Not due yet, so the next pass skips it
+    assert await worker.run_once() == 0
+
+    async with session_factory() as session:
+        row = await session.get(EmailOutbox, row.id)
+        row.next_attempt_at = datetime.now(timezone.utc) - timedelta(seconds=1)
+        await session.commit()
+
+    assert await worker.run_once() == 1
+    [row] = await outbox_rows(session_factory)
+    assert row.status == "failed"
+    assert worker.stats() == {"sent": 0, "failed": 1}
+
+
+@pytest.mark.asyncio
+async def test_smtp_transport_reuses_and_reconnects(smtp_server):
+    transport = SMTPTransport(stub_config(smtp_server.port), size=1)
+
+    await transport.send_email(["a@example.com"], "One", "<p>1</p>")
+    await transport.send_email(["b@example.com"], "Two", "<p>2</p>")
+    assert smtp_server.connections == 1
+
+    smtp_server.drop_connections()
+    await transport.send_email(["c@example.com"], "Three", "<p>3</p>")
+
+    assert [m["to"] for m in smtp_server.messages] == [
+        ["a@example.com"],
+        ["b@example.com"],
+        ["c@example.com"],
+    ]
+    stats = transport.stats()
+    assert stats["sent"] == 3
+    assert stats["connections_opened"] == 2
+    assert stats["reused"] == 1
+    await transport.close()
@@ -0,0 +1,213 @@
+import asyncio
+import uuid
+
+import pytest
+import pytest_asyncio
+from sqlalchemy import func, update
+from sqlalchemy.exc import DBAPIError
+from sqlmodel import select
+from src.auth.utils import user_cache
+from src.db.models import Inventory, Order, OrderItem, User
+from src.errors import OutOfStock
+from src.orders.expiry import ReservationExpirer
+from src.orders.routes import order_service
+
+cart_prefix = "/api/v1/cart"
+orders_prefix = "/api/v1/orders"
+
+
+@pytest_asyncio.fixture
+async def buyer(shopper):
+    """The shopper, promoted to admin so it can stock its two products"""
+    async with shopper.session_factory() as session:
+        await session.exec(update(User).values(role="admin"))
+        await session.commit()
+    user_cache.clear()
+    shopper.user_uid = uuid.UUID((await shopper.get("/api/v1/auth/me")).json()["uid"])
+
+    first, second = shopper.product_ids
+    for product_id, available in ((first, 5), (second, 1)):
+        res = await shopper.put(
+            f"{orders_prefix}/inventory/{product_id}", json={"available": available}
+        )
+        assert res.status_code == 200
+    return shopper
+
+
+async def stock(client) -> dict[str, int]:
+    async with client.session_factory() as session:
+        result = await session.exec(
+            select(Inventory.product_id, func.sum(Inventory.available)).group_by(
+                Inventory.product_id
+            )
+        )
+        return {str(product_id): available for product_id, available in result}
+
+
+async def fill_cart(client, **quantities):
+    for product_id, quantity in quantities.items():
+        await client.post(
+            f"{cart_prefix}/items",
+            json={"product_id": product_id, "quantity": quantity},
+        )
+
+
+@pytest.mark.asyncio
+async def test_checkout_reserves_every_line_or_none(buyer):
+    first, second = buyer.product_ids
+    await fill_cart(buyer, **{first: 2, second: 1})
+
+    res = await buyer.post(f"{orders_prefix}/checkout")
+    assert res.status_code == 201
+    order = res.json()
+    assert order["status"] == "reserved"
+    assert order["total_cents"] == 300
+    assert await stock(buyer) == {first: 3, second: 0}
+    assert (await buyer.get(cart_prefix)).json()["items"] == []
+
+    # The second line is short, so the first line's stock isn't taken either
+    await fill_cart(buyer, **{first: 1, second: 1})
+    res = await buyer.post(f"{orders_prefix}/checkout")
+    assert res.status_code == 409
+    assert res.json()["detail"]["error_code"] == "OutOfStock"
+    assert await stock(buyer) == {first: 3, second: 0}
+
+    async with buyer.session_factory() as session:
+        orders = (await session.exec(select(func.count()).select_from(Order))).one()
+        assert orders == 1
+
+
+@pytest.mark.asyncio
+async def test_cancel_returns_stock_and_blocks_confirm(buyer):
+    first, _ = buyer.product_ids
+    await fill_cart(buyer, **{first: 4})
+    order_id = (await buyer.post(f"{orders_prefix}/checkout")).json()["id"]
+    assert (await stock(buyer))[first] == 1
+
+    res = await buyer.post(f"{orders_prefix}/{order_id}/cancel")
+    assert res.json()["status"] == "cancelled"
+    assert (await stock(buyer))[first] == 5
+
+    res = await buyer.post(f"{orders_prefix}/{order_id}/confirm")
+    assert res.status_code == 409
+    res = await buyer.post(f"{orders_prefix}/{uuid.uuid4()}/confirm")
+    assert res.status_code == 404
+
+
+@pytest.mark.asyncio
+async def test_expired_reservations_are_released(buyer, monkeypatch):
+    first, second = buyer.product_ids
+    await fill_cart(buyer, **{first: 2})
+    kept = (await buyer.post(f"{orders_prefix}/checkout")).json()["id"]
+
+    monkeypatch.setattr(order_service, "reservation_ttl", -1)
+    await fill_cart(buyer, **{first: 3, second: 1})
+    lapsed = (await buyer.post(f"{orders_prefix}/checkout")).json()["id"]
+    assert await stock(buyer) == {first: 0, second: 0}
+
+    expirer = ReservationExpirer(buyer.session_factory, batch_size=10)
+    assert await expirer.run_once() == 1
+    assert await expirer.run_once() == 0
+    assert await stock(buyer) == {first: 3, second: 1}
+
+    res = await buyer.post(f"{orders_prefix}/{lapsed}/confirm")
+    assert res.status_code == 409
+    res = await buyer.post(f"{orders_prefix}/{kept}/confirm")
+    assert res.json()["status"] == "confirmed"
+
+
+@pytest.mark.asyncio
+async def test_concurrent_buyers_never_oversell(buyer):
+    first, _ = buyer.product_ids
+    buyers, outcomes = 40, []
+
+    async def buy():
+        async with buyer.session_factory() as session:
+            try:
+                await order_service.place_order(buyer.user_uid, {first: 1}, session)
+                outcomes.append("ok")
+            except OutOfStock:
+                outcomes.append("out_of_stock")
+
+    await asyncio.gather(*(buy() for _ in range(buyers)))
+
+    assert outcomes.count("ok") == 5
+    assert outcomes.count("out_of_stock") == buyers - 5
+    assert (await stock(buyer))[first] == 0
+    async with buyer.session_factory() as session:
+        reserved = await session.exec(select(func.sum(OrderItem.quantity)))
+        assert reserved.one() == 5
+
+
+@pytest.mark.asyncio
+async def test_sharded_stock_rebalances_and_never_oversells(buyer):
+    first, _ = buyer.product_ids
+    await buyer.put(f"{orders_prefix}/inventory/{first}", json={"available": 40})
+    res = await buyer.put(
+        f"{orders_prefix}/inventory/{first}/shards", json={"shards": 16}
+    )
+    assert res.json() == {"product_id": first, "available": 40, "shards": 16}
+    async with buyer.session_factory() as session:
+        result = await session.exec(
+            select(Inventory.available).where(Inventory.product_id == uuid.UUID(first))
+        )
+        assert sorted(result.all()) == [2] * 8 + [3] * 8
+
+    # Random shards run dry long before the product does; the slow path and
+    # rebalancing still sell exactly the stock
+    orders = []
+
+    async def buy():
+        async with buyer.session_factory() as session:
+            try:
+                order = await order_service.place_order(
+                    buyer.user_uid, {first: 1}, session
+                )
+                orders.append(order["id"])
+            except OutOfStock:
+                pass
+
+    await asyncio.gather(*(buy() for _ in range(50)))
+    assert len(orders) == 40
+    assert (await stock(buyer))[first] == 0
+    assert order_service.rebalanced > 0
+
+    # Cancelled stock goes back to some shard, and folding the shards into
+    # one row keeps the total
+    res = await buyer.post(f"{orders_prefix}/{orders[0]}/cancel")
+    assert res.json()["status"] == "cancelled"
+    res = await buyer.put(
+        f"{orders_prefix}/inventory/{first}/shards", json={"shards": 1}
+    )
+    assert res.json() == {"product_id": first, "available": 1, "shards": 1}
+    res = await buyer.get(f"{orders_prefix}/inventory/{first}")
+    assert res.json()["shards"] == 1
+
+
+class DeadlockDetected(Exception):
+    sqlstate = "40P01"
+
+
+@pytest.mark.asyncio
+async def test_deadlocked_checkout_is_retried(buyer, monkeypatch):
+    first, _ = buyer.product_ids
+    reserve = order_service._reserve
+    collisions = iter([True])
+
+    async def deadlock_once(*args):
+        if next(collisions, False):
+            raise DBAPIError("UPDATE inventory ...", {}, DeadlockDetected())
+        return await reserve(*args)
+
+    monkeypatch.setattr(order_service, "_reserve", deadlock_once)
+    async with buyer.session_factory() as session:
+        await order_service.place_order(buyer.user_uid, {first: 1}, session)
+    assert (await stock(buyer))[first] == 4
+
+    # A checkout that keeps colliding gives up with a 409, not a 500
+    collisions = iter([True] * 10)
+    await fill_cart(buyer, **{first: 1})
+    res = await buyer.post(f"{orders_prefix}/checkout")
+    assert res.status_code == 409
+    assert res.json()["detail"]["error_code"] == "OutOfStock"
+    assert (await stock(buyer))[first] == 4
@@ -0,0 +1,44 @@
+import asyncio
+import pytest
+from src.auth.utils import PasswordHasher, generate_password_hash, verify_password
+from src.errors import PasswordHasherBusy
+
+
+@pytest.mark.asyncio
+async def test_password_hasher_runs_off_loop():
+    hasher = PasswordHasher(max_workers=1, max_queue=0)
+    try:
+        hashed = await hasher.run(lambda p: f"hashed:{p}", "secret")
+        assert hashed == "hashed:secret"
+    finally:
+        hasher.shutdown()
+
+
+@pytest.mark.asyncio
+async def test_password_hasher_rejects_when_saturated():
+    hasher = PasswordHasher(max_workers=1, max_queue=1)
+    release = asyncio.Event()
+    loop = asyncio.get_running_loop()
+
+    def slow(value):
+        asyncio.run_coroutine_threadsafe(release.wait(), loop).result()
+        return value
+
+    try:
+        running = [asyncio.create_task(hasher.run(slow, i)) for i in range(2)]
+        await asyncio.sleep(0)
+
+        with pytest.raises(PasswordHasherBusy):
+            await hasher.run(slow, 3)
+
+        release.set()
+        assert await asyncio.gather(*running) == [0, 1]
+        assert hasher.pending == 0
+    finally:
+        hasher.shutdown()
+
+
+def test_verify_password_rejects_wrong_password():
+    hashed = generate_password_hash("secret123")
+    assert verify_password("secret123", hashed)
+    assert not verify_password("wrong", hashed)
@@ -0,0 +1,64 @@
+import pytest
+
+auth_prefix = "/api/v1/auth"
+
+signup_data = {
+    "first_name": "Query",
+    "last_name": "Count",
+    "username": "queries",
+    "email": "queries@example.com",
+    "password": "secret123",
+}
+
+
+async def login(client):
+    res = await client.post(
+        f"{auth_prefix}/login",
+        json={"email": signup_data["email"], "password": signup_data["password"]},
+    )
+    assert res.status_code == 200
+    return res.json()
+
+
+@pytest.mark.asyncio
+async def test_auth_routes_statement_counts(db_client):
+    sql = db_client.sql
+
+    # Indexed clash check before hashing, INSERT ... ON CONFLICT DO NOTHING
+    # RETURNING, then the outbox insert
+    res = await db_client.post(f"{auth_prefix}/signup", json=signup_data)
+    assert res.status_code == 201
+    assert len(sql.statements) == 3, sql.statements
+    assert sql.statements[0].startswith("SELECT users.email")
+
+    # A few extra sessions so the user has more than one refresh token
+    await login(db_client)
+    await login(db_client)
+
+    sql.clear()
+    tokens = await login(db_client)
+    assert len(sql.statements) == 2, sql.statements
+    assert "refresh_tokens" not in sql.statements[0]
+
+    access = {"Authorization": f"Bearer {tokens['access_token']}"}
+    refresh = {"Authorization": f"Bearer {tokens['refresh_token']}"}
+
+    sql.clear()
+    res = await db_client.get(f"{auth_prefix}/me", headers=access)
+    assert res.status_code == 200
+    assert len(sql.statements) == 1, sql.statements
+
+    sql.clear()
+    res = await db_client.get(f"{auth_prefix}/refresh_token", headers=refresh)
+    assert res.status_code == 200
+    assert len(sql.statements) == 1, sql.statements
+
+    # Every session is revoked by a single UPDATE
+    sql.clear()
+    res = await db_client.get(f"{auth_prefix}/logout", headers=access)
+    assert res.status_code == 200
+    assert len(sql.statements) == 1, sql.statements
+    assert sql.statements[0].startswith("UPDATE refresh_tokens")
+
+    res = await db_client.get(f"{auth_prefix}/refresh_token", headers=refresh)
+    assert res.status_code == 403
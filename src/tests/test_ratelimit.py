@@ -0,0 +1,43 @@
+import pytest
+from unittest.mock import patch
+from src.ratelimit import MemoryBucketStore, RateLimitRule
+
+auth_prefix = "/api/v1/auth"
+
+
+@pytest.mark.asyncio
+async def test_memory_bucket_refills_lazily():
+    store = MemoryBucketStore()
+    rule = RateLimitRule(capacity=2, refill_rate=1)
+
+    with patch("src.ratelimit.time.monotonic", return_value=100.0):
+        assert await store.take("k", rule) == 0
+        assert await store.take("k", rule) == 0
+        assert await store.take("k", rule) == pytest.approx(1.0)
+
+    with patch("src.ratelimit.time.monotonic", return_value=101.5):
+        assert await store.take("k", rule) == 0
+
+
+@pytest.mark.asyncio
+async def test_memory_bucket_store_is_bounded():
+    store = MemoryBucketStore(maxsize=2)
+    rule = RateLimitRule(capacity=1, refill_rate=0.001)
+    for key in ("a", "b", "c"):
+        await store.take(key, rule)
+
+    assert list(store._buckets) == ["b", "c"]
+
+
+@pytest.mark.asyncio
+async def test_login_rate_limited_per_email(db_client):
+    payload = {"email": "nobody@example.com", "password": "wrongpass"}
+
+    for _ in range(5):
+        res = await db_client.post(f"{auth_prefix}/login", json=payload)
+        assert res.status_code == 403
+
+    res = await db_client.post(f"{auth_prefix}/login", json=payload)
+    assert res.status_code == 429
+    assert int(res.headers["Retry-After"]) >= 1
+    assert res.json()["detail"]["error_code"] == "RateLimitExceeded"
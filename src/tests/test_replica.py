@@ -0,0 +1,120 @@
+import jwt
+import pytest
+import pytest_asyncio
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlmodel import SQLModel
+from starlette.requests import Request
+from sqlmodel.ext.asyncio.session import AsyncSession
+from src.auth.service import UserService
+from src.auth.utils import create_access_token
+from src.db.models import User
+from src.db.routing import ReadRouter, RoutingSession, sticky_keys
+
+user_service = UserService()
+
+
+@pytest_asyncio.fixture
+async def routed(tmp_path):
+    """A primary and a 'replica' that never receives the primary's writes"""
+    primary = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'primary.db'}")
+    replica = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'replica.db'}")
+    for engine in (primary, replica):
+        async with engine.begin() as conn:
+            await conn.run_sync(SQLModel.metadata.create_all)
+
+    router = ReadRouter(primary, replica, sticky_seconds=60)
+    await router.check()
+    Session = async_sessionmaker(
+        bind=primary,
+        class_=AsyncSession,
+        sync_session_class=RoutingSession,
+        info={"read_router": router},
+        expire_on_commit=False,
+    )
+
+    def session(client: str, replica_ok: bool = True) -> AsyncSession:
+        session = Session()
+        session.info["read_keys"] = [f"ip:{client}"]
+        session.info["replica_ok"] = replica_ok
+        return session
+
+    yield router, session
+    await primary.dispose()
+    await replica.dispose()
+
+
+def new_user(email: str) -> User:
+    return User(
+        username=email.split("@")[0],
+        email=email,
+        first_name="Replica",
+        last_name="User",
+        password_hash="x",
+    )
+
+
+@pytest.mark.asyncio
+async def test_reads_go_to_replica_until_client_writes(routed):
+    router, session = routed
+    assert router.healthy
+
+    async with session("writer") as s:
+        assert await user_service.get_user("r@example.com", s) is None
+        s.add(new_user("r@example.com"))
+        await s.commit()
+        # Read-your-writes within the same session
+        assert await user_service.get_user("r@example.com", s) is not None
+
+    async with session("writer") as s:
+        assert await user_service.get_user("r@example.com", s) is not None
+
+    async with session("someone-else") as s:
+        assert await user_service.get_user("r@example.com", s) is None
+    assert router.replica_reads == 2
+
+
+@pytest.mark.asyncio
+async def test_falls_back_to_primary_when_replica_down(routed, tmp_path):
+    router, session = routed
+    async with session("writer") as s:
+        s.add(new_user("down@example.com"))
+        await s.commit()
+
+    router.replica = create_async_engine(
+        f"sqlite+aiosqlite:///{tmp_path / 'missing' / 'replica.db'}"
+    )
+    await router.check()
+    assert not router.healthy
+
+    async with session("someone-else") as s:
+        assert await user_service.get_user("down@example.com", s) is not None
+    await router.replica.dispose()
+
+
+@pytest.mark.asyncio
+async def test_sessions_stay_on_primary_unless_opted_in(routed):
+    router, session = routed
+    async with session("writer", replica_ok=False) as s:
+        assert await user_service.get_user("p@example.com", s) is None
+        s.add(new_user("p@example.com"))
+        await s.commit()
+    assert router.replica_reads == 0
+    assert router.primary_reads == 1
+
+    # The write still makes the client sticky for its opted-in reads
+    async with session("writer") as s:
+        assert await user_service.get_user("p@example.com", s) is not None
+    assert router.replica_reads == 0
+
+
+def bearer_request(token: str) -> Request:
+    headers = [(b"authorization", f"Bearer {token}".encode())]
+    return Request({"type": "http", "headers": headers, "client": ("1.2.3.4", 80)})
+
+
+def test_sticky_keys_only_trust_verified_tokens():
+    token = create_access_token(user_data={"email": "a@b.c", "user_uid": "u1"})
+    assert sticky_keys(bearer_request(token)) == ["ip:1.2.3.4", "user:u1"]
+
+    forged = jwt.encode({"user": {"user_uid": "u2"}}, "not-the-key")
+    assert sticky_keys(bearer_request(forged)) == ["ip:1.2.3.4"]
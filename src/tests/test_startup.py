@@ -0,0 +1,57 @@
+import subprocess
+import sys
+
+import pytest
+from alembic.script import ScriptDirectory
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import create_async_engine
+
+from src.config import Settings
+from src.db.main import MIGRATIONS_DIR, check_schema, init_db, prewarm_pool
+
+
+@pytest.mark.asyncio
+async def test_check_schema_requires_alembic_head(tmp_path):
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'schema.db'}")
+    try:
+        with pytest.raises(RuntimeError, match="no revision"):
+            await check_schema(engine)
+
+        (head,) = ScriptDirectory(str(MIGRATIONS_DIR)).get_heads()
+        async with engine.begin() as conn:
+            await conn.execute(text("CREATE TABLE alembic_version (version_num text)"))
+            await conn.execute(
+                text("INSERT INTO alembic_version VALUES (:head)"), {"head": head}
+            )
+        await check_schema(engine)
+    finally:
+        await engine.dispose()
+
+
+@pytest.mark.asyncio
+async def test_startup_checks_the_schema_by_default():
+    assert Settings.model_fields["DB_STARTUP_SCHEMA"].default == "check"
+    # The test database was never migrated, so booting against it must fail
+    with pytest.raises(RuntimeError, match="alembic upgrade head"):
+        await init_db()
+
+
+@pytest.mark.asyncio
+async def test_prewarm_pool_leaves_connections_idle(tmp_path):
+    engine = create_async_engine(
+        f"sqlite+aiosqlite:///{tmp_path / 'pool.db'}", pool_size=3
+    )
+    try:
+        assert await prewarm_pool(10, engine) == 3
+        assert engine.pool.checkedin() == 3
+        assert engine.pool.checkedout() == 0
+    finally:
+        await engine.dispose()
+
+
+def test_google_auth_not_imported_at_startup():
+    code = "import sys, src.main; print('google.auth' in sys.modules)"
+    result = subprocess.run(
+        [sys.executable, "-c", code], capture_output=True, text=True, check=True
+    )
+    assert result.stdout.strip() == "False"
@@ -0,0 +1,64 @@
+import pytest
+from datetime import datetime, timedelta, timezone
+from sqlmodel import select
+from src.auth.sweeper import TokenSweeper, add_months
+from src.db.models import PasswordResetToken, RefreshToken, User
+
+
+@pytest.mark.asyncio
+async def test_sweeper_deletes_expired_revoked_and_used_tokens(session_factory):
+    now = datetime.now(timezone.utc)
+    user = User(
+        username="sweep",
+        email="sweep@example.com",
+        first_name="Sweep",
+        last_name="User",
+        role="user",
+    )
+
+    async with session_factory() as session:
+        session.add(user)
+        await session.flush()
+        for i in range(5):
+            session.add(
+                RefreshToken(
+                    jti=f"expired-{i}",
+                    user_uid=user.uid,
+                    expires_at=now - timedelta(days=1),
+                )
+            )
+        session.add(
+            RefreshToken(
+                jti="revoked",
+                user_uid=user.uid,
+                expires_at=now + timedelta(days=1),
+                revoked=True,
+            )
+        )
+        session.add(
+            RefreshToken(
+                jti="live", user_uid=user.uid, expires_at=now + timedelta(days=1)
+            )
+        )
+        session.add(PasswordResetToken(user_uid=user.uid, token="used", used=True))
+        session.add(PasswordResetToken(user_uid=user.uid, token="fresh", used=False))
+        await session.commit()
+
+    sweeper = TokenSweeper(session_factory, batch_size=2, batch_pause=0)
+    assert await sweeper.run_once() == 7
+
+    async with session_factory() as session:
+        jtis = (await session.exec(select(RefreshToken.jti))).all()
+        tokens = (await session.exec(select(PasswordResetToken.token))).all()
+
+    assert jtis == ["live"]
+    assert tokens == ["fresh"]
+    assert sweeper.stats()["rows_reclaimed"] == {
+        "refresh_tokens": 6,
+        "password_reset_tokens": 1,
+    }
+
+
+def test_add_months_wraps_year():
+    start = datetime(2026, 11, 1, tzinfo=timezone.utc)
+    assert add_months(start, 2) == datetime(2027, 1, 1, tzinfo=timezone.utc)
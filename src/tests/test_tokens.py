@@ -0,0 +1,57 @@
+import time
+from datetime import datetime, timedelta, timezone
+from unittest.mock import patch
+from src.auth import utils
+from src.auth.utils import (
+    TokenCache,
+    create_access_token,
+    decode_token_cached,
+    hash_token,
+    token_cache,
+)
+
+
+def test_decode_token_cached_skips_second_decode():
+    token_cache.clear()
+    token = create_access_token({"email": "cache@example.com", "user_uid": "1"})
+
+    with patch.object(utils, "decode_token", wraps=utils.decode_token) as decode:
+        first = decode_token_cached(token)
+        second = decode_token_cached(token)
+
+    assert first == second
+    assert decode.call_count == 1
+    assert token_cache.stats()["hits"] >= 1
+
+
+def test_token_cache_entries_expire_with_token():
+    cache = TokenCache(maxsize=2)
+    cache.set("expired", {"exp": time.time() - 1})
+    cache.set("live", {"exp": time.time() + 60})
+
+    assert cache.get("expired") is None
+    assert cache.get("live") is not None
+    assert cache.stats() == {"size": 1, "maxsize": 2, "hits": 1, "misses": 1}
+
+
+def test_token_cache_entries_expire_with_their_key():
+    cache = TokenCache(maxsize=2)
+    exp = time.time() + 3600
+    now = datetime.now(timezone.utc)
+    cache.set("retired", {"exp": exp}, until=now - timedelta(seconds=1))
+    cache.set("retiring", {"exp": exp}, until=now + timedelta(minutes=5))
+
+    assert cache.get("retired") is None
+    assert cache.get("retiring") is not None
+    _, expires = cache._cache[hash_token("retiring")]
+    assert expires == (now + timedelta(minutes=5)).timestamp()
+
+
+def test_token_cache_is_bounded():
+    cache = TokenCache(maxsize=2)
+    exp = time.time() + 60
+    for name in ("a", "b", "c"):
+        cache.set(name, {"exp": exp})
+
+    assert cache.get("a") is None
+    assert cache.stats()["size"] == 2